@@ -0,0 +1,307 @@
+"""
+Benchmarks of the harness itself, on a synthetic dataset and an in-process fake Docker daemon
+with configurable latencies, so harness overhead can be measured without containers.
+
+    python benchmarks/bench_harness.py --instances 1000 --save-baseline baseline.json
+    python benchmarks/bench_harness.py --instances 1000 --baseline baseline.json
+
+`benchmarks/baseline.json` is a reference run with the default configuration, recording the
+machine it ran on. Timings vary between machines by more than the tolerance, so regressions
+should be checked against a baseline saved on the same machine; the reference is for orientation
+and for the peak memory metrics, which do not depend on the machine.
+
+Reports the import time of the command line tools, and instances/second, per-phase harness
+overhead and peak memory of loading instances, evaluating them with each output format and
+aggregating the results. With `--baseline`, exits with status 1 if any metric regressed by more
+than `--tolerance`.
+"""
+import sys
+import json
+import time
+import logging
+import subprocess
+import argparse
+import platform
+import tempfile
+import tracemalloc
+
+from pathlib import Path
+from types import SimpleNamespace
+from typing import Callable, Dict, List, Tuple, Any
+from contextlib import contextmanager, ExitStack
+from unittest.mock import patch
+
+ROOT_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT_DIR))
+
+from sweflow_bench.utils.data import load_eval_instances  # noqa: E402
+from sweflow_bench.utils.report import build_report  # noqa: E402
+from sweflow_bench.utils.result_store import ResultStore  # noqa: E402
+from sweflow_bench.utils.run_evaluation import run_evaluation  # noqa: E402
+
+logger = logging.getLogger(__name__)
+
+# operations of the fake daemon with a configurable latency
+OPERATIONS = ["start", "workspace", "checkout", "apply", "eval", "put_file", "stop", "remove"]
+PHASES = ["workspace", "checkout", "apply", "eval"]
+
+
+class FakeDockerDaemon:
+    """
+    In-process stand-in for the Docker helpers used by `DockerRuntime`, sleeping for the
+    configured latency of each operation. Every test run passes.
+    """
+
+    def __init__(self, latencies: Dict[str, float]):
+        self.latencies = latencies
+        self.started = 0
+
+    def _wait(self, operation: str):
+        latency = self.latencies.get(operation, 0.0)
+        if latency > 0:
+            time.sleep(latency)
+
+    @staticmethod
+    def get_phase(command: str) -> str:
+        if command.startswith("cp "):
+            return "workspace"
+        if command.startswith("git checkout"):
+            return "checkout"
+        if command.startswith("git apply"):
+            return "apply"
+        return "eval"
+
+    def start_docker_container(self, image_name: str, container_name: str, base_url: str | None = None):
+        self._wait("start")
+        self.started += 1
+        return SimpleNamespace(name=container_name, image=image_name)
+
+    def exec_command_in_container(self, container, command: str, timeout: int | None = None, workdir: str | None = None) -> Tuple[int, str]:
+        phase = self.get_phase(command)
+        self._wait(phase)
+        if phase == "eval":
+            return 0, f"{command}\n" + "PASSED\n" * 50 + "===== 50 passed in 0.50s =====\n"
+        return 0, ""
+
+    def copy_file_to_container(self, container, local_path: str, container_path: str, base_url: str | None = None):
+        self._wait("put_file")
+
+    def stop_docker_container(self, container):
+        self._wait("stop")
+
+    def remove_docker_container(self, container):
+        self._wait("remove")
+
+    @contextmanager
+    def install(self):
+        with ExitStack() as stack:
+            for name in [
+                "start_docker_container",
+                "exec_command_in_container",
+                "copy_file_to_container",
+                "stop_docker_container",
+                "remove_docker_container",
+            ]:
+                stack.enter_context(patch(f"sweflow_bench.utils.runtime.{name}", getattr(self, name)))
+            yield self
+
+
+def make_synthetic_dataset(num_instances: int, num_repos: int = 20, num_tests: int = 50) -> List[dict]:
+    """
+    Make dataset rows with realistically sized problem statements, patches and test lists.
+    """
+    rows = []
+    for i in range(num_instances):
+        repo = f"org-{i % num_repos}/repo-{i % num_repos}"
+        patch_lines = "".join(f"-    old_line_{j}()\n+    new_line_{j}()\n" for j in range(40))
+        rows.append({
+            "instance_id": f"{repo.replace('/', '__')}-{i}",
+            "repo": repo,
+            "problem_statement": f"Problem statement of instance {i}.\n" * 60,
+            "base_commit": f"{i:040x}",
+            "reference_commit": f"{i + 1:040x}",
+            "patch": f"diff --git a/src/module_{i}.py b/src/module_{i}.py\n--- a/src/module_{i}.py\n+++ b/src/module_{i}.py\n@@ -1,40 +1,40 @@\n{patch_lines}",
+            "docker_image": f"sweflow/{repo.replace('/', '__')}:latest",
+            "FAIL_TO_PASS": [f"tests/test_module_{i}.py::test_fail_to_pass_{j}" for j in range(5)],
+            "PASS_TO_PASS": [f"tests/test_module_{i}.py::test_pass_to_pass_{j}" for j in range(num_tests)],
+        })
+    return rows
+
+
+def write_jsonl(path: Path, rows: List[dict]):
+    with open(path, "w") as f:
+        for row in rows:
+            f.write(json.dumps(row) + "\n")
+
+
+def measure(fn: Callable[[], Any], memory: bool = True) -> Tuple[Any, float, int | None]:
+    """
+    Run `fn` and return its result, wall-clock seconds and peak traced memory in bytes. The
+    memory is measured in a second run, as tracing slows down the first one.
+    """
+    start_time = time.perf_counter()
+    result = fn()
+    seconds = time.perf_counter() - start_time
+
+    peak = None
+    if memory:
+        tracemalloc.start()
+        try:
+            fn()
+            peak = tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+
+    return result, seconds, peak
+
+
+def measure_import_seconds(module: str, repeat: int = 5) -> float:
+    """
+    Seconds a fresh interpreter takes to import the module, on top of starting up. The fastest of
+    `repeat` runs, as the others measure a busy machine.
+    """
+    def run(code: str) -> float:
+        start_time = time.perf_counter()
+        subprocess.run([sys.executable, "-c", code], check=True, cwd=ROOT_DIR)
+        return time.perf_counter() - start_time
+
+    return min(run(f"import {module}") for _ in range(repeat)) - min(run("pass") for _ in range(repeat))
+
+
+def run_benchmarks(num_instances: int, latencies: Dict[str, float], work_dir: Path, memory: bool = True) -> Dict[str, float]:
+    metrics: Dict[str, float] = {}
+
+    # startup of the command line tools, e.g. `sweflow-bench-run --help`
+    metrics["cli_import_ms"] = measure_import_seconds("sweflow_bench.main") * 1e3
+
+    # the loader reads local datasets from <DATA_DIR>/<dataset>.jsonl, pointed at the work directory
+    dataset = "bench-synthetic"
+    predictions_path = work_dir / "predictions.jsonl"
+    rows = make_synthetic_dataset(num_instances)
+    write_jsonl(work_dir / f"{dataset}.jsonl", rows)
+    write_jsonl(predictions_path, [{"instance_id": row["instance_id"], "patch": row["patch"], "model": "bench-model"} for row in rows])
+    with patch("sweflow_bench.utils.data.DATA_DIR", work_dir):
+        instances, seconds, peak = measure(lambda: load_eval_instances(dataset, "test", str(predictions_path)), memory)
+    metrics["load_instances_per_second"] = num_instances / seconds
+    if peak is not None:
+        metrics["load_peak_memory_mb"] = peak / 1e6
+
+    daemon = FakeDockerDaemon(latencies)
+    for output_format in ["directory", "compact"]:
+        run = 0
+
+        def evaluate():
+            nonlocal run
+            run += 1
+            output_dir = work_dir / f"output-{output_format}-{run}"
+            result_store = ResultStore(str(output_dir)) if output_format == "compact" else None
+            with daemon.install():
+                return run_evaluation(instances, str(output_dir), result_store=result_store)
+
+        results, seconds, peak = measure(evaluate, memory)
+        metrics[f"evaluate_{output_format}_instances_per_second"] = num_instances / seconds
+        if peak is not None:
+            metrics[f"evaluate_{output_format}_peak_memory_mb"] = peak / 1e6
+
+        if output_format == "directory":
+            # harness time per instance on top of the simulated latency of each phase
+            for phase in PHASES:
+                overhead = sum(result.durations[phase] for result in results) / num_instances - latencies.get(phase, 0.0)
+                metrics[f"{phase}_overhead_ms"] = overhead * 1e3
+            phases_seconds = sum(sum(result.durations.values()) for result in results)
+            simulated_seconds = num_instances * sum(latencies.get(operation, 0.0) for operation in OPERATIONS if operation not in PHASES)
+            metrics["other_overhead_ms"] = (seconds - phases_seconds - simulated_seconds) / num_instances * 1e3
+
+    results_path = work_dir / "results.jsonl"
+    with open(results_path, "w") as f:
+        for result in results:
+            f.write(result.model_dump_json() + "\n")
+    _, seconds, peak = measure(lambda: build_report([str(results_path)], workers=1), memory)
+    metrics["report_rows_per_second"] = num_instances / seconds
+    if peak is not None:
+        metrics["report_peak_memory_mb"] = peak / 1e6
+
+    return metrics
+
+
+def is_higher_better(metric: str) -> bool:
+    return metric.endswith("_per_second")
+
+
+def compare_to_baseline(metrics: Dict[str, float], baseline: Dict[str, float], tolerance: float) -> List[str]:
+    """
+    Compare the metrics to the baseline and return the names of the regressed metrics. Overheads
+    below a millisecond are too noisy to compare.
+    """
+    regressions = []
+    print(f"\n{'metric':<45} {'baseline':>12} {'current':>12} {'change':>8}")
+    for metric, value in metrics.items():
+        if metric not in baseline:
+            continue
+        baseline_value = baseline[metric]
+        change = (value - baseline_value) / baseline_value if baseline_value else 0.0
+        regressed = change < -tolerance if is_higher_better(metric) else change > tolerance
+        if metric.endswith("_overhead_ms") and max(value, baseline_value) < 1.0:
+            regressed = False
+        if regressed:
+            regressions.append(metric)
+        print(f"{metric:<45} {baseline_value:>12.3f} {value:>12.3f} {change:>+8.1%}{'  REGRESSED' if regressed else ''}")
+    return regressions
+
+
+def parse_latency(value: str) -> Tuple[str, float]:
+    operation, _, seconds = value.partition("=")
+    if operation not in OPERATIONS or not seconds:
+        raise argparse.ArgumentTypeError(f"Expected <operation>=<seconds> with an operation of {OPERATIONS}, got {value}")
+    return operation, float(seconds)
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Benchmark the harness with a fake Docker daemon.")
+    parser.add_argument("--instances", type=int, default=500, help="Number of synthetic instances.")
+    parser.add_argument("--latency", type=parse_latency, action="append", default=[], help=f"Simulated latency of a daemon operation as <operation>=<seconds>, operations: {', '.join(OPERATIONS)}.")
+    parser.add_argument("--no-memory", action="store_true", help="Skip the traced runs measuring peak memory.")
+    parser.add_argument("--output", type=str, default=None, help="Write the metrics as json to this path.")
+    parser.add_argument("--save-baseline", type=str, default=None, help="Save the metrics as a baseline to this path.")
+    parser.add_argument("--baseline", type=str, default=None, help="Compare the metrics to the baseline at this path.")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="Relative change of a metric beyond which it counts as regressed.")
+
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    logging.basicConfig(level=logging.WARNING)
+    latencies = dict(args.latency)
+    config = {"instances": args.instances, "latencies": latencies}
+
+    with tempfile.TemporaryDirectory(prefix="sweflow-bench-benchmark-") as work_dir:
+        metrics = run_benchmarks(args.instances, latencies, Path(work_dir), memory=not args.no_memory)
+
+    print(f"{'metric':<45} {'value':>12}")
+    for metric, value in metrics.items():
+        print(f"{metric:<45} {value:>12.3f}")
+
+    record = {
+        "config": config,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "metrics": metrics,
+    }
+    if args.output is not None:
+        Path(args.output).write_text(json.dumps(record, indent=4))
+    if args.save_baseline is not None:
+        Path(args.save_baseline).write_text(json.dumps(record, indent=4))
+
+    if args.baseline is not None:
+        baseline = json.loads(Path(args.baseline).read_text())
+        if baseline["config"] != config:
+            logger.warning(f"Baseline config {baseline['config']} differs from {config}, metrics may not be comparable")
+        regressions = compare_to_baseline(metrics, baseline["metrics"], args.tolerance)
+        if regressions:
+            print(f"\n{len(regressions)} metrics regressed beyond {args.tolerance:.0%}: {', '.join(regressions)}")
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,10 +1,25 @@
+import json
 import argparse
 import logging
 
 from pathlib import Path
+from contextlib import nullcontext
 
 from sweflow_bench.utils.data import load_eval_instances
-from sweflow_bench.utils.run_evaluation import run_evaluation
+from sweflow_bench.utils.run_evaluation import run_evaluation, prepare_snapshots
+from sweflow_bench.utils.timeouts import PhaseTimeouts, TimingHistory
+from sweflow_bench.utils.repo_cache import RepoCache
+from sweflow_bench.utils.runtime import RUNTIME_BACKENDS
+from sweflow_bench.utils.docker_hosts import parse_docker_host
+from sweflow_bench.utils.retry import RetryPolicy
+from sweflow_bench.utils.progress import ProgressReporter
+from sweflow_bench.utils.metrics import start_metrics_server
+from sweflow_bench.utils.result_store import OUTPUT_FORMATS, ResultStore, ResultStoreReader
+from sweflow_bench.utils.report import build_report, format_report
+from sweflow_bench.utils.profiling import profile_orchestrator
+from sweflow_bench.utils.flaky import RerunPolicy, FlakyTestDatabase
+from sweflow_bench.utils.affected_tests import P2P_SELECTIONS, GoldBaseline
+from sweflow_bench.utils.work_queue import FileWorkQueue, get_worker_id, run_coordinator, run_worker
 
 logging.basicConfig(
     level=logging.INFO,
@@ -14,6 +29,138 @@ logging.basicConfig(
 logger = logging.getLogger(__name__)
 
 
+def add_evaluation_args(parser: argparse.ArgumentParser):
+    """
+    Add the arguments controlling how each instance is evaluated.
+    """
+    parser.add_argument("--workspace-timeout", type=int, default=60, help="Timeout in seconds for copying /testbed to /workspace.")
+    parser.add_argument("--checkout-timeout", type=int, default=300, help="Timeout in seconds for checking out the base commit.")
+    parser.add_argument("--apply-timeout", type=int, default=60, help="Timeout in seconds for applying the patch.")
+    parser.add_argument("--eval-timeout", type=int, default=900, help="Timeout in seconds for running the tests.")
+    parser.add_argument("--timing-history", type=str, default=None, help="Path to a jsonl file to read and record per-repo phase durations.")
+    parser.add_argument("--adaptive-timeouts", action="store_true", help="Shorten timeouts to a multiple of the historic p95 per repo (requires --timing-history).")
+    parser.add_argument("--timeout-multiplier", type=float, default=3.0, help="Multiple of the historic p95 used by --adaptive-timeouts.")
+    parser.add_argument("--preflight", action="store_true", help="Check patches on the host before starting containers.")
+    parser.add_argument("--repo-cache-dir", type=str, default=None, help="Directory of cached bare repo mirrors used for host-side git operations.")
+    parser.add_argument("--populate-repo-cache", action="store_true", help="Populate missing repo mirrors from the instance images.")
+    parser.add_argument("--preflight-workers", type=int, default=None, help="Number of parallel pre-flight checks.")
+    parser.add_argument("--runtime", type=str, choices=RUNTIME_BACKENDS, default="docker", help="Backend to evaluate instances in.")
+    parser.add_argument("--docker-host", type=parse_docker_host, action="append", default=None, dest="docker_hosts", help="Docker daemon to run instances on as <base_url>[=<slots>], e.g. ssh://user@host=8. Repeat to spread instances over several hosts, by default one at a time on the local daemon.")
+    parser.add_argument("--docker-host-max-errors", type=int, default=3, help="Consecutive Docker errors after which a --docker-host is no longer used.")
+    parser.add_argument("--max-attempts", type=int, default=3, help="Attempts of each instance on infrastructure failures, e.g. Docker errors or containers killed out of memory.")
+    parser.add_argument("--retry-delay", type=float, default=1.0, help="Seconds before the first retry, doubled for each further retry, with jitter.")
+    parser.add_argument("--retry-max-delay", type=float, default=60.0, help="Maximum seconds between retries.")
+    parser.add_argument("--local-testbed-dir", type=str, default=None, help="Directory of pre-prepared testbeds, one per instance ID or repo, for --runtime local.")
+    parser.add_argument("--metrics-port", type=int, default=None, help="Serve Prometheus metrics at http://<metrics-host>:<port>/metrics.")
+    parser.add_argument("--metrics-host", type=str, default="127.0.0.1", help="Address the metrics endpoint binds to.")
+    parser.add_argument("--use-snapshots", action="store_true", help="Start instances from their snapshot image at base_commit if one exists.")
+    parser.add_argument("--profile", action="store_true", help="Profile the orchestrator and its threads with cProfile into output_dir/profile.prof, and record runtime operation timings in each report.")
+    parser.add_argument("--flaky-reruns", type=int, default=0, help="Rerun failed tests up to this many times, resolving instances whose failed tests pass on a rerun.")
+    parser.add_argument("--flaky-max-failed", type=int, default=5, help="Do not rerun if more tests than this failed.")
+    parser.add_argument("--flaky-db", type=str, default=None, help="Path to a SQLite database recording test runs and flaky tests per repo.")
+    parser.add_argument("--skip-known-flaky", action="store_true", help="Deselect PASS_TO_PASS tests known to be flaky (requires --flaky-db).")
+    parser.add_argument("--flaky-min-runs", type=int, default=2, help="Flaky observations after which a test is known to be flaky.")
+    parser.add_argument("--gold-baseline", type=str, default=None, help="Path to a jsonl file recording gold runs with per-test durations.")
+    parser.add_argument("--p2p-selection", type=str, choices=P2P_SELECTIONS, default="full", help="Run all PASS_TO_PASS tests, or only those affected by the patch for instances whose gold run passed (requires --gold-baseline and --repo-cache-dir).")
+    parser.add_argument("--early-exit", action="store_true", help="Run FAIL_TO_PASS tests first, stopping at the first failure, and PASS_TO_PASS tests only if they all passed.")
+    parser.add_argument("--output-format", type=str, choices=OUTPUT_FORMATS, default="directory", help="Save results to a directory per instance, or compactly to an append-only reports file and a compressed log archive.")
+
+
+def check_evaluation_args(parser: argparse.ArgumentParser, args: argparse.Namespace):
+    if args.adaptive_timeouts and args.timing_history is None:
+        parser.error("--adaptive-timeouts requires --timing-history")
+    if args.runtime == "local" and args.local_testbed_dir is None:
+        parser.error("--runtime local requires --local-testbed-dir")
+    if args.docker_hosts and (args.runtime != "docker" or args.use_snapshots):
+        parser.error("--docker-host requires --runtime docker and cannot be used with snapshots")
+    if args.max_attempts < 1:
+        parser.error("--max-attempts must be at least 1")
+    if args.skip_known_flaky and args.flaky_db is None:
+        parser.error("--skip-known-flaky requires --flaky-db")
+    if args.p2p_selection == "affected" and (args.gold_baseline is None or args.repo_cache_dir is None):
+        parser.error("--p2p-selection affected requires --gold-baseline and --repo-cache-dir")
+
+
+def check_coordinator_args(parser: argparse.ArgumentParser, args: argparse.Namespace):
+    """
+    Reject evaluation arguments given with `--queue-dir`, as the workers evaluate the instances
+    with their own arguments. Only the metrics server runs in the coordinator, and the timeouts
+    apply to `--prepare-snapshots`.
+    """
+    evaluation_parser = argparse.ArgumentParser(add_help=False)
+    add_evaluation_args(evaluation_parser)
+    used = {"metrics_port", "metrics_host"}
+    if args.prepare_snapshots:
+        used |= {"workspace_timeout", "checkout_timeout", "apply_timeout", "eval_timeout"}
+    ignored = [
+        action.option_strings[0] for action in evaluation_parser._actions
+        if action.dest not in used and getattr(args, action.dest) != action.default
+    ]
+    if ignored:
+        parser.error(f"{', '.join(ignored)} cannot be used with --queue-dir, pass them to sweflow-bench-worker instead")
+
+
+def get_timeouts(args: argparse.Namespace) -> PhaseTimeouts:
+    return PhaseTimeouts(
+        workspace=args.workspace_timeout,
+        checkout=args.checkout_timeout,
+        apply=args.apply_timeout,
+        eval=args.eval_timeout,
+    )
+
+
+def maybe_start_metrics_server(args: argparse.Namespace):
+    if args.metrics_port is not None:
+        start_metrics_server(args.metrics_port, args.metrics_host)
+
+
+def maybe_profile(args: argparse.Namespace, name: str = "profile"):
+    if args.profile:
+        return profile_orchestrator(args.output_dir, name)
+    return nullcontext()
+
+
+def get_evaluation_kwargs(args: argparse.Namespace, shard: str | None = None) -> dict:
+    """
+    Get the keyword arguments of `run_evaluation` from the parsed arguments. `shard` names the
+    result store files of this process, for concurrent writers to the same output directory.
+    """
+    timing_history = TimingHistory(args.timing_history) if args.timing_history is not None else None
+    result_store = ResultStore(args.output_dir, shard) if args.output_format == "compact" else None
+
+    return dict(
+        timeouts=get_timeouts(args),
+        timing_history=timing_history,
+        adaptive_multiplier=args.timeout_multiplier if args.adaptive_timeouts else None,
+        preflight=args.preflight,
+        repo_cache=RepoCache(args.repo_cache_dir) if args.repo_cache_dir is not None else None,
+        preflight_workers=args.preflight_workers,
+        populate_repo_cache=args.populate_repo_cache,
+        runtime_backend=args.runtime,
+        local_testbed_dir=args.local_testbed_dir,
+        use_snapshots=args.use_snapshots,
+        result_store=result_store,
+        profile=args.profile,
+        rerun_policy=RerunPolicy(
+            max_reruns=args.flaky_reruns,
+            max_failed_tests=args.flaky_max_failed,
+            skip_known_flaky=args.skip_known_flaky,
+            min_flaky_runs=args.flaky_min_runs,
+        ),
+        flaky_db=FlakyTestDatabase(args.flaky_db) if args.flaky_db is not None else None,
+        gold_baseline=GoldBaseline(args.gold_baseline) if args.gold_baseline is not None else None,
+        p2p_selection=args.p2p_selection,
+        early_exit=args.early_exit,
+        docker_hosts=args.docker_hosts,
+        docker_host_max_errors=args.docker_host_max_errors,
+        retry_policy=RetryPolicy(
+            max_attempts=args.max_attempts,
+            initial_delay=args.retry_delay,
+            max_delay=args.retry_max_delay,
+        ),
+    )
+
+
 def parse_args():
     """
     Parse command line arguments.
@@ -24,14 +171,72 @@ def parse_args():
     parser.add_argument("--prediction-path", type=str, required=True, help="Path to the predictions.")
     parser.add_argument("--output-dir", type=str, required=True, help="Output directory to save the results.")
     parser.add_argument("--instance-ids", type=str, nargs="+", default=None, help="Instance IDs to evaluate.")
+    parser.add_argument("--queue-dir", type=str, default=None, help="Shared queue directory. If set, instances are enqueued for `sweflow-bench-worker` processes instead of evaluated locally.")
+    parser.add_argument("--poll-interval", type=float, default=5.0, help="Seconds between polls of the queue directory.")
+    parser.add_argument("--prepare-snapshots", action="store_true", help="Commit a snapshot image of each instance at base_commit before evaluating, and evaluate from it.")
+    parser.add_argument("--progress-interval", type=float, default=30.0, help="Seconds between progress reports in the log and output_dir/progress.json.")
+    parser.add_argument("--snapshot-max-size-gb", type=float, default=None, help="Remove the oldest snapshot images beyond this total size after preparing.")
+    add_evaluation_args(parser)
 
     args = parser.parse_args()
+    check_evaluation_args(parser, args)
+    if args.queue_dir is not None:
+        check_coordinator_args(parser, args)
+    if args.prepare_snapshots:
+        if args.runtime != "docker" or args.docker_hosts:
+            parser.error("--prepare-snapshots requires --runtime docker on the local daemon")
+        args.use_snapshots = True
 
     return args
 
 
+def parse_worker_args():
+    """
+    Parse command line arguments of a queue worker.
+    """
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--queue-dir", type=str, required=True, help="Shared queue directory to claim instances from.")
+    parser.add_argument("--output-dir", type=str, required=True, help="Output directory to save the per-instance reports.")
+    parser.add_argument("--worker-id", type=str, default=None, help="Unique worker ID, defaults to <hostname>-<pid>.")
+    parser.add_argument("--lease-seconds", type=float, default=300.0, help="Seconds a claimed instance is leased before it is requeued if not renewed.")
+    parser.add_argument("--poll-interval", type=float, default=5.0, help="Seconds between polls of the queue directory.")
+    parser.add_argument("--exit-when-empty", action="store_true", help="Exit once the queue has no pending or leased instances.")
+    add_evaluation_args(parser)
+
+    args = parser.parse_args()
+    check_evaluation_args(parser, args)
+
+    return args
+
+
+def parse_logs_args():
+    """
+    Parse command line arguments of the log extraction tool.
+    """
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--output-dir", type=str, required=True, help="Output directory of a run with --output-format compact.")
+    parser.add_argument("--instance-ids", type=str, nargs="+", default=None, help="Instance IDs to extract, defaults to all.")
+    parser.add_argument("--extract-dir", type=str, default=None, help="Write <instance_id>/test_output.log and report.json here instead of printing the logs.")
+
+    return parser.parse_args()
+
+
+def parse_report_args():
+    """
+    Parse command line arguments of the report tool.
+    """
+    parser = argparse.ArgumentParser()
+    parser.add_argument("results", type=str, nargs="+", help="Results files or output directories, one per model run.")
+    parser.add_argument("--by-repo", action="store_true", help="Break down each model's results per repo.")
+    parser.add_argument("--output", type=str, default=None, help="Also write the report as json to this path.")
+    parser.add_argument("--workers", type=int, default=None, help="Number of processes parsing results files, defaults to the number of CPUs.")
+
+    return parser.parse_args()
+
+
 def main():
     args = parse_args()
+    maybe_start_metrics_server(args)
 
     eval_instances = load_eval_instances(
         args.dataset,
@@ -40,13 +245,68 @@ def main():
         args.instance_ids,
     )
 
-    results = run_evaluation(eval_instances, args.output_dir)
+    if args.prepare_snapshots:
+        prepare_snapshots(
+            eval_instances,
+            get_timeouts(args),
+            int(args.snapshot_max_size_gb * 1e9) if args.snapshot_max_size_gb is not None else None,
+        )
+
+    Path(args.output_dir).mkdir(parents=True, exist_ok=True)
+    progress = ProgressReporter(len(eval_instances), args.output_dir, args.progress_interval)
+
+    with maybe_profile(args):
+        if args.queue_dir is not None:
+            results = run_coordinator(eval_instances, FileWorkQueue(args.queue_dir), args.poll_interval, progress)
+        else:
+            results = run_evaluation(eval_instances, args.output_dir, progress=progress, **get_evaluation_kwargs(args))
 
-    # save results
+    # save results, without the logs already in the compressed log archive
     results_path = Path(args.output_dir) / "results.jsonl"
+    exclude = {"test_log"} if args.output_format == "compact" else None
     with open(results_path, "w") as f:
         for result in results:
-            f.write(result.model_dump_json() + "\n")
+            f.write(result.model_dump_json(exclude=exclude) + "\n")
+
+
+def worker_main():
+    args = parse_worker_args()
+    maybe_start_metrics_server(args)
+
+    worker_id = args.worker_id or get_worker_id()
+    with maybe_profile(args, f"profile.{worker_id}"):
+        run_worker(
+            FileWorkQueue(args.queue_dir),
+            args.output_dir,
+            worker_id=worker_id,
+            lease_seconds=args.lease_seconds,
+            poll_interval=args.poll_interval,
+            exit_when_empty=args.exit_when_empty,
+            evaluation_kwargs=get_evaluation_kwargs(args, shard=worker_id),
+        )
+
+
+def logs_main():
+    args = parse_logs_args()
+    reader = ResultStoreReader(args.output_dir)
+
+    for instance_id in args.instance_ids or reader.instance_ids():
+        if args.extract_dir is None:
+            print(reader.get_log(instance_id), end="")
+            continue
+        instance_dir = Path(args.extract_dir) / instance_id
+        instance_dir.mkdir(parents=True, exist_ok=True)
+        (instance_dir / "report.json").write_text(json.dumps(reader.get_report(instance_id), indent=4))
+        (instance_dir / "test_output.log").write_text(reader.get_log(instance_id))
+
+
+def report_main():
+    args = parse_report_args()
+    report = build_report(args.results, workers=args.workers)
+
+    print(format_report(report, by_repo=args.by_repo))
+    if args.output is not None:
+        Path(args.output).write_text(json.dumps(report.to_dict(), indent=4))
 
 
 if __name__ == "__main__":
@@ -0,0 +1,304 @@
+import os
+import re
+import ast
+import json
+import logging
+import threading
+
+from pathlib import Path
+from collections import deque, OrderedDict
+from typing import List, Dict, Set, Tuple
+
+from sweflow_bench.utils.data import SWEFlowTestInstance
+from sweflow_bench.utils.preflight import PatchError, parse_patch
+from sweflow_bench.utils.repo_cache import RepoCache, RepoCacheError
+
+logger = logging.getLogger(__name__)
+
+P2P_SELECTIONS = ["full", "affected"]
+
+# lines of the `--durations=0` report of pytest, e.g. "0.52s call     tests/test_a.py::test_b"
+DURATION_PATTERN = re.compile(r"^([\d.]+)s (?:setup|call|teardown)\s+(\S+::.+?)\s*$", re.MULTILINE)
+
+# old paths of modified, renamed or deleted files, which `parse_patch` does not return
+OLD_PATH_PATTERN = re.compile(r"^(?:--- a/|rename from )(\S+)", re.MULTILINE)
+
+# paths of files a patch deletes, whose diff ends at /dev/null or, if empty, has no ---/+++ lines
+DELETED_PATH_PATTERN = re.compile(r"^(?:--- a/(\S+)\n\+\+\+ /dev/null|diff --git a/(\S+) b/\S+\ndeleted file mode)", re.MULTILINE)
+
+# files that change how pytest collects and imports tests when added or deleted
+PACKAGE_FILES = {"conftest.py", "__init__.py"}
+
+# import graphs kept in memory, instances of the same base commit are usually evaluated together
+MAX_CACHED_GRAPHS = 16
+
+# modified files that cannot change test outcomes, any other non-Python file disables selection
+DOC_SUFFIXES = {".md", ".rst"}
+
+
+def parse_test_durations(output: str) -> Dict[str, float]:
+    """
+    Parse the seconds of setup, call and teardown of each test from a `--durations=0` report.
+    """
+    durations: Dict[str, float] = {}
+    for seconds, test_id in DURATION_PATTERN.findall(output):
+        durations[test_id] = durations.get(test_id, 0.0) + float(seconds)
+    return durations
+
+
+class GoldBaseline:
+    """
+    Results of gold runs per instance, with the duration of each test, persisted as a jsonl file.
+    """
+
+    def __init__(self, path: str):
+        self.path = Path(path)
+        self.records: Dict[str, dict] = {}
+        self.lock = threading.Lock()
+        if self.path.exists():
+            with open(self.path, "r") as f:
+                for line in f:
+                    if not line.strip():
+                        continue
+                    record = json.loads(line)
+                    self.records[record["instance_id"]] = record
+            logger.info(f"Loaded gold baseline of {len(self.records)} instances from {self.path}")
+
+    def record(self, instance: SWEFlowTestInstance, resolved: bool, test_durations: Dict[str, float]):
+        record = {
+            "instance_id": instance.instance_id,
+            "repo": instance.repo,
+            "base_commit": instance.base_commit,
+            "resolved": resolved,
+            "test_durations": test_durations,
+        }
+        with self.lock:
+            self.records[instance.instance_id] = record
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            with open(self.path, "a") as f:
+                f.write(json.dumps(record) + "\n")
+
+    def get(self, instance: SWEFlowTestInstance) -> dict | None:
+        """
+        Get the gold run of the instance, if it was recorded at the same base commit.
+        """
+        record = self.records.get(instance.instance_id)
+        if record is None or record["base_commit"] != instance.base_commit:
+            return None
+        return record
+
+
+def get_modified_files(patch: str) -> List[str]:
+    """
+    Get the old and new paths of all files the patch modifies. Raises `PatchError` if the
+    patch is invalid.
+    """
+    files = parse_patch(patch)
+    return sorted(set(files) | set(OLD_PATH_PATTERN.findall(patch)))
+
+
+def get_deleted_files(patch: str) -> List[str]:
+    """
+    Get the paths of all files the patch deletes.
+    """
+    return sorted({path for match in DELETED_PATH_PATTERN.findall(patch) for path in match if path})
+
+
+def _get_module_name(path: str) -> str:
+    module = path[:-len(".py")].replace("/", ".")
+    return module[:-len(".__init__")] if module.endswith(".__init__") else module
+
+
+def _get_imported_modules(source: str, module: str, is_package: bool) -> Set[str]:
+    """
+    Get the dotted names of the modules the source imports, including the parents of each
+    module and candidate submodules of `from` imports. Relative imports are resolved against
+    the module's dotted path from the repo root.
+    """
+    tree = ast.parse(source)
+    package = module.split(".") if is_package else module.split(".")[:-1]
+    imported = set()
+    for node in ast.walk(tree):
+        if isinstance(node, ast.Import):
+            names = [alias.name for alias in node.names]
+        elif isinstance(node, ast.ImportFrom):
+            if node.level > 0:
+                base = package[:len(package) - node.level + 1] if node.level <= len(package) + 1 else []
+                base_module = ".".join(base + ([node.module] if node.module else []))
+            else:
+                base_module = node.module or ""
+            names = [base_module] + [f"{base_module}.{alias.name}" if base_module else alias.name for alias in node.names]
+        else:
+            continue
+        for name in names:
+            parts = name.split(".")
+            imported.update(".".join(parts[:i]) for i in range(1, len(parts) + 1))
+    imported.discard("")
+    return imported
+
+
+def build_import_graph(root: str) -> Dict[str, List[str]]:
+    """
+    Build the graph of which repo files each Python file under `root` imports. Modules are
+    matched by every suffix of their dotted path, as the import roots are unknown, which
+    over-approximates the imports and errs on the side of selecting tests.
+    """
+    root = Path(root)
+    files = []
+    for dirpath, dirnames, filenames in os.walk(root):
+        dirnames[:] = [dirname for dirname in dirnames if not dirname.startswith(".")]
+        for filename in filenames:
+            if filename.endswith(".py"):
+                files.append((Path(dirpath) / filename).relative_to(root).as_posix())
+
+    modules: Dict[str, Set[str]] = {}
+    for path in files:
+        parts = _get_module_name(path).split(".")
+        for i in range(len(parts)):
+            modules.setdefault(".".join(parts[i:]), set()).add(path)
+
+    graph = {}
+    for path in files:
+        try:
+            source = (root / path).read_text(errors="replace")
+            imported = _get_imported_modules(source, _get_module_name(path), path.endswith("__init__.py"))
+        except (SyntaxError, ValueError):
+            # e.g. Python 2 files, which cannot be imported by the tests either
+            imported = set()
+        graph[path] = sorted({dependency for name in imported for dependency in modules.get(name, ())} - {path})
+    return graph
+
+
+class ImportGraphCache:
+    """
+    Import graphs of repos at given commits, built from worktrees of the repo cache and cached
+    as json under `<cache_dir>/import-graphs`.
+    """
+
+    def __init__(self, repo_cache: RepoCache, cache_dir: str | None = None):
+        self.repo_cache = repo_cache
+        self.cache_dir = Path(cache_dir or repo_cache.cache_dir) / "import-graphs"
+        self.graphs: OrderedDict[Tuple[str, str], Dict[str, List[str]]] = OrderedDict()
+        self.lock = threading.Lock()
+
+    def get(self, repo: str, commit: str) -> Dict[str, List[str]] | None:
+        """
+        Get the import graph of `repo` at `commit`, or None if the commit is not cached.
+        """
+        with self.lock:
+            if (repo, commit) in self.graphs:
+                self.graphs.move_to_end((repo, commit))
+                return self.graphs[(repo, commit)]
+            graph_path = self.cache_dir / repo.replace("/", "__") / f"{commit}.json"
+            if graph_path.exists():
+                graph = json.loads(graph_path.read_text())
+            else:
+                if not self.repo_cache.has_commit(repo, commit):
+                    return None
+                try:
+                    with self.repo_cache.worktree(repo, commit) as path:
+                        graph = build_import_graph(str(path))
+                except RepoCacheError as e:
+                    logger.warning(f"Could not build import graph of {repo} at {commit}: {e.message}")
+                    return None
+                graph_path.parent.mkdir(parents=True, exist_ok=True)
+                temp_path = graph_path.parent / f".{graph_path.name}.{os.getpid()}.tmp"
+                temp_path.write_text(json.dumps(graph))
+                os.replace(temp_path, graph_path)
+            self.graphs[(repo, commit)] = graph
+            if len(self.graphs) > MAX_CACHED_GRAPHS:
+                self.graphs.popitem(last=False)
+            return graph
+
+
+def get_dependencies(graph: Dict[str, List[str]], test_module: str) -> Set[str]:
+    """
+    Get the files the test module imports directly or transitively, including the module itself
+    and the `conftest.py` files pytest loads for it.
+    """
+    roots = [test_module]
+    parent = Path(test_module).parent
+    while True:
+        conftest = (parent / "conftest.py").as_posix().removeprefix("./")
+        if conftest in graph:
+            roots.append(conftest)
+        if parent == parent.parent:
+            break
+        parent = parent.parent
+
+    dependencies = set(roots)
+    queue = deque(roots)
+    while queue:
+        for dependency in graph.get(queue.popleft(), []):
+            if dependency not in dependencies:
+                dependencies.add(dependency)
+                queue.append(dependency)
+    return dependencies
+
+
+def get_affected_tests(
+    test_ids: List[str],
+    modified_files: List[str],
+    graph: Dict[str, List[str]],
+    deleted_files: List[str] | None = None,
+) -> List[str] | None:
+    """
+    Get the tests whose module is modified or imports a modified file, or None if any test may
+    be affected: a non-Python file was modified, a Python file was added, which the graph at the
+    base commit does not know, or a `conftest.py` or `__init__.py` was deleted.
+    """
+    modified_files = set(modified_files)
+    for path in modified_files:
+        suffix = Path(path).suffix
+        if suffix == ".py" and path not in graph:
+            return None
+        if suffix != ".py" and suffix not in DOC_SUFFIXES:
+            return None
+    if any(Path(path).name in PACKAGE_FILES for path in deleted_files or []):
+        return None
+
+    affected = []
+    dependencies_cache: Dict[str, Set[str]] = {}
+    for test_id in test_ids:
+        test_module = test_id.split("::", 1)[0]
+        if test_module not in graph:
+            # cannot tell what the test depends on
+            affected.append(test_id)
+            continue
+        if test_module not in dependencies_cache:
+            dependencies_cache[test_module] = get_dependencies(graph, test_module)
+        if dependencies_cache[test_module] & modified_files:
+            affected.append(test_id)
+    return affected
+
+
+def select_pass_to_pass(
+    instance: SWEFlowTestInstance,
+    gold_baseline: GoldBaseline,
+    import_graphs: ImportGraphCache,
+) -> List[str]:
+    """
+    Select the PASS_TO_PASS tests the instance's patch may affect. All tests are selected
+    unless the gold run passed all of them at the same base commit.
+    """
+    gold_run = gold_baseline.get(instance)
+    if gold_run is None or not gold_run["resolved"]:
+        return instance.PASS_TO_PASS
+    try:
+        modified_files = get_modified_files(instance.patch)
+    except PatchError:
+        return instance.PASS_TO_PASS
+    graph = import_graphs.get(instance.repo, instance.base_commit)
+    if graph is None:
+        return instance.PASS_TO_PASS
+
+    affected = get_affected_tests(instance.PASS_TO_PASS, modified_files, graph, get_deleted_files(instance.patch))
+    if affected is None:
+        return instance.PASS_TO_PASS
+    selected = set(affected)
+    skipped_seconds = sum(gold_run["test_durations"].get(test_id, 0.0) for test_id in instance.PASS_TO_PASS if test_id not in selected)
+    logger.info(
+        f"Selected {len(affected)}/{len(instance.PASS_TO_PASS)} PASS_TO_PASS tests of {instance.instance_id}, "
+        f"skipping {skipped_seconds:.1f}s of gold test time"
+    )
+    return affected
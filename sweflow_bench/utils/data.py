@@ -1,12 +1,21 @@
+import sys
 import json
 import logging
+import threading
 from pathlib import Path
-from typing import List, Dict
-from datasets import load_dataset
-from pydantic import BaseModel
+from functools import lru_cache
+from typing import List, Dict, Iterable
+from pydantic import BaseModel, field_validator
 
 logger = logging.getLogger(__name__)
 
+# directory of local datasets, read from <DATA_DIR>/<dataset>.jsonl
+DATA_DIR = Path(__file__).parent.parent.parent / "data"
+# large text fields of dataset rows which evaluation does not need, loaded on demand
+LAZY_FIELDS = ["problem_statement", "patch"]
+# fields repeated across instances, interned so instances share one string
+INTERNED_FIELDS = ["repo", "docker_image", "base_commit"]
+
 
 class Prediction(BaseModel):
     instance_id: str
@@ -17,48 +26,161 @@ class Prediction(BaseModel):
 class SWEFlowInstance(BaseModel):
     instance_id: str
     repo: str
-    problem_statement: str
+    # None if left out when loading, see `load_field`
+    problem_statement: str | None = None
     base_commit: str
     reference_commit: str
-    patch: str
+    # gold patch, None if left out when loading
+    patch: str | None = None
     docker_image: str
     FAIL_TO_PASS: List[str]
     PASS_TO_PASS: List[str]
+    # optional per-phase timeout overrides in seconds, e.g. {"eval": 300}
+    timeouts: Dict[str, int] | None = None
+    # local dataset file the instance was loaded from
+    dataset_path: str | None = None
+
+    @field_validator("timeouts")
+    @classmethod
+    def check_timeout_phases(cls, timeouts: Dict[str, int] | None) -> Dict[str, int] | None:
+        # imported here, as the timeouts module depends on this one
+        from sweflow_bench.utils.timeouts import PHASES
+
+        for phase in timeouts or {}:
+            if phase not in PHASES:
+                raise ValueError(f"Unknown timeout phase {phase}, expected one of {PHASES}")
+        return timeouts
+
+    def load_field(self, name: str):
+        """
+        Get a field of the instance, reading it from the dataset file if it was left out when
+        loading, e.g. `instance.load_field("problem_statement")`.
+        """
+        value = getattr(self, name)
+        if value is None and self.dataset_path is not None:
+            value = get_dataset_file(self.dataset_path).get_row(self.instance_id).get(name)
+        return value
 
 
 class SWEFlowTestInstance(SWEFlowInstance):
+    # predicted patch
+    patch: str
     model: str
 
-    def get_eval_script(self) -> str:
+    def get_eval_script(self, test_ids: List[str] | None = None, durations: bool = False, fail_fast: bool = False) -> str:
         """
-        Get the eval script for the instance.
+        Get the eval script for the instance, running the given tests or all of them. With
+        `durations`, pytest reports the duration of every test, and with `fail_fast` it stops
+        at the first failed test.
         """
         script = "python -m pytest -v"
-        test_ids = self.FAIL_TO_PASS + self.PASS_TO_PASS
+        if fail_fast:
+            script += " -x"
+        if durations:
+            script += " --durations=0 --durations-min=0"
+        if test_ids is None:
+            test_ids = self.FAIL_TO_PASS + self.PASS_TO_PASS
         return f"{script} {' '.join(test_ids)}"
 
 
-def _load_dataset(dataset: str, split: str) -> Dict[str, SWEFlowInstance]:
+def _read_jsonl(data_files: List[str]) -> Iterable[dict]:
+    for data_file in data_files:
+        with open(data_file, "r") as f:
+            for line in f:
+                if line.strip():
+                    yield json.loads(line)
+
+
+def load_dataset(path: str, data_files: List[str] | None = None, split: str | None = None) -> Iterable[dict]:
+    """
+    Load a dataset with `datasets.load_dataset`, which is only imported here as importing it takes
+    seconds. Without the optional `datasets` dependency, local json datasets are read directly.
+    """
+    try:
+        import datasets
+    except ImportError:
+        if path != "json" or data_files is None:
+            raise ImportError(f"Loading dataset {path} requires the datasets package: pip install sweflow-bench[datasets]")
+        return _read_jsonl(data_files)
+    return datasets.load_dataset(path, data_files=data_files, split=split)
+
+
+class DatasetFile:
+    """
+    Local JSONL dataset file from which the rows of single instances are read on demand. The
+    byte offset of each row is indexed on first use.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.offsets: Dict[str, int] | None = None
+        self.lock = threading.Lock()
+
+    def _index(self) -> Dict[str, int]:
+        with self.lock:
+            if self.offsets is None:
+                offsets = {}
+                with open(self.path, "rb") as f:
+                    offset = 0
+                    for line in f:
+                        if line.strip():
+                            offsets[json.loads(line)["instance_id"]] = offset
+                        offset += len(line)
+                self.offsets = offsets
+            return self.offsets
+
+    def get_row(self, instance_id: str) -> dict:
+        offset = self._index()[instance_id]
+        with open(self.path, "rb") as f:
+            f.seek(offset)
+            return json.loads(f.readline())
+
+
+@lru_cache(maxsize=None)
+def get_dataset_file(path: str) -> DatasetFile:
+    return DatasetFile(path)
+
+
+def _compact_row(item: dict, lazy_fields: List[str], dataset_path: str) -> dict:
+    """
+    Drop the lazy fields of a dataset row and intern its repeated strings. Test IDs repeat across
+    the instances of a repo, so they are interned too.
+    """
+    row = {name: value for name, value in item.items() if name not in lazy_fields}
+    for name in INTERNED_FIELDS:
+        if isinstance(row.get(name), str):
+            row[name] = sys.intern(row[name])
+    for name in ["FAIL_TO_PASS", "PASS_TO_PASS"]:
+        if isinstance(row.get(name), list):
+            row[name] = [sys.intern(test_id) if isinstance(test_id, str) else test_id for test_id in row[name]]
+    row["dataset_path"] = dataset_path
+    return row
+
+
+def _load_dataset(dataset: str, split: str, lazy_fields: List[str] = LAZY_FIELDS) -> Dict[str, SWEFlowInstance]:
+    """
+    Load the instances of the dataset, leaving out the `lazy_fields`, which are read from the
+    dataset file on demand with `SWEFlowInstance.load_field`.
+    """
     # TODO: Upload local datasets to HF hub
     # return load_dataset(dataset, split=split)
 
-    logger.info(f"Loading dataset {dataset} from {Path(__file__).parent.parent.parent / 'data' / f'{dataset}.jsonl'}")
+    dataset_path = sys.intern(str(DATA_DIR / f"{dataset}.jsonl"))
+    logger.info(f"Loading dataset {dataset} from {dataset_path}")
 
     ds = load_dataset(
         "json",
-        data_files=[
-            str(Path(__file__).parent.parent.parent / "data" / f"{dataset}.jsonl"),
-        ],
+        data_files=[dataset_path],
         split="train",  # local datasets are always in train split
     )
-    return {item["instance_id"]: SWEFlowInstance(**item) for item in ds}
+    return {item["instance_id"]: SWEFlowInstance(**_compact_row(item, lazy_fields, dataset_path)) for item in ds}
 
 
 def _load_predictions(dataset: str, split: str, predictions_path: str) -> Dict[str, Prediction]:
 
     if predictions_path == "gold":
         logger.info(f"Loading gold predictions for {dataset} {split}")
-        ds = _load_dataset(dataset, split)
+        ds = _load_dataset(dataset, split, lazy_fields=["problem_statement"])
         return {
             instance_id: Prediction(
                 instance_id=item.instance_id,
@@ -90,6 +212,7 @@ def load_eval_instances(
     predictions = _load_predictions(dataset, split, predictions_path)
 
     if instance_ids is not None:
+        instance_ids = set(instance_ids)
         all_instance_ids = [instance_id for instance_id in ds.keys() if instance_id in instance_ids]
         logger.info(f"Filtering dataset and predictions to only include instance IDs: {all_instance_ids}")
     else:
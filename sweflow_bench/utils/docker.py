@@ -1,7 +1,14 @@
-import docker
+from __future__ import annotations
+
 import subprocess
 
-from docker.models.containers import Container
+from typing import List, Dict, Tuple, TYPE_CHECKING
+from functools import lru_cache
+
+# the docker SDK takes ~0.1s to import, so it is imported by the functions that use it
+if TYPE_CHECKING:
+    from docker.models.images import Image
+    from docker.models.containers import Container
 
 
 class DockerError(Exception):
@@ -16,37 +23,74 @@ class DockerError(Exception):
         super().__init__(self.message)
 
 
-def get_docker_client():
-    return docker.from_env()
+def get_docker_errors() -> Tuple[type, ...]:
+    """
+    Get the errors of the docker SDK wrapped into `DockerError`, including those of an unreachable
+    daemon, which the SDK raises as `DockerException` or as a `requests` connection error.
+    """
+    import docker
+    import requests
+
+    return docker.errors.DockerException, requests.exceptions.ConnectionError
+
+
+def get_docker_client(base_url: str | None = None):
+    """
+    Get a client of the Docker daemon at `base_url`, e.g. "tcp://host:2376", "ssh://user@host" or
+    "unix:///var/run/docker.sock", by default of the daemon configured by the environment.
+    """
+    import docker
+
+    if base_url is None:
+        return docker.from_env()
+    return _get_remote_docker_client(base_url)
+
+
+@lru_cache(maxsize=None)
+def _get_remote_docker_client(base_url: str):
+    import docker
+
+    # connecting to a remote daemon is slow, e.g. over ssh, so its client is reused
+    return docker.DockerClient(base_url=base_url)
+
+
+def get_docker_command(base_url: str | None = None) -> List[str]:
+    """
+    Get the docker CLI command talking to the daemon at `base_url`.
+    """
+    if base_url is None:
+        return ["docker"]
+    return ["docker", "-H", base_url]
 
 
 def start_docker_container(
     image_name: str,
     container_name: str,
+    base_url: str | None = None,
 ) -> Container:
-    client = get_docker_client()
     try:
+        client = get_docker_client(base_url)
         container = client.containers.run(
             image=image_name,
             name=container_name,
             detach=True,
         )
         return container
-    except docker.errors.APIError as e:
+    except get_docker_errors() as e:
         raise DockerError(f"Error starting container: {e}")
 
 
 def stop_docker_container(container: Container):
     try:
         container.stop()
-    except docker.errors.APIError as e:
+    except get_docker_errors() as e:
         raise DockerError(f"Error stopping container: {e}")
 
 
 def remove_docker_container(container: Container):
     try:
         container.remove()
-    except docker.errors.APIError as e:
+    except get_docker_errors() as e:
         raise DockerError(f"Error removing container: {e}")
 
 
@@ -65,7 +109,7 @@ def exec_command_in_container(
             command = f"bash -c '{command}'"
         exec_result = container.exec_run(command, workdir=workdir)
         return exec_result.exit_code, exec_result.output.decode("utf-8")
-    except docker.errors.APIError as e:
+    except get_docker_errors() as e:
         raise DockerError(f"Error executing command in container: {e}")
 
 
@@ -73,10 +117,11 @@ def copy_file_to_container(
     container: Container,
     local_path: str,
     container_path: str,
+    base_url: str | None = None,
 ) -> bool:
     try:
         result = subprocess.run(
-            ["docker", "cp", local_path, f"{container.id}:{container_path}"],
+            [*get_docker_command(base_url), "cp", local_path, f"{container.id}:{container_path}"],
             check=True,
             stdout=subprocess.PIPE,
             stderr=subprocess.PIPE,
@@ -89,10 +134,11 @@ def copy_file_to_container(
 def read_file_from_container(
     container: Container,
     container_path: str,
+    base_url: str | None = None,
 ) -> str:
     try:
         result = subprocess.run(
-            ["docker", "exec", container.id, "cat", container_path],
+            [*get_docker_command(base_url), "exec", container.id, "cat", container_path],
             check=True,
             stdout=subprocess.PIPE,
             stderr=subprocess.PIPE,
@@ -101,3 +147,75 @@ def read_file_from_container(
         return result.stdout
     except subprocess.CalledProcessError as e:
         raise DockerError(f"Error reading file from container: {e.stderr}")
+
+
+def create_docker_container(
+    image_name: str,
+    container_name: str,
+) -> Container:
+    try:
+        client = get_docker_client()
+        container = client.containers.create(
+            image=image_name,
+            name=container_name,
+        )
+        return container
+    except get_docker_errors() as e:
+        raise DockerError(f"Error creating container: {e}")
+
+
+def copy_file_from_container(
+    container: Container,
+    container_path: str,
+    local_path: str,
+):
+    try:
+        subprocess.run(
+            ["docker", "cp", f"{container.id}:{container_path}", local_path],
+            check=True,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+            text=True,
+        )
+    except subprocess.CalledProcessError as e:
+        raise DockerError(f"Error copying file from container: {e.stderr}")
+
+
+def commit_docker_container(
+    container: Container,
+    repository: str,
+    tag: str,
+    labels: Dict[str, str] | None = None,
+) -> Image:
+    try:
+        return container.commit(repository=repository, tag=tag, conf={"Labels": labels or {}})
+    except get_docker_errors() as e:
+        raise DockerError(f"Error committing container: {e}", container)
+
+
+def get_docker_image(image_name: str) -> Image | None:
+    import docker
+
+    try:
+        client = get_docker_client()
+        return client.images.get(image_name)
+    except docker.errors.ImageNotFound:
+        return None
+    except get_docker_errors() as e:
+        raise DockerError(f"Error getting image: {e}")
+
+
+def list_docker_images(label: str) -> List[Image]:
+    try:
+        client = get_docker_client()
+        return client.images.list(filters={"label": label})
+    except get_docker_errors() as e:
+        raise DockerError(f"Error listing images: {e}")
+
+
+def remove_docker_image(image_name: str):
+    try:
+        client = get_docker_client()
+        client.images.remove(image=image_name)
+    except get_docker_errors() as e:
+        raise DockerError(f"Error removing image: {e}")
@@ -0,0 +1,119 @@
+import logging
+import threading
+
+from typing import List, Dict, Set, Callable, TypeVar
+from pydantic import BaseModel
+
+from sweflow_bench.utils.docker import DockerError
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+
+class NoHealthyDockerHostError(DockerError):
+    """
+    Raised when every Docker host that could run an instance is unhealthy, which retrying
+    does not fix.
+    """
+
+
+class DockerHost(BaseModel):
+    # base URL of the daemon, e.g. "tcp://host:2376", "ssh://user@host" or "unix:///var/run/docker.sock"
+    base_url: str
+    # instances evaluated on the host at the same time
+    slots: int = 1
+
+
+def parse_docker_host(value: str) -> DockerHost:
+    """
+    Parse a Docker host given as `<base_url>` or `<base_url>=<slots>`.
+    """
+    base_url, separator, slots = value.rpartition("=")
+    if not separator:
+        base_url, slots = value, "1"
+    if not base_url or not slots.isdigit() or int(slots) < 1:
+        raise ValueError(f"Expected <base_url>[=<slots>] with a positive number of slots, got {value}")
+    return DockerHost(base_url=base_url, slots=int(slots))
+
+
+class DockerHostPool:
+    """
+    Slots of several Docker hosts, placing each instance on the least-loaded healthy host with a
+    free slot. Hosts are marked unhealthy after `max_errors` consecutive `DockerError`s.
+    """
+
+    def __init__(self, hosts: List[DockerHost], max_errors: int = 3):
+        if not hosts:
+            raise ValueError("A Docker host pool requires at least one host")
+        if len({host.base_url for host in hosts}) != len(hosts):
+            raise ValueError("Docker hosts must be unique")
+        self.hosts = hosts
+        self.max_errors = max_errors
+        self.in_use: Dict[str, int] = {host.base_url: 0 for host in hosts}
+        self.errors: Dict[str, int] = {host.base_url: 0 for host in hosts}
+        self.unhealthy: Set[str] = set()
+        self.condition = threading.Condition()
+
+    @property
+    def slots(self) -> int:
+        return sum(host.slots for host in self.hosts)
+
+    def acquire(self, exclude: Set[str] = frozenset()) -> DockerHost:
+        """
+        Wait for a free slot on a healthy host not in `exclude`, and take it.
+        """
+        with self.condition:
+            while True:
+                candidates = [
+                    host for host in self.hosts
+                    if host.base_url not in self.unhealthy and host.base_url not in exclude
+                ]
+                if not candidates:
+                    raise NoHealthyDockerHostError(f"No healthy Docker host left, unhealthy: {sorted(self.unhealthy)}")
+                free = [host for host in candidates if self.in_use[host.base_url] < host.slots]
+                if free:
+                    host = min(free, key=lambda host: self.in_use[host.base_url] / host.slots)
+                    self.in_use[host.base_url] += 1
+                    return host
+                self.condition.wait()
+
+    def release(self, host: DockerHost, failed: bool = False):
+        """
+        Free the slot taken on the host, recording whether it failed with a `DockerError`.
+        """
+        with self.condition:
+            self.in_use[host.base_url] -= 1
+            if failed:
+                self.errors[host.base_url] += 1
+                if self.errors[host.base_url] >= self.max_errors and host.base_url not in self.unhealthy:
+                    logger.warning(f"Marking Docker host {host.base_url} unhealthy after {self.errors[host.base_url]} consecutive errors")
+                    self.unhealthy.add(host.base_url)
+            else:
+                self.errors[host.base_url] = 0
+            self.condition.notify_all()
+
+    def run(self, fn: Callable[[DockerHost], T]) -> T:
+        """
+        Run `fn` on a slot of a host. On a `DockerError`, `fn` is run again on another healthy host,
+        until it failed on every one of them.
+        """
+        tried = set()
+        while True:
+            host = self.acquire(exclude=tried)
+            tried.add(host.base_url)
+            try:
+                result = fn(host)
+            except DockerError as e:
+                self.release(host, failed=True)
+                with self.condition:
+                    untried = [other for other in self.hosts if other.base_url not in tried | self.unhealthy]
+                if not untried:
+                    raise
+                logger.warning(f"Docker error on host {host.base_url}, moving to another host: {e.message}")
+                continue
+            except BaseException:
+                self.release(host)
+                raise
+            self.release(host)
+            return result
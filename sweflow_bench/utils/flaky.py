@@ -0,0 +1,112 @@
+import re
+import sqlite3
+import logging
+import threading
+
+from pathlib import Path
+from typing import List, Dict, Set, Iterator
+from contextlib import contextmanager
+from pydantic import BaseModel
+
+logger = logging.getLogger(__name__)
+
+# result lines of `pytest -v`, e.g. "tests/test_a.py::test_b PASSED  [ 50%]"
+VERBOSE_STATUS_PATTERN = re.compile(r"^(\S+::.+?) (PASSED|FAILED|ERROR|SKIPPED|XFAIL|XPASS)(?:\s+\[\s*\d+%\])?\s*$", re.MULTILINE)
+# lines of the short test summary, e.g. "FAILED tests/test_a.py::test_b - AssertionError"
+SUMMARY_STATUS_PATTERN = re.compile(r"^(FAILED|ERROR) (\S+::.+?)(?: - .*)?$", re.MULTILINE)
+
+FAILED_STATUSES = {"FAILED", "ERROR"}
+
+# exit code of pytest if tests ran and some of them failed
+PYTEST_TESTS_FAILED_EXIT_CODE = 1
+
+
+class RerunPolicy(BaseModel):
+    # times failed tests are rerun, 0 disables reruns
+    max_reruns: int = 0
+    # more failed tests than this are not flakiness, e.g. a wrong patch, and are not rerun
+    max_failed_tests: int = 5
+    # deselect PASS_TO_PASS tests known to be flaky
+    skip_known_flaky: bool = False
+    # flaky observations after which a test is known to be flaky
+    min_flaky_runs: int = 2
+
+
+def parse_test_statuses(output: str) -> Dict[str, str]:
+    """
+    Parse the status of each test from the output of `pytest -v`. A failed teardown is
+    reported as an ERROR after the PASSED line, so failures take precedence.
+    """
+    statuses = {}
+    for test_id, status in VERBOSE_STATUS_PATTERN.findall(output):
+        if statuses.get(test_id) not in FAILED_STATUSES:
+            statuses[test_id] = status
+    for status, test_id in SUMMARY_STATUS_PATTERN.findall(output):
+        statuses[test_id] = status
+    return statuses
+
+
+def get_failed_tests(statuses: Dict[str, str]) -> List[str]:
+    """
+    Get the failed or errored tests of the statuses parsed by `parse_test_statuses`.
+    """
+    return [test_id for test_id, status in statuses.items() if status in FAILED_STATUSES]
+
+
+class FlakyTestDatabase:
+    """
+    SQLite database of how often each test of a repo ran and how often it was flaky, i.e.
+    failed and then passed when rerun. Safe to share between threads and processes.
+    """
+
+    def __init__(self, path: str):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.lock = threading.Lock()
+        with self._connect() as connection:
+            connection.execute(
+                "CREATE TABLE IF NOT EXISTS test_runs ("
+                "repo TEXT NOT NULL, test_id TEXT NOT NULL, "
+                "runs INTEGER NOT NULL DEFAULT 0, flaky_runs INTEGER NOT NULL DEFAULT 0, "
+                "PRIMARY KEY (repo, test_id))"
+            )
+
+    @contextmanager
+    def _connect(self) -> Iterator[sqlite3.Connection]:
+        # commit on success, and always close
+        connection = sqlite3.connect(self.path, timeout=60)
+        try:
+            with connection:
+                yield connection
+        finally:
+            connection.close()
+
+    def record(self, repo: str, tests_run: List[str], flaky_tests: List[str]):
+        """
+        Record one run of the given tests, of which `flaky_tests` were flaky.
+        """
+        flaky_tests = set(flaky_tests)
+        rows = [(repo, test_id, int(test_id in flaky_tests)) for test_id in set(tests_run) | flaky_tests]
+        with self.lock, self._connect() as connection:
+            connection.executemany(
+                "INSERT INTO test_runs (repo, test_id, runs, flaky_runs) VALUES (?1, ?2, 1, ?3) "
+                "ON CONFLICT (repo, test_id) DO UPDATE SET runs = runs + 1, flaky_runs = flaky_runs + ?3",
+                rows,
+            )
+
+    def get_flaky_tests(self, repo: str, min_flaky_runs: int = 1) -> Set[str]:
+        with self.lock, self._connect() as connection:
+            rows = connection.execute(
+                "SELECT test_id FROM test_runs WHERE repo = ? AND flaky_runs >= ?",
+                (repo, min_flaky_runs),
+            ).fetchall()
+        return {test_id for test_id, in rows}
+
+    def get_stats(self, repo: str, test_id: str) -> Dict[str, int]:
+        with self.lock, self._connect() as connection:
+            row = connection.execute(
+                "SELECT runs, flaky_runs FROM test_runs WHERE repo = ? AND test_id = ?",
+                (repo, test_id),
+            ).fetchone()
+        runs, flaky_runs = row or (0, 0)
+        return {"runs": runs, "flaky_runs": flaky_runs}
@@ -0,0 +1,205 @@
+import math
+import time
+import logging
+import threading
+
+from abc import ABC, abstractmethod
+from typing import List, Dict, Tuple
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_BUCKETS = [0.1, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0, 300.0, 600.0, 900.0]
+
+
+def _escape_label_value(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(labelnames: List[str], labelvalues: Tuple[str, ...], extra: Dict[str, str] | None = None) -> str:
+    labels = list(zip(labelnames, labelvalues)) + list((extra or {}).items())
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape_label_value(value)}"' for name, value in labels) + "}"
+
+
+def _format_value(value: float) -> str:
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+
+class Metric(ABC):
+    type = ""
+
+    def __init__(self, name: str, help: str, labelnames: List[str] | None = None):
+        self.name = name
+        self.help = help
+        self.labelnames = labelnames or []
+        self.lock = threading.Lock()
+
+    def _key(self, labels: Dict[str, str]) -> Tuple[str, ...]:
+        if set(labels) != set(self.labelnames):
+            raise ValueError(f"Metric {self.name} expects labels {self.labelnames}, got {list(labels)}")
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def render(self) -> List[str]:
+        return [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.type}", *self._render_samples()]
+
+    @abstractmethod
+    def _render_samples(self) -> List[str]:
+        ...
+
+
+class Counter(Metric):
+    type = "counter"
+
+    def __init__(self, name: str, help: str, labelnames: List[str] | None = None):
+        super().__init__(name, help, labelnames)
+        self.values: Dict[Tuple[str, ...], float] = {}
+
+    def inc(self, amount: float = 1.0, **labels: str):
+        key = self._key(labels)
+        with self.lock:
+            self.values[key] = self.values.get(key, 0.0) + amount
+
+    def get(self, **labels: str) -> float:
+        return self.values.get(self._key(labels), 0.0)
+
+    def _render_samples(self) -> List[str]:
+        with self.lock:
+            return [f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}" for key, value in self.values.items()]
+
+
+class Gauge(Counter):
+    type = "gauge"
+
+    def set(self, value: float, **labels: str):
+        key = self._key(labels)
+        with self.lock:
+            self.values[key] = value
+
+
+class Histogram(Metric):
+    type = "histogram"
+
+    def __init__(self, name: str, help: str, labelnames: List[str] | None = None, buckets: List[float] | None = None):
+        super().__init__(name, help, labelnames)
+        self.buckets = sorted(buckets or DEFAULT_BUCKETS) + [math.inf]
+        # per label values: bucket counts, sum, count
+        self.values: Dict[Tuple[str, ...], Tuple[List[int], float, int]] = {}
+
+    def observe(self, value: float, **labels: str):
+        key = self._key(labels)
+        with self.lock:
+            counts, total, count = self.values.get(key, ([0] * len(self.buckets), 0.0, 0))
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    counts[i] += 1
+            self.values[key] = (counts, total + value, count + 1)
+
+    @contextmanager
+    def time(self, **labels: str):
+        start_time = time.monotonic()
+        try:
+            yield
+        finally:
+            self.observe(time.monotonic() - start_time, **labels)
+
+    def get_count(self, **labels: str) -> int:
+        return self.values.get(self._key(labels), ([], 0.0, 0))[2]
+
+    def _render_samples(self) -> List[str]:
+        lines = []
+        with self.lock:
+            for key, (counts, total, count) in self.values.items():
+                for bound, bucket_count in zip(self.buckets, counts):
+                    lines.append(f"{self.name}_bucket{_format_labels(self.labelnames, key, {'le': _format_value(bound)})} {bucket_count}")
+                lines.append(f"{self.name}_sum{_format_labels(self.labelnames, key)} {_format_value(total)}")
+                lines.append(f"{self.name}_count{_format_labels(self.labelnames, key)} {count}")
+        return lines
+
+
+class MetricsRegistry:
+
+    def __init__(self):
+        self.metrics: List[Metric] = []
+
+    def register(self, metric: Metric) -> Metric:
+        self.metrics.append(metric)
+        return metric
+
+    def render(self) -> str:
+        """
+        Render all metrics in the Prometheus text exposition format.
+        """
+        return "\n".join(line for metric in self.metrics for line in metric.render()) + "\n"
+
+
+REGISTRY = MetricsRegistry()
+
+CONTAINER_START_SECONDS = REGISTRY.register(Histogram(
+    "sweflow_bench_container_start_seconds",
+    "Latency of starting an evaluation container.",
+))
+EXEC_SECONDS = REGISTRY.register(Histogram(
+    "sweflow_bench_exec_seconds",
+    "Latency of executing a command in a runtime.",
+))
+PHASE_SECONDS = REGISTRY.register(Histogram(
+    "sweflow_bench_phase_seconds",
+    "Duration of each completed phase of evaluate_instance.",
+    ["phase"],
+))
+DOCKER_ERRORS_TOTAL = REGISTRY.register(Counter(
+    "sweflow_bench_docker_errors_total",
+    "Docker API errors raised as DockerError.",
+    ["operation"],
+))
+INSTANCES_TOTAL = REGISTRY.register(Counter(
+    "sweflow_bench_instances_total",
+    "Finished instances by the stage the evaluation stopped at.",
+    ["stage", "resolved"],
+))
+RETRIES_TOTAL = REGISTRY.register(Counter(
+    "sweflow_bench_retries_total",
+    "Instances evaluated again after an infrastructure failure.",
+    ["reason"],
+))
+QUEUE_DEPTH = REGISTRY.register(Gauge(
+    "sweflow_bench_queue_depth",
+    "Instances waiting to be evaluated.",
+))
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    registry: MetricsRegistry = REGISTRY
+
+    def do_GET(self):
+        if self.path.split("?", 1)[0] != "/metrics":
+            self.send_error(404)
+            return
+        body = self.registry.render().encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        # scrapes are too frequent for the run log
+        pass
+
+
+def start_metrics_server(port: int, host: str = "127.0.0.1", registry: MetricsRegistry = REGISTRY) -> ThreadingHTTPServer:
+    """
+    Serve the metrics at http://<host>:<port>/metrics from a daemon thread. Port 0 picks a
+    free port, see `server.server_address`.
+    """
+    handler = type("MetricsHandler", (_MetricsHandler,), {"registry": registry})
+    server = ThreadingHTTPServer((host, port), handler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    logger.info(f"Serving metrics at http://{server.server_address[0]}:{server.server_address[1]}/metrics")
+    return server
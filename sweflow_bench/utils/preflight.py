@@ -0,0 +1,141 @@
+import re
+import logging
+
+from typing import List, Dict, Set
+from concurrent.futures import ThreadPoolExecutor
+
+from sweflow_bench.utils.data import SWEFlowTestInstance
+from sweflow_bench.utils.docker import DockerError
+from sweflow_bench.utils.repo_cache import RepoCache, RepoCacheError
+
+logger = logging.getLogger(__name__)
+
+HUNK_HEADER_PATTERN = re.compile(r"^@@ -\d+(?:,(\d+))? \+\d+(?:,(\d+))? @@")
+
+
+class PatchError(Exception):
+
+    def __init__(self, message: str):
+        self.message = message
+        super().__init__(self.message)
+
+
+def parse_patch(patch: str) -> List[str]:
+    """
+    Parse the given patch and return the paths of the files it touches.
+
+    Raises `PatchError` if the patch is empty or cannot be applied by git in any case,
+    e.g. because it contains no file diffs or a hunk is truncated.
+    """
+    if not patch.strip():
+        raise PatchError("Patch is empty")
+
+    lines = patch.split("\n")
+    if lines[-1] == "":
+        lines.pop()
+
+    git_files = []
+    plain_files = []
+    i = 0
+    while i < len(lines):
+        line = lines[i]
+        if line.startswith("diff --git "):
+            git_files.append(line.rsplit(" b/", 1)[-1])
+        elif line.startswith("+++ "):
+            path = line[4:].split("\t", 1)[0]
+            if path == "/dev/null" and i > 0 and lines[i - 1].startswith("--- "):
+                path = lines[i - 1][4:].split("\t", 1)[0]
+            plain_files.append(path.removeprefix("b/").removeprefix("a/"))
+        elif line.startswith("@@"):
+            match = HUNK_HEADER_PATTERN.match(line)
+            if match is None:
+                raise PatchError(f"Malformed hunk header at line {i + 1}: {line}")
+            if not git_files and not plain_files:
+                raise PatchError(f"Hunk without file header at line {i + 1}")
+            old_count = int(match.group(1)) if match.group(1) is not None else 1
+            new_count = int(match.group(2)) if match.group(2) is not None else 1
+            i += 1
+            while (old_count > 0 or new_count > 0) and i < len(lines):
+                line = lines[i]
+                if line.startswith("\\"):
+                    pass
+                elif line.startswith("-"):
+                    old_count -= 1
+                elif line.startswith("+"):
+                    new_count -= 1
+                elif line.startswith(" ") or line == "":
+                    old_count -= 1
+                    new_count -= 1
+                else:
+                    break
+                i += 1
+            if old_count != 0 or new_count != 0:
+                raise PatchError(f"Corrupt hunk ending at line {i}")
+            continue
+        i += 1
+
+    files = git_files or plain_files
+    if not files:
+        raise PatchError("Patch contains no file diffs")
+
+    return files
+
+
+def preflight_check(
+    instance: SWEFlowTestInstance,
+    repo_cache: RepoCache | None = None,
+    populate: bool = False,
+    unavailable_repos: Set[str] | None = None,
+) -> str | None:
+    """
+    Run the host-side pre-flight check for the given instance.
+
+    The check is best-effort: if the mirror of the repo cannot be populated, the repo is added to
+    `unavailable_repos` and its patches are only parsed.
+
+    Returns the reason the patch cannot be applied, or `None` if it may be applicable.
+    """
+    try:
+        parse_patch(instance.patch)
+    except PatchError as e:
+        return f"Pre-flight check failed: {e.message}"
+
+    if repo_cache is None:
+        return None
+    if unavailable_repos is not None and instance.repo in unavailable_repos:
+        return None
+    if populate:
+        try:
+            repo_cache.ensure(instance.repo, instance.docker_image)
+        except (DockerError, RepoCacheError) as e:
+            logger.warning(f"Skipping the pre-flight patch check of {instance.repo}, its mirror could not be populated: {e.message}")
+            if unavailable_repos is not None:
+                unavailable_repos.add(instance.repo)
+            return None
+
+    applies, output = repo_cache.check_patch(instance.repo, instance.base_commit, instance.patch)
+    if applies is False:
+        return f"Pre-flight check failed: patch does not apply to {instance.base_commit}\n{output}"
+    return None
+
+
+def run_preflight(
+    instances: List[SWEFlowTestInstance],
+    repo_cache: RepoCache | None = None,
+    max_workers: int | None = None,
+    populate: bool = False,
+) -> Dict[str, str]:
+    """
+    Run the pre-flight check for all instances in parallel.
+
+    With `populate`, missing repo mirrors are populated from the instance images first.
+    Returns a mapping of instance ID to failure reason for the instances that failed.
+    """
+    unavailable_repos = set()
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        reasons = executor.map(lambda instance: preflight_check(instance, repo_cache, populate, unavailable_repos), instances)
+        failures = {instance.instance_id: reason for instance, reason in zip(instances, reasons) if reason is not None}
+
+    logger.info(f"Pre-flight check rejected {len(failures)} of {len(instances)} patches")
+
+    return failures
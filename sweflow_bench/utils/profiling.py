@@ -0,0 +1,159 @@
+import re
+import sys
+import time
+import pstats
+import logging
+import cProfile
+import threading
+
+from pathlib import Path
+from typing import List, Dict, Tuple
+from contextlib import contextmanager
+from pydantic import BaseModel
+
+from sweflow_bench.utils.runtime import Runtime
+
+logger = logging.getLogger(__name__)
+
+# prefix of the line bash's `time` prints, with the real, user and sys seconds
+TIME_MARKER = "__SWEFLOW_BENCH_TIME__"
+TIME_OUTPUT_PATTERN = re.compile(rf"^{TIME_MARKER}([\d.]+),([\d.]+),([\d.]+)\n?", re.MULTILINE)
+
+# from Python 3.12 on, cProfile uses sys.monitoring, which allows a single profiler per process
+# that sees every thread; before, each thread needs a profiler of its own
+PER_THREAD_PROFILERS = sys.version_info < (3, 12)
+
+# commands are truncated to this length in the recorded exec timings
+MAX_COMMAND_LENGTH = 200
+
+
+class ExecTiming(BaseModel):
+    command: str
+    seconds: float
+    exit_code: int | None = None
+
+
+class InstanceProfile(BaseModel):
+    start_seconds: float | None = None
+    teardown_seconds: float | None = None
+    # wall-clock seconds of each runtime operation, as seen by the harness
+    execs: List[ExecTiming] = []
+    # real, user and sys seconds of the eval script measured inside the runtime
+    eval_time: Dict[str, float] | None = None
+
+
+def wrap_with_time(command: str) -> str:
+    """
+    Wrap the command with bash's `time`, printing a marked line that `parse_time_output` strips.
+    The command still starts with an executable, so it can be wrapped with `timeout`.
+    """
+    escaped = re.sub(r'(["\\$`])', r"\\\1", command)
+    return f'bash -c "TIMEFORMAT={TIME_MARKER}%R,%U,%S; time {escaped}"'
+
+
+def parse_time_output(output: str) -> Tuple[str, Dict[str, float] | None]:
+    """
+    Strip the line printed by a command wrapped with `wrap_with_time` from its output, and return
+    the output and the parsed times. The times are None if the command was killed.
+    """
+    match = None
+    for match in TIME_OUTPUT_PATTERN.finditer(output):
+        pass
+    if match is None:
+        return output, None
+    times = dict(zip(["real", "user", "sys"], (float(value) for value in match.groups())))
+    return output[:match.start()] + output[match.end():], times
+
+
+class ProfiledRuntime(Runtime):
+    """
+    Runtime recording the wall-clock time of every operation of the wrapped runtime.
+    """
+
+    def __init__(self, runtime: Runtime):
+        self.runtime = runtime
+        self.profile = InstanceProfile()
+
+    def _record(self, command: str, start_time: float, exit_code: int | None = None):
+        self.profile.execs.append(ExecTiming(
+            command=command[:MAX_COMMAND_LENGTH],
+            seconds=time.monotonic() - start_time,
+            exit_code=exit_code,
+        ))
+
+    def start(self):
+        start_time = time.monotonic()
+        try:
+            self.runtime.start()
+        finally:
+            self.profile.start_seconds = time.monotonic() - start_time
+
+    def exec(self, command: str, timeout: int | None = None, workdir: str | None = None) -> Tuple[int, str]:
+        start_time = time.monotonic()
+        exit_code, output = self.runtime.exec(command, timeout=timeout, workdir=workdir)
+        self._record(command, start_time, exit_code)
+        return exit_code, output
+
+    def put_file(self, local_path: str, runtime_path: str):
+        start_time = time.monotonic()
+        self.runtime.put_file(local_path, runtime_path)
+        self._record(f"put_file {runtime_path}", start_time)
+
+    def get_file(self, runtime_path: str) -> str:
+        start_time = time.monotonic()
+        content = self.runtime.get_file(runtime_path)
+        self._record(f"get_file {runtime_path}", start_time)
+        return content
+
+    def teardown(self):
+        start_time = time.monotonic()
+        self.runtime.teardown()
+        self.profile.teardown_seconds = time.monotonic() - start_time
+
+    def __getattr__(self, name: str):
+        # backend specific methods, e.g. `DockerRuntime.commit`
+        return getattr(self.runtime, name)
+
+
+@contextmanager
+def profile_orchestrator(output_dir: str, name: str = "profile"):
+    """
+    Profile the current process with cProfile, including threads started while profiling, e.g.
+    the instance threads of a Docker host pool. Writes the merged stats to `<name>.prof` in the
+    output directory and a summary of the top functions by cumulative time to `<name>.txt`.
+    Errors writing the profile are logged, so they never hide the results of the profiled code.
+    """
+    profiler = cProfile.Profile()
+    thread_profilers: List[cProfile.Profile] = []
+    lock = threading.Lock()
+
+    def profile_thread(frame, event, arg):
+        # runs once in each new thread, the thread's profiler then replaces this hook
+        thread_profiler = cProfile.Profile()
+        with lock:
+            thread_profilers.append(thread_profiler)
+        thread_profiler.enable()
+
+    if PER_THREAD_PROFILERS:
+        threading.setprofile(profile_thread)
+    profiler.enable()
+    try:
+        yield profiler
+    finally:
+        profiler.disable()
+        if PER_THREAD_PROFILERS:
+            threading.setprofile(None)
+        try:
+            stats = pstats.Stats(profiler)
+            with lock:
+                for thread_profiler in thread_profilers:
+                    stats.add(thread_profiler)
+            Path(output_dir).mkdir(parents=True, exist_ok=True)
+            stats_path = Path(output_dir) / f"{name}.prof"
+            stats.dump_stats(str(stats_path))
+            with open(Path(output_dir) / f"{name}.txt", "w") as f:
+                stats.stream = f
+                stats.sort_stats("cumulative").print_stats(50)
+            logger.info(f"Wrote orchestrator profile to {stats_path}")
+        except Exception:
+            logger.exception(f"Could not write orchestrator profile to {output_dir}")
@@ -0,0 +1,111 @@
+import os
+import json
+import time
+import logging
+import threading
+
+from pathlib import Path
+from collections import deque
+from datetime import datetime
+
+logger = logging.getLogger(__name__)
+
+
+class ProgressReporter:
+    """
+    Track the progress of a run and periodically log it and write it to `progress.json`
+    in the output directory, so external monitors can read it cheaply.
+
+    The throughput is a rolling rate over the last `window` seconds.
+    """
+
+    def __init__(
+        self,
+        total: int,
+        output_dir: str | None = None,
+        interval: float = 30.0,
+        window: float = 600.0,
+    ):
+        self.total = total
+        self.progress_path = Path(output_dir) / "progress.json" if output_dir is not None else None
+        self.interval = interval
+        self.window = window
+        self.started_at = time.time()
+        self.in_flight = set()
+        self.completed = 0
+        self.resolved = 0
+        self.failed = 0
+        self.finish_times = deque()
+        self.last_report = 0.0
+        self.lock = threading.Lock()
+
+    def start(self, instance_id: str):
+        with self.lock:
+            self.in_flight.add(instance_id)
+        self.report()
+
+    def finish(self, instance_id: str, resolved: bool, failed: bool = False):
+        """
+        Record a finished instance. `failed` marks instances whose tests could not be run.
+        """
+        now = time.time()
+        with self.lock:
+            self.in_flight.discard(instance_id)
+            self.completed += 1
+            self.resolved += resolved
+            self.failed += failed
+            self.finish_times.append(now)
+            while self.finish_times and self.finish_times[0] < now - self.window:
+                self.finish_times.popleft()
+        self.report()
+
+    def get_progress(self) -> dict:
+        now = time.time()
+        with self.lock:
+            elapsed = now - self.started_at
+            recent = sum(1 for finish_time in self.finish_times if finish_time >= now - self.window)
+            span = min(self.window, elapsed)
+            rate_per_minute = recent / span * 60 if span > 0 else 0.0
+            remaining = self.total - self.completed
+            return {
+                "total": self.total,
+                "completed": self.completed,
+                "in_flight": len(self.in_flight),
+                "pending": remaining - len(self.in_flight),
+                "resolved": self.resolved,
+                "failed": self.failed,
+                "resolve_rate": self.resolved / self.completed if self.completed else 0.0,
+                "instances_per_minute": rate_per_minute,
+                "eta_seconds": remaining / rate_per_minute * 60 if rate_per_minute > 0 else None,
+                "elapsed_seconds": elapsed,
+                "updated_at": datetime.now().isoformat(timespec="seconds"),
+            }
+
+    def report(self, force: bool = False):
+        """
+        Log the progress and write `progress.json`, at most once per interval unless forced.
+        """
+        now = time.time()
+        with self.lock:
+            if not force and now - self.last_report < self.interval:
+                return
+            self.last_report = now
+
+        progress = self.get_progress()
+        eta = f"{progress['eta_seconds'] / 60:.1f}m" if progress["eta_seconds"] is not None else "unknown"
+        logger.info(
+            f"Progress: {progress['completed']}/{progress['total']} done, {progress['in_flight']} in flight, "
+            f"{progress['failed']} failed, {progress['instances_per_minute']:.2f} instances/min, "
+            f"ETA {eta}, resolve rate {progress['resolve_rate']:.1%}"
+        )
+
+        if self.progress_path is None:
+            return
+        # write atomically, monitors must never read a partial file
+        temp_path = self.progress_path.parent / f".{self.progress_path.name}.{os.getpid()}.tmp"
+        try:
+            with open(temp_path, "w") as f:
+                json.dump(progress, f, indent=4)
+            os.replace(temp_path, self.progress_path)
+        except OSError as e:
+            logger.warning(f"Could not write {self.progress_path}: {e}")
@@ -0,0 +1,189 @@
+import os
+import shutil
+import logging
+import tempfile
+import threading
+import subprocess
+
+from pathlib import Path
+from typing import List, Dict, Tuple
+from datetime import datetime
+from contextlib import contextmanager
+
+from sweflow_bench.utils.docker import (
+    create_docker_container,
+    copy_file_from_container,
+    remove_docker_container,
+)
+
+logger = logging.getLogger(__name__)
+
+# host-side equivalents of `GIT_APPLY_COMMANDS`, checked against the index only
+GIT_APPLY_CHECK_ARGS = [
+    ["apply", "--cached", "--check"],
+    ["apply", "--cached", "--check", "-p0"],
+]
+
+
+class RepoCacheError(Exception):
+
+    def __init__(self, message: str):
+        self.message = message
+        super().__init__(self.message)
+
+
+def _run_git(*args: str, input: str | None = None, env: Dict[str, str] | None = None) -> subprocess.CompletedProcess:
+    return subprocess.run(
+        ["git", *args],
+        input=input,
+        env=env,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE,
+        text=True,
+    )
+
+
+def check_patch_applies(git_dir: str, base_commit: str, patch: str) -> Tuple[bool | None, str]:
+    """
+    Check with `git apply --check` whether the patch applies to `base_commit` of the given
+    (bare) repository, using a throwaway index instead of a checkout.
+
+    Returns `None` if the check could not be run, e.g. because the commit is unknown.
+    """
+    with tempfile.TemporaryDirectory() as temp_dir:
+        env = {**os.environ, "GIT_INDEX_FILE": str(Path(temp_dir) / "index")}
+        result = _run_git("--git-dir", git_dir, "read-tree", base_commit, env=env)
+        if result.returncode != 0:
+            return None, result.stderr
+
+        outputs = []
+        for args in GIT_APPLY_CHECK_ARGS:
+            result = _run_git("--git-dir", git_dir, *args, input=patch, env=env)
+            if result.returncode == 0:
+                return True, result.stdout
+            outputs.append(result.stderr)
+        return False, "".join(outputs)
+
+
+class RepoCache:
+    """
+    Local cache of bare git mirrors keyed by `SWEFlowInstance.repo`.
+
+    Mirrors are populated once, either from a local directory or from the `/testbed` of an
+    instance image, and are used for host-side git operations without starting containers.
+    """
+
+    def __init__(self, cache_dir: str):
+        self.cache_dir = Path(cache_dir)
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self._locks: Dict[str, threading.RLock] = {}
+        self._locks_lock = threading.Lock()
+
+    def git_dir(self, repo: str) -> Path:
+        return self.cache_dir / f"{repo.replace('/', '__')}.git"
+
+    def has_repo(self, repo: str) -> bool:
+        return self.git_dir(repo).exists()
+
+    def _lock(self, repo: str) -> threading.RLock:
+        with self._locks_lock:
+            return self._locks.setdefault(repo, threading.RLock())
+
+    def populate_from_directory(self, repo: str, path: str) -> Path:
+        """
+        Populate the mirror of `repo` from a local git repository, or fetch into it if it exists.
+        """
+        git_dir = self.git_dir(repo)
+        with self._lock(repo):
+            if git_dir.exists():
+                result = _run_git("--git-dir", str(git_dir), "fetch", "--quiet", str(path), "+refs/*:refs/*")
+                if result.returncode != 0:
+                    raise RepoCacheError(f"Error fetching {path} into mirror of {repo}: {result.stderr}")
+                return git_dir
+
+            # clone next to the final location and rename, so a failed clone never leaves a partial mirror
+            temp_dir = Path(tempfile.mkdtemp(dir=self.cache_dir, prefix=".populate-"))
+            try:
+                result = _run_git("clone", "--quiet", "--mirror", str(path), str(temp_dir / "mirror.git"))
+                if result.returncode != 0:
+                    raise RepoCacheError(f"Error cloning {path} into mirror of {repo}: {result.stderr}")
+                os.rename(temp_dir / "mirror.git", git_dir)
+            finally:
+                shutil.rmtree(temp_dir, ignore_errors=True)
+
+        logger.info(f"Populated mirror of {repo} at {git_dir}")
+        return git_dir
+
+    def populate_from_image(self, repo: str, image_name: str) -> Path:
+        """
+        Populate the mirror of `repo` from the `/testbed` of the given image.
+        """
+        container = create_docker_container(
+            image_name=image_name,
+            container_name=f"sweflow-bench-cache-{datetime.now().strftime('%Y%m%d-%H%M%S-%f')}",
+        )
+        try:
+            with tempfile.TemporaryDirectory() as temp_dir:
+                copy_file_from_container(container, "/testbed/.git", str(Path(temp_dir) / "testbed.git"))
+                return self.populate_from_directory(repo, str(Path(temp_dir) / "testbed.git"))
+        finally:
+            try:
+                remove_docker_container(container)
+            except Exception:
+                pass
+
+    def ensure(self, repo: str, image_name: str) -> Path:
+        """
+        Return the mirror of `repo`, populating it from the given image if it does not exist yet.
+        """
+        with self._lock(repo):
+            if not self.has_repo(repo):
+                self.populate_from_image(repo, image_name)
+        return self.git_dir(repo)
+
+    def has_commit(self, repo: str, commit: str) -> bool:
+        if not self.has_repo(repo):
+            return False
+        result = _run_git("--git-dir", str(self.git_dir(repo)), "cat-file", "-e", f"{commit}^{{commit}}")
+        return result.returncode == 0
+
+    @contextmanager
+    def worktree(self, repo: str, commit: str):
+        """
+        Check out `commit` of `repo` into a temporary worktree on the host and yield its path.
+        """
+        git_dir = str(self.git_dir(repo))
+        temp_dir = Path(tempfile.mkdtemp(prefix="sweflow-bench-worktree-"))
+        path = temp_dir / "worktree"
+        result = _run_git("--git-dir", git_dir, "worktree", "add", "--quiet", "--detach", str(path), commit)
+        if result.returncode != 0:
+            shutil.rmtree(temp_dir, ignore_errors=True)
+            raise RepoCacheError(f"Error creating worktree of {repo} at {commit}: {result.stderr}")
+        try:
+            yield path
+        finally:
+            _run_git("--git-dir", git_dir, "worktree", "remove", "--force", str(path))
+            shutil.rmtree(temp_dir, ignore_errors=True)
+            _run_git("--git-dir", git_dir, "worktree", "prune")
+
+    def check_patch(self, repo: str, commit: str, patch: str) -> Tuple[bool | None, str]:
+        """
+        Check with `git apply --check` whether the patch applies to `commit` of `repo`.
+        Returns `None` if the repo or commit is not in the cache.
+        """
+        if not self.has_repo(repo):
+            return None, f"Repo {repo} is not cached"
+        return check_patch_applies(str(self.git_dir(repo)), commit, patch)
+
+    def diff_stat(self, repo: str, patch: str) -> List[Tuple[int | None, int | None, str]]:
+        """
+        Return the (added, deleted, path) line counts of the patch. Counts are `None` for binary files.
+        """
+        result = _run_git("--git-dir", str(self.git_dir(repo)), "apply", "--numstat", input=patch)
+        if result.returncode != 0:
+            raise RepoCacheError(f"Error computing diff stat: {result.stderr}")
+        stats = []
+        for line in result.stdout.splitlines():
+            added, deleted, path = line.split("\t", 2)
+            stats.append((None if added == "-" else int(added), None if deleted == "-" else int(deleted), path))
+        return stats
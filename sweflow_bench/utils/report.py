@@ -0,0 +1,287 @@
+import json
+import logging
+
+from pathlib import Path
+from itertools import combinations
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from typing import List, Dict, Tuple, Iterator
+from pydantic import BaseModel
+
+from sweflow_bench.utils.timeouts import TIMEOUT_EXIT_CODE
+
+logger = logging.getLogger(__name__)
+
+# bytes of a results file parsed per task
+CHUNK_SIZE = 64 * 1024 * 1024
+
+# key of the log member of a result row, skipped before parsing
+TEST_LOG_KEY = '"test_log"'
+
+# outcomes of an evaluated instance
+OUTCOMES = ["resolved", "test_failed", "apply_failed", "setup_failed", "timeout"]
+
+# stages at which the patch was rejected, and at which the environment could not be prepared
+APPLY_STAGES = {"preflight", "apply"}
+SETUP_STAGES = {"workspace", "checkout", "setup", "infrastructure"}
+
+
+def get_outcome(row: dict) -> str:
+    """
+    Classify a result row into one of `OUTCOMES`. Rows without a stage predate stage tracking
+    and are classified by their exit code alone.
+    """
+    if row["resolved"]:
+        return "resolved"
+    if row["exit_code"] == TIMEOUT_EXIT_CODE:
+        return "timeout"
+    stage = row.get("stage")
+    if stage in APPLY_STAGES:
+        return "apply_failed"
+    if stage in SETUP_STAGES:
+        return "setup_failed"
+    return "test_failed"
+
+
+def get_results_files(path: str) -> List[Path]:
+    """
+    Get the results files of the given path: the file itself, or the `results.jsonl` of an
+    output directory, falling back to the `reports*.jsonl` of a compact result store.
+    """
+    path = Path(path)
+    if path.is_file():
+        return [path]
+    if (path / "results.jsonl").is_file():
+        return [path / "results.jsonl"]
+    results_files = sorted(path.glob("reports*.jsonl"))
+    if not results_files:
+        raise FileNotFoundError(f"No results files found in {path}")
+    return results_files
+
+
+def strip_test_log(line: str) -> str:
+    """
+    Remove the `test_log` member from a json result row, so logs are never decoded. Scans for the
+    closing quote with `str.find`, which is much faster than a regex over the log.
+    """
+    start = line.find(TEST_LOG_KEY)
+    if start < 0:
+        return line
+    # opening quote of the value
+    end = line.find('"', start + len(TEST_LOG_KEY))
+    while True:
+        end = line.find('"', end + 1)
+        if end < 0:
+            return line
+        backslashes = 0
+        while line[end - 1 - backslashes] == "\\":
+            backslashes += 1
+        if backslashes % 2 == 0:
+            break
+    end += 1
+
+    # remove the member together with one adjacent comma
+    rest = line[end:].lstrip()
+    if rest.startswith(","):
+        return line[:start] + rest[1:]
+    return line[:start].rstrip().removesuffix(",") + rest
+
+
+def _iter_chunk_rows(results_file: str, start: int, end: int) -> Iterator[dict]:
+    """
+    Stream the rows of the lines starting in the byte range [start, end) of the results file.
+    """
+    with open(results_file, "rb") as f:
+        if start > 0:
+            # skip the line started in the previous chunk
+            f.seek(start - 1)
+            position = start - 1 + len(f.readline())
+        else:
+            position = 0
+        while position < end:
+            line = f.readline()
+            if not line:
+                break
+            position += len(line)
+            if line.strip():
+                yield json.loads(strip_test_log(line.decode("utf-8")))
+
+
+def get_chunks(results_file: Path, chunk_size: int = CHUNK_SIZE) -> List[Tuple[str, int, int]]:
+    size = results_file.stat().st_size
+    return [(str(results_file), start, min(start + chunk_size, size)) for start in range(0, size, chunk_size)]
+
+
+def iter_result_rows(path: str) -> Iterator[dict]:
+    """
+    Stream the result rows of the given results file or output directory, without test logs.
+    """
+    for results_file in get_results_files(path):
+        for chunk in get_chunks(results_file):
+            yield from _iter_chunk_rows(*chunk)
+
+
+def _read_chunk(results_file: str, start: int, end: int, default_model: str) -> List[Tuple[str, str, str, str]]:
+    """
+    Read the (model, instance_id, repo, outcome) of the rows in a chunk of the results file.
+    """
+    return [
+        (row.get("model") or default_model, row["instance_id"], row.get("repo") or "unknown", get_outcome(row))
+        for row in _iter_chunk_rows(results_file, start, end)
+    ]
+
+
+class OutcomeCounts(BaseModel):
+    total: int = 0
+    resolved: int = 0
+    test_failed: int = 0
+    apply_failed: int = 0
+    setup_failed: int = 0
+    timeout: int = 0
+
+    @property
+    def resolve_rate(self) -> float:
+        return self.resolved / self.total if self.total else 0.0
+
+    def add(self, outcome: str, count: int = 1):
+        self.total += count
+        setattr(self, outcome, getattr(self, outcome) + count)
+
+
+class PairwiseComparison(BaseModel):
+    model_a: str
+    model_b: str
+    # instances evaluated for both models
+    common: int = 0
+    both_resolved: int = 0
+    only_a_resolved: int = 0
+    only_b_resolved: int = 0
+    neither_resolved: int = 0
+
+
+class Report(BaseModel):
+    models: Dict[str, OutcomeCounts] = {}
+    repos: Dict[str, Dict[str, OutcomeCounts]] = {}
+    pairwise: List[PairwiseComparison] = []
+
+    def to_dict(self) -> dict:
+        def counts_to_dict(counts: OutcomeCounts) -> dict:
+            return {**counts.model_dump(), "resolve_rate": counts.resolve_rate}
+
+        return {
+            "models": {model: counts_to_dict(counts) for model, counts in self.models.items()},
+            "repos": {
+                model: {repo: counts_to_dict(counts) for repo, counts in repos.items()}
+                for model, repos in self.repos.items()
+            },
+            "pairwise": [comparison.model_dump() for comparison in self.pairwise],
+        }
+
+
+def get_default_model(path: str) -> str:
+    """
+    Model name of rows without one: the output directory the results file is in.
+    """
+    path = Path(path).resolve()
+    return path.parent.name if path.is_file() else path.name
+
+
+def build_report(paths: List[str], workers: int | None = None, chunk_size: int = CHUNK_SIZE) -> Report:
+    """
+    Aggregate the results of the given files or output directories. If an instance was
+    evaluated more than once for the same model, the last result counts.
+
+    Results files are split into chunks of `chunk_size` bytes which are parsed by `workers`
+    processes, defaulting to the number of CPUs.
+    """
+    chunks = [
+        (*chunk, get_default_model(path))
+        for path in paths
+        for results_file in get_results_files(path)
+        for chunk in get_chunks(results_file, chunk_size)
+    ]
+
+    # model -> instance_id -> (repo, outcome)
+    outcomes: Dict[str, Dict[str, Tuple[str, str]]] = {}
+    rows = 0
+
+    def merge(chunk_rows: List[Tuple[str, str, str, str]]):
+        for model, instance_id, repo, outcome in chunk_rows:
+            outcomes.setdefault(model, {})[instance_id] = (repo, outcome)
+
+    if len(chunks) > 1 and workers != 1:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            # merged in order, so later results still take precedence
+            for chunk_rows in executor.map(_read_chunk, *zip(*chunks)):
+                merge(chunk_rows)
+                rows += len(chunk_rows)
+    else:
+        for chunk in chunks:
+            chunk_rows = _read_chunk(*chunk)
+            merge(chunk_rows)
+            rows += len(chunk_rows)
+    logger.info(f"Read {rows} results from {len(paths)} paths")
+
+    report = Report()
+    for model, instances in outcomes.items():
+        # count in C, the per-row pydantic attribute updates dominate otherwise
+        repo_counts: Dict[str, OutcomeCounts] = {}
+        for (repo, outcome), count in sorted(Counter(instances.values()).items()):
+            repo_counts.setdefault(repo, OutcomeCounts()).add(outcome, count)
+        report.repos[model] = repo_counts
+        model_counts = report.models[model] = OutcomeCounts()
+        for counts in repo_counts.values():
+            for outcome in OUTCOMES:
+                model_counts.add(outcome, getattr(counts, outcome))
+
+    for model_a, model_b in combinations(sorted(outcomes), 2):
+        comparison = PairwiseComparison(model_a=model_a, model_b=model_b)
+        instances_b = outcomes[model_b]
+        for instance_id, (_, outcome_a) in outcomes[model_a].items():
+            if instance_id not in instances_b:
+                continue
+            resolved_a = outcome_a == "resolved"
+            resolved_b = instances_b[instance_id][1] == "resolved"
+            comparison.common += 1
+            if resolved_a and resolved_b:
+                comparison.both_resolved += 1
+            elif resolved_a:
+                comparison.only_a_resolved += 1
+            elif resolved_b:
+                comparison.only_b_resolved += 1
+            else:
+                comparison.neither_resolved += 1
+        report.pairwise.append(comparison)
+
+    return report
+
+
+def format_report(report: Report, by_repo: bool = False) -> str:
+    """
+    Format the report as plain-text tables.
+    """
+    header = f"{'':<40} {'total':>8} {'resolved':>8} {'rate':>7} {'test':>8} {'apply':>8} {'setup':>8} {'timeout':>8}"
+
+    def format_counts(name: str, counts: OutcomeCounts) -> str:
+        return (
+            f"{name:<40} {counts.total:>8} {counts.resolved:>8} {counts.resolve_rate:>7.1%} "
+            f"{counts.test_failed:>8} {counts.apply_failed:>8} {counts.setup_failed:>8} {counts.timeout:>8}"
+        )
+
+    lines = [header]
+    for model, counts in sorted(report.models.items()):
+        lines.append(format_counts(model, counts))
+        if by_repo:
+            for repo, repo_counts in report.repos[model].items():
+                lines.append(format_counts(f"  {repo}", repo_counts))
+
+    if report.pairwise:
+        lines.append("")
+        lines.append(f"{'model A':<30} {'model B':<30} {'common':>8} {'both':>8} {'only A':>8} {'only B':>8} {'neither':>8}")
+        for comparison in report.pairwise:
+            lines.append(
+                f"{comparison.model_a:<30} {comparison.model_b:<30} {comparison.common:>8} {comparison.both_resolved:>8} "
+                f"{comparison.only_a_resolved:>8} {comparison.only_b_resolved:>8} {comparison.neither_resolved:>8}"
+            )
+
+    return "\n".join(lines)
@@ -0,0 +1,112 @@
+import json
+import zlib
+import logging
+import threading
+
+from pathlib import Path
+from typing import Dict, Iterator, Tuple, Callable
+
+logger = logging.getLogger(__name__)
+
+OUTPUT_FORMATS = ["directory", "compact"]
+
+
+def _get_codecs() -> Dict[str, Tuple[str, Callable[[bytes], bytes], Callable[[bytes], bytes]]]:
+    """
+    Get the available log codecs as name -> (file suffix, compress, decompress).
+    """
+    codecs = {
+        "zlib": (".zz", lambda data: zlib.compress(data, 6), zlib.decompress),
+    }
+    try:
+        import zstandard
+    except ImportError:
+        return codecs
+    codecs["zstd"] = (
+        ".zst",
+        # a fresh (de)compressor per call, they are not thread-safe
+        lambda data: zstandard.ZstdCompressor(level=3).compress(data),
+        lambda data: zstandard.ZstdDecompressor().decompress(data),
+    )
+    return codecs
+
+
+class ResultStore:
+    """
+    Compact, append-only store of evaluation results in an output directory.
+
+    Reports without their test logs are appended to `reports[.<shard>].jsonl`, and each test log
+    is appended as an independent compressed frame to `logs[.<shard>].zst`. Each report records
+    the offset and length of its log frame, so any log can be read without decompressing the others.
+    Concurrent writers, e.g. queue workers, must use different shards.
+    """
+
+    def __init__(self, output_dir: str, shard: str | None = None, codec: str | None = None):
+        codecs = _get_codecs()
+        if codec is None:
+            codec = "zstd" if "zstd" in codecs else "zlib"
+            if codec != "zstd":
+                logger.warning("zstandard is not installed, compressing logs with zlib")
+        if codec not in codecs:
+            raise ValueError(f"Unsupported log codec {codec}, install zstandard for zstd")
+        suffix, self.compress, _ = codecs[codec]
+
+        Path(output_dir).mkdir(parents=True, exist_ok=True)
+        name = f".{shard}" if shard is not None else ""
+        self.reports_path = Path(output_dir) / f"reports{name}.jsonl"
+        self.logs_path = Path(output_dir) / f"logs{name}{suffix}"
+        self.lock = threading.Lock()
+
+    def write(self, result):
+        """
+        Append the given `EvaluationResult`.
+        """
+        frame = self.compress(result.test_log.encode("utf-8"))
+        report = result.model_dump(exclude={"test_log"})
+        with self.lock:
+            with open(self.logs_path, "ab") as f:
+                offset = f.tell()
+                f.write(frame)
+            report["log_file"] = self.logs_path.name
+            report["log_offset"] = offset
+            report["log_length"] = len(frame)
+            with open(self.reports_path, "a") as f:
+                f.write(json.dumps(report) + "\n")
+
+
+class ResultStoreReader:
+    """
+    Random access to the reports and logs of all shards of a `ResultStore`.
+    """
+
+    def __init__(self, output_dir: str):
+        self.output_dir = Path(output_dir)
+        self.codecs = {suffix: decompress for suffix, _, decompress in _get_codecs().values()}
+        self.reports: Dict[str, dict] = {}
+        for report in self.iter_reports():
+            # later reports of an instance, e.g. from a rerun, take precedence
+            self.reports[report["instance_id"]] = report
+
+    def iter_reports(self) -> Iterator[dict]:
+        for reports_path in sorted(self.output_dir.glob("reports*.jsonl")):
+            with open(reports_path, "r") as f:
+                for line in f:
+                    if line.strip():
+                        yield json.loads(line)
+
+    def instance_ids(self):
+        return list(self.reports.keys())
+
+    def get_report(self, instance_id: str) -> dict:
+        return self.reports[instance_id]
+
+    def get_log(self, instance_id: str) -> str:
+        report = self.reports[instance_id]
+        logs_path = self.output_dir / report["log_file"]
+        decompress = self.codecs.get(logs_path.suffix)
+        if decompress is None:
+            raise ValueError(f"Cannot decompress {logs_path}, install zstandard")
+        with open(logs_path, "rb") as f:
+            f.seek(report["log_offset"])
+            frame = f.read(report["log_length"])
+        return decompress(frame).decode("utf-8")
@@ -0,0 +1,78 @@
+import time
+import random
+import logging
+
+from typing import Callable, Tuple, TypeVar
+from pydantic import BaseModel
+
+from sweflow_bench.utils.docker import DockerError, get_docker_errors
+from sweflow_bench.utils.docker_hosts import NoHealthyDockerHostError
+from sweflow_bench.utils.metrics import RETRIES_TOTAL
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+# exit code of a process killed with SIGKILL, e.g. by the OOM killer of a container
+OOM_KILLED_EXIT_CODE = 137
+
+
+class RetryPolicy(BaseModel):
+    # attempts of each instance, 1 disables retries
+    max_attempts: int = 3
+    # seconds before the first retry, doubled for each further retry up to `max_delay`
+    initial_delay: float = 1.0
+    max_delay: float = 60.0
+
+
+def get_retry_delay(policy: RetryPolicy, retry: int, rng: random.Random | None = None) -> float:
+    """
+    Seconds to wait before the given retry, counting from 1: exponential backoff with full
+    jitter, so that instances failing together after a daemon hiccup do not retry together.
+    """
+    backoff = min(policy.max_delay, policy.initial_delay * 2 ** (retry - 1))
+    return (rng or random).uniform(0, backoff)
+
+
+def is_infrastructure_error(error: Exception) -> bool:
+    """
+    Whether the error is a failure of the infrastructure rather than of the instance, e.g. a
+    Docker daemon hiccup, a lost connection or a container name conflict, which a retry may not
+    hit again.
+    """
+    if isinstance(error, NoHealthyDockerHostError):
+        return False
+    return isinstance(error, (DockerError, *get_docker_errors()))
+
+
+def run_with_retries(
+    fn: Callable[[], T],
+    policy: RetryPolicy,
+    get_failure: Callable[[T], str | None],
+    name: str,
+) -> Tuple[T, int]:
+    """
+    Run `fn` until it neither raises an infrastructure error nor returns a result for which
+    `get_failure` names an infrastructure failure, at most `policy.max_attempts` times. Returns
+    the last result and the number of attempts. The error of the last attempt is raised.
+    """
+    attempt = 1
+    while True:
+        try:
+            result = fn()
+        except Exception as e:
+            if not is_infrastructure_error(e) or attempt >= policy.max_attempts:
+                raise
+            reason = "docker_error"
+            failure = str(e)
+        else:
+            failure = get_failure(result)
+            if failure is None or attempt >= policy.max_attempts:
+                return result, attempt
+            reason = "oom_killed"
+
+        delay = get_retry_delay(policy, attempt)
+        logger.warning(f"Attempt {attempt} of {policy.max_attempts} of {name} failed, retrying in {delay:.1f}s: {failure}")
+        RETRIES_TOTAL.inc(reason=reason)
+        time.sleep(delay)
+        attempt += 1
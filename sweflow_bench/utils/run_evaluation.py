@@ -1,26 +1,65 @@
+import time
+import logging
 import tempfile
 
-from typing import List
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Dict, Tuple
 from pathlib import Path
-from datetime import datetime
 from pydantic import BaseModel
 
-from sweflow_bench.utils.docker import (
-    start_docker_container,
-    stop_docker_container,
-    remove_docker_container,
-    exec_command_in_container,
-    copy_file_to_container,
+from sweflow_bench.utils.docker import DockerError
+from sweflow_bench.utils.runtime import Runtime, LocalRuntimeError, create_runtime
+from sweflow_bench.utils.snapshots import (
+    SNAPSHOT_REPOSITORY,
+    get_snapshot_tag,
+    get_snapshot_labels,
+    get_snapshot_image_name,
+    has_snapshot,
+    gc_snapshots,
 )
 from sweflow_bench.utils.data import SWEFlowTestInstance
+from sweflow_bench.utils.preflight import run_preflight
+from sweflow_bench.utils.repo_cache import RepoCache
+from sweflow_bench.utils.docker_hosts import DockerHost, DockerHostPool
+from sweflow_bench.utils.retry import OOM_KILLED_EXIT_CODE, RetryPolicy, is_infrastructure_error, run_with_retries
+from sweflow_bench.utils.progress import ProgressReporter
+from sweflow_bench.utils.result_store import ResultStore
+from sweflow_bench.utils.profiling import InstanceProfile, ProfiledRuntime, wrap_with_time, parse_time_output
+from sweflow_bench.utils.affected_tests import (
+    P2P_SELECTIONS,
+    GoldBaseline,
+    ImportGraphCache,
+    parse_test_durations,
+    select_pass_to_pass,
+)
+from sweflow_bench.utils.flaky import (
+    PYTEST_TESTS_FAILED_EXIT_CODE,
+    RerunPolicy,
+    FlakyTestDatabase,
+    parse_test_statuses,
+    get_failed_tests,
+)
+from sweflow_bench.utils.metrics import PHASE_SECONDS, INSTANCES_TOTAL, QUEUE_DEPTH
+from sweflow_bench.utils.timeouts import (
+    TIMEOUT_EXIT_CODE,
+    PhaseTimeouts,
+    TimingHistory,
+    get_timing_samples,
+    resolve_timeouts,
+)
+
+logger = logging.getLogger(__name__)
 
 
 class EvaluationError(Exception):
 
-    def __init__(self, instance_id: str, exit_code: int, output: str):
+    def __init__(self, instance_id: str, exit_code: int, output: str, stage: str | None = None):
         self.instance_id = instance_id
         self.exit_code = exit_code
         self.output = output
+        self.stage = stage
+        # set by `evaluate_instance` when profiling
+        self.profile: InstanceProfile | None = None
 
 
 class EvaluationResult(BaseModel):
@@ -28,6 +67,28 @@ class EvaluationResult(BaseModel):
     resolved: bool
     exit_code: int
     test_log: str
+    # wall-clock seconds spent in each phase that ran to completion
+    durations: Dict[str, float] = {}
+    # phase the evaluation stopped at: "preflight", "workspace", "checkout", "apply" or "eval",
+    # "setup" when the local runtime failed, or "infrastructure" when it could not be completed
+    stage: str | None = None
+    model: str | None = None
+    repo: str | None = None
+    # runtime operation timings, recorded with `profile`
+    profile: InstanceProfile | None = None
+    # failed tests that passed when rerun, and the number of reruns
+    flaky_tests: List[str] = []
+    reruns: int = 0
+    # known-flaky PASS_TO_PASS tests that were not run
+    deselected_tests: List[str] = []
+    # PASS_TO_PASS tests not run as the patch cannot affect them
+    skipped_tests: List[str] = []
+    # seconds of each test, recorded for gold baselines
+    test_durations: Dict[str, float] = {}
+    # tests that failed with early exit: "fail_to_pass" or "pass_to_pass"
+    failed_eval_stage: str | None = None
+    # evaluations of the instance, more than one after infrastructure failures
+    attempts: int = 1
 
 
 GIT_APPLY_COMMANDS = [
@@ -35,108 +96,553 @@ GIT_APPLY_COMMANDS = [
     "git apply -p0 /tmp/patch.diff",
 ]
 
+# exit code recorded for patches rejected by the pre-flight check, same as a failed `git apply`
+PREFLIGHT_EXIT_CODE = 1
 
-def evaluate_instance(instance: SWEFlowTestInstance) -> EvaluationResult:
+
+def get_infrastructure_failure(result: EvaluationResult) -> str | None:
     """
-    Evaluate the given instance.
+    Describe the infrastructure failure the result is of, or None if it is of the instance.
+    A test run that genuinely runs out of memory is retried too, which costs a bounded number
+    of attempts.
     """
-    container = start_docker_container(
-        image_name=instance.docker_image,
-        container_name=f"sweflow-bench-{instance.instance_id}-{datetime.now().strftime('%Y%m%d-%H%M%S-%f')}",
+    if result.exit_code == OOM_KILLED_EXIT_CODE:
+        return f"killed at stage {result.stage}, e.g. out of memory"
+    return None
+
+
+def prepare_workspace(
+    instance: SWEFlowTestInstance,
+    runtime: Runtime,
+    timeouts: PhaseTimeouts,
+    durations: Dict[str, float],
+):
+    """
+    Copy the repository to /workspace and check out the instance's base commit.
+    """
+    # step 2: move container:/testbed to container:/workspace
+    start_time = time.monotonic()
+    exit_code, output = runtime.exec(
+        "cp -r /testbed/. /workspace",
+        timeout=timeouts.workspace,
     )
-    try:
-        # step 2: move container:/testbed to container:/workspace
-        exit_code, output = exec_command_in_container(
-            container,
-            "cp -r /testbed/. /workspace",
-            timeout=60,  # 60 seconds timeout
-        )
-        if exit_code != 0:
-            raise EvaluationError(instance.instance_id, exit_code, output)
+    if exit_code != 0:
+        raise EvaluationError(instance.instance_id, exit_code, output, stage="workspace")
+    durations["workspace"] = time.monotonic() - start_time
 
-        # step 3: checkout to base_commit
-        exit_code, output = exec_command_in_container(
-            container,
-            f"git checkout {instance.base_commit}",
+    # step 3: checkout to base_commit
+    start_time = time.monotonic()
+    exit_code, output = runtime.exec(
+        f"git checkout {instance.base_commit}",
+        timeout=timeouts.checkout,
+        workdir="/workspace",
+    )
+    if exit_code != 0:
+        raise EvaluationError(instance.instance_id, exit_code, output, stage="checkout")
+    durations["checkout"] = time.monotonic() - start_time
+
+
+def rerun_failed_tests(
+    instance: SWEFlowTestInstance,
+    runtime: Runtime,
+    failed_tests: List[str],
+    timeouts: PhaseTimeouts,
+    max_reruns: int,
+) -> Tuple[List[str], List[str], int, str]:
+    """
+    Rerun only the failed tests, up to `max_reruns` times or until all of them passed. Returns
+    the tests that still fail, the flaky tests that passed when rerun, the number of reruns and
+    their combined output.
+    """
+    flaky_tests = []
+    output = ""
+    reruns = 0
+    while failed_tests and reruns < max_reruns:
+        reruns += 1
+        exit_code, rerun_output = runtime.exec(
+            instance.get_eval_script(failed_tests),
+            timeout=timeouts.eval,
             workdir="/workspace",
         )
-        if exit_code != 0:
-            raise EvaluationError(instance.instance_id, exit_code, output)
+        output += f"\n===== rerun {reruns} of {len(failed_tests)} failed tests =====\n{rerun_output}"
+        if exit_code == 0:
+            flaky_tests += failed_tests
+            return [], flaky_tests, reruns, output
+        if exit_code != PYTEST_TESTS_FAILED_EXIT_CODE:
+            # timed out or tests could not run, so nothing is known about them
+            break
+        statuses = parse_test_statuses(rerun_output)
+        flaky_tests += [test_id for test_id in failed_tests if statuses.get(test_id) == "PASSED"]
+        failed_tests = [test_id for test_id in failed_tests if statuses.get(test_id) != "PASSED"]
+    return failed_tests, flaky_tests, reruns, output
+
+
+def run_tests(
+    instance: SWEFlowTestInstance,
+    runtime: Runtime,
+    test_ids: List[str],
+    timeouts: PhaseTimeouts,
+    rerun_policy: RerunPolicy,
+    durations: Dict[str, float],
+    profile: bool = False,
+    fail_fast: bool = False,
+    record_test_durations: bool = False,
+) -> Tuple[int, str, Dict[str, str], List[str], int]:
+    """
+    Run the given tests, then rerun only the failed ones, unless too many failed to be
+    flakiness. The seconds spent are added to the "eval" and "rerun" durations. Returns the exit
+    code, the output, the test statuses of the first run, the flaky tests and the number of reruns.
+    """
+    start_time = time.monotonic()
+    eval_script = instance.get_eval_script(test_ids, durations=record_test_durations, fail_fast=fail_fast)
+    if profile:
+        eval_script = wrap_with_time(eval_script)
+    exit_code, output = runtime.exec(
+        eval_script,
+        timeout=timeouts.eval,
+        workdir="/workspace",
+    )
+    if exit_code != TIMEOUT_EXIT_CODE:
+        durations["eval"] = durations.get("eval", 0.0) + time.monotonic() - start_time
+    else:
+        durations.pop("eval", None)
+    if profile:
+        output, eval_time = parse_time_output(output)
+        previous_eval_time = runtime.profile.eval_time
+        if previous_eval_time is not None and eval_time is not None:
+            eval_time = {key: previous_eval_time[key] + seconds for key, seconds in eval_time.items()}
+        runtime.profile.eval_time = eval_time
+
+    statuses = parse_test_statuses(output)
+    failed_tests = get_failed_tests(statuses)
+    flaky_tests = []
+    reruns = 0
+    if (
+        exit_code == PYTEST_TESTS_FAILED_EXIT_CODE
+        and 0 < len(failed_tests) <= rerun_policy.max_failed_tests
+        and rerun_policy.max_reruns > 0
+    ):
+        start_time = time.monotonic()
+        failed_tests, flaky_tests, reruns, rerun_output = rerun_failed_tests(
+            instance, runtime, failed_tests, timeouts, rerun_policy.max_reruns,
+        )
+        output += rerun_output
+        if not failed_tests:
+            exit_code = 0
+        durations["rerun"] = durations.get("rerun", 0.0) + time.monotonic() - start_time
+    return exit_code, output, statuses, flaky_tests, reruns
+
+
+def evaluate_instance(
+    instance: SWEFlowTestInstance,
+    timeouts: PhaseTimeouts | None = None,
+    runtime: Runtime | None = None,
+    prepared: bool = False,
+    profile: bool = False,
+    rerun_policy: RerunPolicy | None = None,
+    flaky_db: FlakyTestDatabase | None = None,
+    pass_to_pass: List[str] | None = None,
+    record_test_durations: bool = False,
+    early_exit: bool = False,
+) -> EvaluationResult:
+    """
+    Evaluate the given instance in the given runtime, by default a Docker container of the
+    instance image. With `prepared`, the runtime already has /workspace at base_commit.
+
+    With `profile`, the timings of all runtime operations and the time of the eval script
+    measured inside the runtime are recorded in the result.
+
+    Failed tests are rerun as set by `rerun_policy`, and the instance is resolved if all of
+    them passed on a rerun. Test runs and flaky tests are recorded into `flaky_db` if given.
+
+    `pass_to_pass` selects the PASS_TO_PASS tests to run, by default all of them. With
+    `record_test_durations`, the duration of each test is recorded in the result.
+
+    With `early_exit`, the FAIL_TO_PASS tests run first and stop at the first failure, and the
+    PASS_TO_PASS tests only run if they all passed. Each of the two runs has the eval timeout.
+    """
+    timeouts = timeouts or PhaseTimeouts()
+    rerun_policy = rerun_policy or RerunPolicy()
+    durations = {}
+    runtime = runtime or create_runtime(instance)
+    if profile:
+        runtime = ProfiledRuntime(runtime)
+    runtime.start()
+    try:
+        # step 2-3: prepare /workspace at base_commit, unless the runtime starts from a snapshot
+        if not prepared:
+            prepare_workspace(instance, runtime, timeouts, durations)
 
         # step 4: apply patch
+        start_time = time.monotonic()
         temp_file_path = tempfile.mktemp()
         with open(temp_file_path, "w") as f:
             f.write(instance.patch)
-        copy_file_to_container(container, temp_file_path, "/tmp/patch.diff")
+        runtime.put_file(temp_file_path, "/tmp/patch.diff")
         for git_apply_command in GIT_APPLY_COMMANDS:
-            exit_code, output = exec_command_in_container(
-                container,
+            exit_code, output = runtime.exec(
                 git_apply_command,
+                timeout=timeouts.apply,
                 workdir="/workspace",
             )
             if exit_code == 0:
                 break
         if exit_code != 0:
-            raise EvaluationError(instance.instance_id, exit_code, output)
+            raise EvaluationError(instance.instance_id, exit_code, output, stage="apply")
         Path(temp_file_path).unlink()
+        durations["apply"] = time.monotonic() - start_time
 
-        # step 5: run eval script
-        eval_script = instance.get_eval_script()
-        exit_code, output = exec_command_in_container(
-            container,
-            eval_script,
-            timeout=900,  # 15 minutes
-            workdir="/workspace",
-        )
+        # step 5: run eval script, only with the selected and not known-flaky PASS_TO_PASS tests
+        if pass_to_pass is None:
+            pass_to_pass = instance.PASS_TO_PASS
+        selected_tests = set(pass_to_pass)
+        skipped_tests = [test_id for test_id in instance.PASS_TO_PASS if test_id not in selected_tests]
+        deselected_tests = []
+        if rerun_policy.skip_known_flaky and flaky_db is not None:
+            known_flaky = flaky_db.get_flaky_tests(instance.repo, rerun_policy.min_flaky_runs) - set(instance.FAIL_TO_PASS)
+            deselected_tests = [test_id for test_id in pass_to_pass if test_id in known_flaky]
+            pass_to_pass = [test_id for test_id in pass_to_pass if test_id not in known_flaky]
+        if early_exit:
+            eval_stages = [("fail_to_pass", instance.FAIL_TO_PASS, True), ("pass_to_pass", pass_to_pass, False)]
+        else:
+            eval_stages = [(None, instance.FAIL_TO_PASS + pass_to_pass, False)]
+
+        # step 5b: rerun only the failed tests of each stage, and stop at the first failed stage
+        exit_code = 0
+        output = ""
+        statuses = {}
+        flaky_tests = []
+        reruns = 0
+        failed_eval_stage = None
+        # tests not run by a fail-fast stage whose failed test passed when rerun
+        not_run_tests = []
+        for eval_stage, test_ids, fail_fast in eval_stages:
+            test_ids = not_run_tests + test_ids
+            if early_exit and not test_ids:
+                continue
+            exit_code, stage_output, stage_statuses, stage_flaky_tests, stage_reruns = run_tests(
+                instance,
+                runtime,
+                test_ids,
+                timeouts,
+                rerun_policy,
+                durations,
+                profile=profile,
+                fail_fast=fail_fast,
+                record_test_durations=record_test_durations,
+            )
+            if eval_stage is not None:
+                output += f"===== {eval_stage} tests =====\n"
+            output += stage_output
+            statuses.update(stage_statuses)
+            flaky_tests += stage_flaky_tests
+            reruns += stage_reruns
+            if exit_code != 0:
+                failed_eval_stage = eval_stage
+                break
+            if fail_fast and stage_flaky_tests:
+                not_run_tests = [test_id for test_id in test_ids if test_id not in stage_statuses]
+
+        if flaky_tests:
+            logger.info(f"Flaky tests of {instance.instance_id} passed when rerun: {flaky_tests}")
+        if flaky_db is not None:
+            flaky_db.record(instance.repo, list(statuses.keys()), flaky_tests)
 
         evaluation_result = EvaluationResult(
             instance_id=instance.instance_id,
             resolved=exit_code == 0,
             exit_code=exit_code,
             test_log=output,
+            durations=durations,
+            stage="eval",
+            model=instance.model,
+            repo=instance.repo,
+            profile=runtime.profile if profile else None,
+            flaky_tests=flaky_tests,
+            reruns=reruns,
+            deselected_tests=deselected_tests,
+            skipped_tests=skipped_tests,
+            test_durations=parse_test_durations(output) if record_test_durations else {},
+            failed_eval_stage=failed_eval_stage,
         )
         return evaluation_result
+    except EvaluationError as e:
+        if profile:
+            e.profile = runtime.profile
+        raise
     finally:
-        # step 6: stop and remove container (always do this)
-        try:
-            stop_docker_container(container)
-        except Exception:
-            pass
+        # step 6: tear down the runtime, e.g. stop and remove container (always do this)
+        runtime.teardown()
+
+
+def prepare_snapshot(instance: SWEFlowTestInstance, timeouts: PhaseTimeouts | None = None) -> bool:
+    """
+    Prepare /workspace at base_commit once and commit it to the instance's snapshot image, from
+    which later evaluations of any model start directly. Returns False if the snapshot exists.
+    """
+    if has_snapshot(instance):
+        return False
+
+    runtime = create_runtime(instance)
+    runtime.start()
+    try:
+        prepare_workspace(instance, runtime, timeouts or PhaseTimeouts(), {})
+        runtime.commit(SNAPSHOT_REPOSITORY, get_snapshot_tag(instance), get_snapshot_labels(instance))
+    finally:
+        runtime.teardown()
+
+    return True
+
+
+def prepare_snapshots(
+    instances: List[SWEFlowTestInstance],
+    timeouts: PhaseTimeouts | None = None,
+    max_size_bytes: int | None = None,
+):
+    """
+    Prepare the snapshot images of the given instances, then garbage collect the oldest
+    snapshots beyond `max_size_bytes`.
+    """
+    prepared = 0
+    for instance in instances:
+        instance_timeouts = resolve_timeouts(instance, timeouts)
         try:
-            remove_docker_container(container)
-        except Exception:
-            pass
+            prepared += prepare_snapshot(instance, instance_timeouts)
+        except EvaluationError as e:
+            # evaluation of the instance will fail in the same way and record the error
+            logger.warning(f"Could not prepare snapshot of {instance.instance_id} at stage {e.stage}: {e.output}")
+        except DockerError as e:
+            # e.g. a missing base image, evaluation without a snapshot records it as well
+            logger.warning(f"Could not prepare snapshot of {instance.instance_id}: {e.message}")
+
+    logger.info(f"Prepared {prepared} new snapshots for {len(instances)} instances")
+
+    if max_size_bytes is not None:
+        gc_snapshots(max_size_bytes)
 
 
 def run_evaluation(
     instances: List[SWEFlowTestInstance],
     output_dir: str,
+    timeouts: PhaseTimeouts | None = None,
+    timing_history: TimingHistory | None = None,
+    adaptive_multiplier: float | None = None,
+    preflight: bool = False,
+    repo_cache: RepoCache | None = None,
+    preflight_workers: int | None = None,
+    populate_repo_cache: bool = False,
+    runtime_backend: str = "docker",
+    local_testbed_dir: str | None = None,
+    use_snapshots: bool = False,
+    progress: ProgressReporter | None = None,
+    result_store: ResultStore | None = None,
+    profile: bool = False,
+    rerun_policy: RerunPolicy | None = None,
+    flaky_db: FlakyTestDatabase | None = None,
+    gold_baseline: GoldBaseline | None = None,
+    p2p_selection: str = "full",
+    early_exit: bool = False,
+    docker_hosts: List[DockerHost] | None = None,
+    docker_host_max_errors: int = 3,
+    retry_policy: RetryPolicy | None = None,
 ) -> List[EvaluationResult]:
     """
     Run evaluation for the given instances.
+
+    Phase durations of each instance are recorded into `timing_history` if given, and with
+    `adaptive_multiplier` the history is used to shorten the timeouts per repo.
+
+    With `preflight`, patches are checked on the host before any container is started and
+    instances whose patch cannot apply are recorded as failed right away. Patches are also
+    checked with `git apply --check` against the mirrors in `repo_cache`.
+
+    `runtime_backend` selects where instances run: "docker" containers, or "local"
+    subprocesses in pre-prepared testbeds under `local_testbed_dir`. With `use_snapshots`,
+    docker instances start from their snapshot image if `prepare_snapshots` created one.
+
+    Started and finished instances are reported to `progress` if given.
+
+    Results are saved to `result_store` if given, otherwise to a directory per instance. With
+    `profile`, each result records the timings of its runtime operations.
+
+    Failed tests are rerun and known-flaky tests deselected as set by `rerun_policy`, with
+    flakiness recorded across runs in `flaky_db`.
+
+    Gold runs record the duration of each test into `gold_baseline`. With `p2p_selection`
+    "affected", other runs of instances whose gold run passed only run the PASS_TO_PASS tests
+    that import a file the patch modifies, using import graphs built from `repo_cache`.
+    "full" runs all tests, e.g. to verify the selection.
+
+    With `early_exit`, PASS_TO_PASS tests only run once all FAIL_TO_PASS tests passed.
+
+    Instances run one at a time on the local daemon, or with `docker_hosts` concurrently on the
+    slots of the given hosts. Each instance is placed on the least-loaded host, and moved to
+    another host on a Docker error. Hosts are not used after `docker_host_max_errors`
+    consecutive errors.
+
+    Instances hitting an infrastructure failure, a Docker error or a container killed e.g. out
+    of memory, are evaluated again with backoff as set by `retry_policy`. Instances still failing
+    with a Docker error after the last attempt, or left without a healthy host, get a failed
+    result at stage "infrastructure", and the run continues.
     """
+    if p2p_selection not in P2P_SELECTIONS:
+        raise ValueError(f"Unknown PASS_TO_PASS selection: {p2p_selection}")
+    if p2p_selection == "affected" and (gold_baseline is None or repo_cache is None):
+        raise ValueError("Selecting affected PASS_TO_PASS tests requires a gold baseline and a repo cache")
+    import_graphs = ImportGraphCache(repo_cache) if p2p_selection == "affected" else None
+    if docker_hosts and (runtime_backend != "docker" or use_snapshots):
+        raise ValueError("Docker hosts require the docker runtime, and snapshots are only on the local daemon")
+    host_pool = DockerHostPool(docker_hosts, docker_host_max_errors) if docker_hosts else None
+    retry_policy = retry_policy or RetryPolicy()
+
     Path(output_dir).mkdir(parents=True, exist_ok=True)
 
-    results = []
-    for instance in instances:
-        # evaluate instance
+    preflight_failures = run_preflight(
+        instances,
+        repo_cache,
+        preflight_workers,
+        populate_repo_cache,
+    ) if preflight else {}
+
+    def evaluate(instance: SWEFlowTestInstance, instance_timeouts: PhaseTimeouts, docker_host: str | None = None) -> EvaluationResult:
         try:
-            evaluation_result = evaluate_instance(instance)
+            if instance.instance_id in preflight_failures:
+                raise EvaluationError(instance.instance_id, PREFLIGHT_EXIT_CODE, preflight_failures[instance.instance_id], stage="preflight")
+            is_gold = instance.model == "gold"
+            pass_to_pass = None
+            if import_graphs is not None and not is_gold:
+                pass_to_pass = select_pass_to_pass(instance, gold_baseline, import_graphs)
+            prepared = use_snapshots and runtime_backend == "docker" and has_snapshot(instance)
+            runtime = create_runtime(
+                instance,
+                runtime_backend,
+                local_testbed_dir,
+                image_name=get_snapshot_image_name(instance) if prepared else None,
+                docker_host=docker_host,
+            )
+            evaluation_result = evaluate_instance(
+                instance,
+                instance_timeouts,
+                runtime,
+                prepared,
+                profile=profile,
+                rerun_policy=rerun_policy,
+                flaky_db=flaky_db,
+                pass_to_pass=pass_to_pass,
+                record_test_durations=gold_baseline is not None and is_gold,
+                early_exit=early_exit,
+            )
         except EvaluationError as e:
             evaluation_result = EvaluationResult(
                 instance_id=instance.instance_id,
                 resolved=False,
                 exit_code=e.exit_code,
                 test_log=e.output,
+                stage=e.stage,
+                model=instance.model,
+                repo=instance.repo,
+                profile=e.profile,
             )
+        except LocalRuntimeError as e:
+            # the local testbed is missing or unusable, which fails the instance, not the run
+            evaluation_result = EvaluationResult(
+                instance_id=instance.instance_id,
+                resolved=False,
+                exit_code=-1,
+                test_log=e.message,
+                stage="setup",
+                model=instance.model,
+                repo=instance.repo,
+            )
+        return evaluation_result
+
+    def run_instance(i: int, instance: SWEFlowTestInstance) -> EvaluationResult:
+        QUEUE_DEPTH.set(len(instances) - i)
+
+        # evaluate instance
+        if progress is not None:
+            progress.start(instance.instance_id)
+        instance_timeouts = resolve_timeouts(instance, timeouts, timing_history, adaptive_multiplier)
+
+        attempts = 0
+
+        def evaluate_once() -> EvaluationResult:
+            nonlocal attempts
+            attempts += 1
+            if host_pool is not None:
+                return host_pool.run(lambda host: evaluate(instance, instance_timeouts, host.base_url))
+            return evaluate(instance, instance_timeouts)
+
+        # retry infrastructure failures, and record how many attempts it took
+        try:
+            evaluation_result, _ = run_with_retries(
+                evaluate_once,
+                retry_policy,
+                get_infrastructure_failure,
+                instance.instance_id,
+            )
+        except Exception as e:
+            # out of attempts or of healthy hosts, which fails the instance, not the run
+            if not isinstance(e, DockerError) and not is_infrastructure_error(e):
+                raise
+            logger.error(f"Giving up on {instance.instance_id} after {attempts} attempts: {e}")
+            evaluation_result = EvaluationResult(
+                instance_id=instance.instance_id,
+                resolved=False,
+                exit_code=-1,
+                test_log=f"Infrastructure failure: {e}",
+                stage="infrastructure",
+                model=instance.model,
+                repo=instance.repo,
+            )
+        evaluation_result.attempts = attempts
+        if gold_baseline is not None and instance.model == "gold" and evaluation_result.stage == "eval":
+            gold_baseline.record(instance, evaluation_result.resolved, evaluation_result.test_durations)
 
         # save evaluation results
-        instance_report_path = Path(output_dir) / instance.instance_id / "report.json"
-        instance_test_log_path = Path(output_dir) / instance.instance_id / "test_output.log"
-        instance_report_path.parent.mkdir(parents=True, exist_ok=True)
-        instance_report_path.write_text(evaluation_result.model_dump_json(indent=4))
-        instance_test_log_path.write_text(evaluation_result.test_log)
+        if result_store is not None:
+            result_store.write(evaluation_result)
+        else:
+            instance_report_path = Path(output_dir) / instance.instance_id / "report.json"
+            instance_test_log_path = Path(output_dir) / instance.instance_id / "test_output.log"
+            instance_report_path.parent.mkdir(parents=True, exist_ok=True)
+            instance_report_path.write_text(evaluation_result.model_dump_json(indent=4))
+            instance_test_log_path.write_text(evaluation_result.test_log)
+
+        if timing_history is not None:
+            durations = evaluation_result.durations
+            if evaluation_result.failed_eval_stage == "fail_to_pass" or evaluation_result.skipped_tests:
+                # only part of the tests ran, which says little about the eval timeout of a full run
+                durations = {phase: duration for phase, duration in durations.items() if phase != "eval"}
+            timing_history.record(instance.instance_id, instance.repo, get_timing_samples(
+                durations,
+                evaluation_result.stage,
+                evaluation_result.exit_code,
+                instance_timeouts,
+            ))
+
+        for phase, duration in evaluation_result.durations.items():
+            PHASE_SECONDS.observe(duration, phase=phase)
+        INSTANCES_TOTAL.inc(stage=str(evaluation_result.stage), resolved=str(evaluation_result.resolved).lower())
+
+        if progress is not None:
+            progress.finish(instance.instance_id, evaluation_result.resolved, failed=evaluation_result.stage != "eval")
+
+        return evaluation_result
+
+    if host_pool is not None:
+        # one thread per slot, the hosts run the containers
+        executor = ThreadPoolExecutor(max_workers=host_pool.slots)
+        try:
+            results = list(executor.map(run_instance, range(len(instances)), instances))
+        finally:
+            # after a failure, do not start the remaining instances
+            executor.shutdown(cancel_futures=True)
+    else:
+        results = [run_instance(i, instance) for i, instance in enumerate(instances)]
 
-        results.append(evaluation_result)
+    QUEUE_DEPTH.set(0)
+    if progress is not None:
+        progress.report(force=True)
 
     return results
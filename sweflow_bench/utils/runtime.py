@@ -0,0 +1,249 @@
+import re
+import shutil
+import tempfile
+import subprocess
+
+from abc import ABC, abstractmethod
+from pathlib import Path
+from typing import Tuple, Dict
+from datetime import datetime
+from contextlib import contextmanager
+
+from sweflow_bench.utils.data import SWEFlowTestInstance
+from sweflow_bench.utils.metrics import (
+    CONTAINER_START_SECONDS,
+    EXEC_SECONDS,
+    DOCKER_ERRORS_TOTAL,
+)
+from sweflow_bench.utils.docker import (
+    DockerError,
+    start_docker_container,
+    stop_docker_container,
+    remove_docker_container,
+    commit_docker_container,
+    exec_command_in_container,
+    copy_file_to_container,
+    read_file_from_container,
+)
+
+RUNTIME_BACKENDS = ["docker", "local"]
+
+# top-level directories of the container layout that `LocalRuntime` maps into its root
+LOCAL_RUNTIME_PATH_PATTERN = re.compile(r"(?<![\w./-])/(testbed|workspace|tmp)(?=/|\s|$|['\"])")
+
+
+class LocalRuntimeError(Exception):
+
+    def __init__(self, message: str):
+        self.message = message
+        super().__init__(self.message)
+
+
+class Runtime(ABC):
+    """
+    Execution backend an instance is evaluated in.
+
+    Commands and paths use the layout of the instance images: the repository is at `/testbed`
+    and the evaluation runs in `/workspace`.
+    """
+
+    @abstractmethod
+    def start(self):
+        ...
+
+    @abstractmethod
+    def exec(self, command: str, timeout: int | None = None, workdir: str | None = None) -> Tuple[int, str]:
+        """
+        Execute the command through bash and return its exit code and output.
+        """
+        ...
+
+    @abstractmethod
+    def put_file(self, local_path: str, runtime_path: str):
+        ...
+
+    @abstractmethod
+    def get_file(self, runtime_path: str) -> str:
+        ...
+
+    @abstractmethod
+    def teardown(self):
+        """
+        Release all resources of the runtime. Never raises.
+        """
+        ...
+
+    def __enter__(self) -> "Runtime":
+        self.start()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.teardown()
+
+
+class DockerRuntime(Runtime):
+    """
+    Runtime in a container of the instance image on the Docker daemon at `base_url`, by default
+    the local one.
+    """
+
+    def __init__(self, image_name: str, container_name: str, base_url: str | None = None):
+        self.image_name = image_name
+        self.container_name = container_name
+        self.base_url = base_url
+        self.container = None
+
+    @staticmethod
+    @contextmanager
+    def _count_errors(operation: str):
+        try:
+            yield
+        except DockerError:
+            DOCKER_ERRORS_TOTAL.inc(operation=operation)
+            raise
+
+    def start(self):
+        with self._count_errors("start"), CONTAINER_START_SECONDS.time():
+            self.container = start_docker_container(
+                image_name=self.image_name,
+                container_name=self.container_name,
+                base_url=self.base_url,
+            )
+
+    def exec(self, command: str, timeout: int | None = None, workdir: str | None = None) -> Tuple[int, str]:
+        with self._count_errors("exec"), EXEC_SECONDS.time():
+            return exec_command_in_container(self.container, command, timeout=timeout, workdir=workdir)
+
+    def put_file(self, local_path: str, runtime_path: str):
+        with self._count_errors("put_file"):
+            copy_file_to_container(self.container, local_path, runtime_path, base_url=self.base_url)
+
+    def get_file(self, runtime_path: str) -> str:
+        with self._count_errors("get_file"):
+            return read_file_from_container(self.container, runtime_path, base_url=self.base_url)
+
+    def commit(self, repository: str, tag: str, labels: Dict[str, str] | None = None):
+        """
+        Commit the container's current state to a local image.
+        """
+        with self._count_errors("commit"):
+            commit_docker_container(self.container, repository, tag, labels)
+
+    def teardown(self):
+        if self.container is None:
+            return
+        try:
+            with self._count_errors("stop"):
+                stop_docker_container(self.container)
+        except Exception:
+            pass
+        try:
+            with self._count_errors("remove"):
+                remove_docker_container(self.container)
+        except Exception:
+            pass
+        self.container = None
+
+
+class LocalRuntime(Runtime):
+    """
+    Runtime of host subprocesses, for repos whose test environment is available on the host.
+
+    `/testbed` is mapped to a pre-prepared copy of the repository, `/workspace` and `/tmp` to
+    directories under a private temporary root.
+    """
+
+    def __init__(self, testbed_dir: str):
+        self.testbed_dir = Path(testbed_dir).resolve()
+        self.root_dir = None
+
+    def start(self):
+        if not self.testbed_dir.is_dir():
+            raise LocalRuntimeError(f"Testbed directory {self.testbed_dir} does not exist")
+        self.root_dir = Path(tempfile.mkdtemp(prefix="sweflow-bench-local-"))
+        (self.root_dir / "workspace").mkdir()
+        (self.root_dir / "tmp").mkdir()
+
+    def map_path(self, path: str) -> str:
+        """
+        Map the paths of the container layout in the given path or command to host paths.
+        """
+        def replace(match: re.Match) -> str:
+            if match.group(1) == "testbed":
+                return str(self.testbed_dir)
+            return str(self.root_dir / match.group(1))
+
+        return LOCAL_RUNTIME_PATH_PATTERN.sub(replace, path)
+
+    def exec(self, command: str, timeout: int | None = None, workdir: str | None = None) -> Tuple[int, str]:
+        with EXEC_SECONDS.time():
+            return self._exec(command, timeout, workdir)
+
+    def _exec(self, command: str, timeout: int | None = None, workdir: str | None = None) -> Tuple[int, str]:
+        try:
+            result = subprocess.run(
+                ["bash", "-c", self.map_path(command)],
+                cwd=self.map_path(workdir) if workdir is not None else self.root_dir,
+                timeout=timeout,
+                stdout=subprocess.PIPE,
+                stderr=subprocess.STDOUT,
+            )
+            return result.returncode, result.stdout.decode("utf-8", errors="replace")
+        except subprocess.TimeoutExpired as e:
+            # same exit code as the `timeout` wrapper in containers
+            return 124, (e.stdout or b"").decode("utf-8", errors="replace")
+        except OSError as e:
+            raise LocalRuntimeError(f"Error executing command: {e}")
+
+    def put_file(self, local_path: str, runtime_path: str):
+        try:
+            shutil.copy(local_path, self.map_path(runtime_path))
+        except OSError as e:
+            raise LocalRuntimeError(f"Error copying file to runtime: {e}")
+
+    def get_file(self, runtime_path: str) -> str:
+        try:
+            return Path(self.map_path(runtime_path)).read_text()
+        except OSError as e:
+            raise LocalRuntimeError(f"Error reading file from runtime: {e}")
+
+    def teardown(self):
+        if self.root_dir is not None:
+            shutil.rmtree(self.root_dir, ignore_errors=True)
+            self.root_dir = None
+
+
+def get_local_testbed_dir(local_testbed_dir: str, instance: SWEFlowTestInstance) -> Path:
+    """
+    Get the pre-prepared testbed of the instance: `<local_testbed_dir>/<instance_id>` if it
+    exists, otherwise the per-repo `<local_testbed_dir>/<repo>` with `/` replaced by `__`.
+    """
+    instance_dir = Path(local_testbed_dir) / instance.instance_id.replace("/", "__")
+    if instance_dir.is_dir():
+        return instance_dir
+    return Path(local_testbed_dir) / instance.repo.replace("/", "__")
+
+
+def create_runtime(
+    instance: SWEFlowTestInstance,
+    backend: str = "docker",
+    local_testbed_dir: str | None = None,
+    image_name: str | None = None,
+    docker_host: str | None = None,
+) -> Runtime:
+    """
+    Create an unstarted runtime of the given backend for the instance. `image_name` overrides
+    the instance image of the docker backend, e.g. with a snapshot, and `docker_host` is the
+    base URL of the daemon to run it on.
+    """
+    if backend == "docker":
+        return DockerRuntime(
+            image_name=image_name or instance.docker_image,
+            container_name=f"sweflow-bench-{instance.instance_id}-{datetime.now().strftime('%Y%m%d-%H%M%S-%f')}",
+            base_url=docker_host,
+        )
+    if backend == "local":
+        if local_testbed_dir is None:
+            raise ValueError("The local runtime requires a testbed directory")
+        return LocalRuntime(str(get_local_testbed_dir(local_testbed_dir, instance)))
+    raise ValueError(f"Unknown runtime backend: {backend}")
@@ -0,0 +1,81 @@
+import re
+import hashlib
+import logging
+
+from typing import Dict
+
+from sweflow_bench.utils.data import SWEFlowTestInstance
+from sweflow_bench.utils.docker import (
+    DockerError,
+    get_docker_image,
+    list_docker_images,
+    remove_docker_image,
+)
+
+logger = logging.getLogger(__name__)
+
+SNAPSHOT_REPOSITORY = "sweflow-bench-snapshot"
+SNAPSHOT_LABEL = "sweflow-bench.snapshot"
+SNAPSHOT_BASE_IMAGE_LABEL = "sweflow-bench.base-image"
+
+
+def get_snapshot_tag(instance: SWEFlowTestInstance) -> str:
+    """
+    Get the tag of the snapshot of the instance's workspace at `base_commit`.
+
+    The tag includes a hash of the image and commit, so a changed dataset row never reuses
+    a stale snapshot.
+    """
+    digest = hashlib.sha1(f"{instance.instance_id}\0{instance.docker_image}\0{instance.base_commit}".encode()).hexdigest()[:12]
+    name = re.sub(r"[^A-Za-z0-9_.-]", "_", instance.instance_id).lstrip(".-")[:100]
+    return f"{name}-{digest}".lower()
+
+
+def get_snapshot_image_name(instance: SWEFlowTestInstance) -> str:
+    return f"{SNAPSHOT_REPOSITORY}:{get_snapshot_tag(instance)}"
+
+
+def get_snapshot_labels(instance: SWEFlowTestInstance) -> Dict[str, str]:
+    return {
+        SNAPSHOT_LABEL: instance.instance_id,
+        SNAPSHOT_BASE_IMAGE_LABEL: instance.docker_image,
+    }
+
+
+def has_snapshot(instance: SWEFlowTestInstance) -> bool:
+    return get_docker_image(get_snapshot_image_name(instance)) is not None
+
+
+def gc_snapshots(max_size_bytes: int) -> int:
+    """
+    Remove the oldest snapshot images until the snapshots use at most `max_size_bytes`.
+
+    The size of a snapshot is what it adds on top of its base image. Returns the number of
+    removed images.
+    """
+    images = list_docker_images(SNAPSHOT_LABEL)
+    base_sizes = {}
+    sizes = []
+    for image in images:
+        base_image_name = image.labels.get(SNAPSHOT_BASE_IMAGE_LABEL)
+        if base_image_name not in base_sizes:
+            base_image = get_docker_image(base_image_name) if base_image_name else None
+            base_sizes[base_image_name] = base_image.attrs["Size"] if base_image is not None else 0
+        sizes.append(max(image.attrs["Size"] - base_sizes[base_image_name], 0))
+
+    total_size = sum(sizes)
+    removed = 0
+    for image, size in sorted(zip(images, sizes), key=lambda item: item[0].attrs["Created"]):
+        if total_size <= max_size_bytes:
+            break
+        try:
+            remove_docker_image(image.id)
+        except DockerError as e:
+            logger.warning(f"Could not remove snapshot {image.tags}: {e.message}")
+            continue
+        total_size -= size
+        removed += 1
+
+    logger.info(f"Removed {removed} snapshot images, {total_size / 1e9:.2f} GB of snapshots left")
+
+    return removed
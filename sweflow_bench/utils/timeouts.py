@@ -0,0 +1,129 @@
+import json
+import math
+import logging
+import threading
+
+from pathlib import Path
+from typing import Dict, List
+from collections import defaultdict
+from pydantic import BaseModel
+
+from sweflow_bench.utils.data import SWEFlowTestInstance
+
+logger = logging.getLogger(__name__)
+
+# exit code of coreutils `timeout` when the command timed out
+TIMEOUT_EXIT_CODE = 124
+
+
+class PhaseTimeouts(BaseModel):
+    """
+    Timeouts in seconds for each phase of `evaluate_instance`. `None` disables the timeout.
+    """
+    workspace: int | None = 60
+    checkout: int | None = 300
+    apply: int | None = 60
+    eval: int | None = 900
+
+    def get(self, phase: str) -> int | None:
+        return getattr(self, phase)
+
+
+PHASES = list(PhaseTimeouts.model_fields.keys())
+
+
+def _percentile(samples: List[float], q: float) -> float:
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, math.ceil(q * len(ordered)) - 1)
+    return ordered[max(index, 0)]
+
+
+class TimingHistory:
+    """
+    Per-repo phase durations of previous runs, persisted as a jsonl file.
+    """
+
+    def __init__(self, path: str | None = None):
+        self.path = Path(path) if path is not None else None
+        self.samples: Dict[str, Dict[str, List[float]]] = defaultdict(lambda: defaultdict(list))
+        self.lock = threading.Lock()
+        if self.path is not None and self.path.exists():
+            with open(self.path, "r") as f:
+                for line in f:
+                    if not line.strip():
+                        continue
+                    record = json.loads(line)
+                    self._add(record["repo"], record["durations"])
+            logger.info(f"Loaded timing history for {len(self.samples)} repos from {self.path}")
+
+    def _add(self, repo: str, durations: Dict[str, float]):
+        for phase, duration in durations.items():
+            self.samples[repo][phase].append(duration)
+
+    def record(self, instance_id: str, repo: str, durations: Dict[str, float]):
+        """
+        Record the phase durations of a finished instance.
+        """
+        if not durations:
+            return
+        with self.lock:
+            self._add(repo, durations)
+            if self.path is not None:
+                self.path.parent.mkdir(parents=True, exist_ok=True)
+                with open(self.path, "a") as f:
+                    f.write(json.dumps({"instance_id": instance_id, "repo": repo, "durations": durations}) + "\n")
+
+    def p95(self, repo: str, phase: str, min_samples: int = 5) -> float | None:
+        samples = self.samples.get(repo, {}).get(phase, [])
+        if len(samples) < min_samples:
+            return None
+        return _percentile(samples, 0.95)
+
+
+def get_timing_samples(
+    durations: Dict[str, float],
+    stage: str | None,
+    exit_code: int,
+    timeouts: PhaseTimeouts,
+) -> Dict[str, float]:
+    """
+    Get the phase durations of a finished instance to record into the timing history. A phase
+    that timed out is recorded with its timeout, so the history learns that a repo got slower
+    instead of only keeping the faster samples.
+    """
+    samples = dict(durations)
+    if exit_code == TIMEOUT_EXIT_CODE and stage in PHASES and timeouts.get(stage) is not None:
+        samples[stage] = float(timeouts.get(stage))
+    return samples
+
+
+def resolve_timeouts(
+    instance: SWEFlowTestInstance,
+    timeouts: PhaseTimeouts | None = None,
+    timing_history: TimingHistory | None = None,
+    adaptive_multiplier: float | None = None,
+    min_timeout: int = 30,
+) -> PhaseTimeouts:
+    """
+    Resolve the timeouts for the given instance.
+
+    Configured timeouts are the upper bound. With `adaptive_multiplier`, each phase is
+    shortened to `adaptive_multiplier` times the historic p95 of the instance's repo.
+    Timeouts set on the instance by the dataset take precedence over both.
+    """
+    resolved = (timeouts or PhaseTimeouts()).model_dump()
+
+    if timing_history is not None and adaptive_multiplier is not None:
+        for phase in PHASES:
+            p95 = timing_history.p95(instance.repo, phase)
+            if p95 is None:
+                continue
+            adaptive = max(min_timeout, math.ceil(p95 * adaptive_multiplier))
+            if resolved[phase] is None or adaptive < resolved[phase]:
+                resolved[phase] = adaptive
+
+    if instance.timeouts:
+        # the phases are validated when the instance is loaded
+        resolved.update(instance.timeouts)
+
+    return PhaseTimeouts(**resolved)
@@ -0,0 +1,257 @@
+import os
+import re
+import time
+import socket
+import logging
+import threading
+
+from pathlib import Path
+from typing import List, Tuple, Any, Dict
+
+from sweflow_bench.utils.data import SWEFlowTestInstance
+from sweflow_bench.utils.run_evaluation import EvaluationResult, run_evaluation
+from sweflow_bench.utils.progress import ProgressReporter
+from sweflow_bench.utils.metrics import QUEUE_DEPTH
+
+logger = logging.getLogger(__name__)
+
+
+def get_worker_id() -> str:
+    return re.sub(r"[^A-Za-z0-9_-]", "_", f"{socket.gethostname()}-{os.getpid()}")
+
+
+def _write_atomic(path: Path, content: str):
+    temp_path = path.parent / f".{path.name}.{get_worker_id()}.tmp"
+    temp_path.write_text(content)
+    os.replace(temp_path, path)
+
+
+def get_failed_result(instance: SWEFlowTestInstance, message: str) -> EvaluationResult:
+    """
+    Result of an instance whose evaluation could not be completed by any worker.
+    """
+    return EvaluationResult(instance_id=instance.instance_id,
+                            resolved=False,
+                            exit_code=-1,
+                            test_log=message,
+                            stage="infrastructure",
+                            model=instance.model,
+                            repo=instance.repo)
+
+
+class FileWorkQueue:
+    """
+    Work queue in a shared directory, safe for concurrent workers on different hosts.
+
+    Work items are claimed by atomically renaming `pending/<key>.json` into
+    `leases/<worker_id>/<key>.json`. The mtime of a lease file is its expiry time; workers
+    renew it while evaluating, and expired leases of dead workers are moved back to `pending/`.
+    Results are written to `results/<key>.json`. Keys include the model, so a queue directory
+    can be reused for the predictions of another model.
+
+    The number of times an item was requeued is kept in `requeues/<key>`; an item whose lease
+    expired more than `max_requeues` times, e.g. as it kills every worker, gets a failed result.
+    """
+
+    def __init__(self, queue_dir: str, max_requeues: int = 3):
+        self.queue_dir = Path(queue_dir)
+        self.max_requeues = max_requeues
+        self.pending_dir = self.queue_dir / "pending"
+        self.leases_dir = self.queue_dir / "leases"
+        self.results_dir = self.queue_dir / "results"
+        self.requeues_dir = self.queue_dir / "requeues"
+        for path in [self.pending_dir, self.leases_dir, self.results_dir, self.requeues_dir]:
+            path.mkdir(parents=True, exist_ok=True)
+
+    @staticmethod
+    def get_key(instance: SWEFlowTestInstance) -> str:
+        return f"{instance.model}__{instance.instance_id}".replace("/", "__")
+
+    def put(self, instance: SWEFlowTestInstance):
+        key = self.get_key(instance)
+        if (self.results_dir / f"{key}.json").exists():
+            return
+        _write_atomic(self.pending_dir / f"{key}.json", instance.model_dump_json())
+
+    def claim(self, worker_id: str, lease_seconds: float) -> Tuple[Path, SWEFlowTestInstance] | None:
+        """
+        Claim the next pending work item, returning its lease path and instance.
+        """
+        worker_dir = self.leases_dir / worker_id
+        worker_dir.mkdir(parents=True, exist_ok=True)
+        for pending_path in sorted(self.pending_dir.glob("*.json")):
+            expires_at = time.time() + lease_seconds
+            try:
+                # set the expiry before the rename, so the lease is never observed as expired
+                os.utime(pending_path, (expires_at, expires_at))
+                lease_path = worker_dir / pending_path.name
+                os.rename(pending_path, lease_path)
+            except FileNotFoundError:
+                # claimed by another worker
+                continue
+            return lease_path, SWEFlowTestInstance.model_validate_json(lease_path.read_text())
+        return None
+
+    def renew(self, lease_path: Path, lease_seconds: float) -> bool:
+        """
+        Extend the lease, returning False if it was lost to expiry.
+        """
+        expires_at = time.time() + lease_seconds
+        try:
+            os.utime(lease_path, (expires_at, expires_at))
+            return True
+        except FileNotFoundError:
+            return False
+
+    def complete(self, lease_path: Path, result: EvaluationResult):
+        _write_atomic(self.results_dir / lease_path.name, result.model_dump_json())
+        try:
+            lease_path.unlink()
+        except FileNotFoundError:
+            logger.warning(f"Lease {lease_path} expired before the result was written")
+
+    def get_requeues(self, key: str) -> int:
+        try:
+            return int((self.requeues_dir / key).read_text())
+        except FileNotFoundError:
+            return 0
+
+    def requeue_expired(self) -> int:
+        """
+        Move expired leases back to pending and return how many were requeued. Leases that
+        were requeued `max_requeues` times already are completed with a failed result instead.
+        """
+        requeued = 0
+        now = time.time()
+        for lease_path in self.leases_dir.glob("*/*.json"):
+            key = lease_path.stem
+            try:
+                if lease_path.stat().st_mtime >= now:
+                    continue
+                if (self.results_dir / lease_path.name).exists():
+                    lease_path.unlink()
+                    continue
+                requeues = self.get_requeues(key)
+                if requeues >= self.max_requeues:
+                    instance = SWEFlowTestInstance.model_validate_json(lease_path.read_text())
+                    lease_path.unlink()
+                    logger.error(f"Giving up on {instance.instance_id} after its lease expired {requeues + 1} times")
+                    _write_atomic(self.results_dir / lease_path.name,
+                                  get_failed_result(instance, f"Lease expired {requeues + 1} times, the worker evaluating the instance died each time").model_dump_json())
+                    continue
+                os.rename(lease_path, self.pending_dir / lease_path.name)
+            except FileNotFoundError:
+                # completed or requeued concurrently
+                continue
+            _write_atomic(self.requeues_dir / key, str(requeues + 1))
+            logger.warning(f"Requeued expired lease {lease_path}")
+            requeued += 1
+        return requeued
+
+    def get_result(self, instance: SWEFlowTestInstance) -> EvaluationResult | None:
+        result_path = self.results_dir / f"{self.get_key(instance)}.json"
+        if not result_path.exists():
+            return None
+        return EvaluationResult.model_validate_json(result_path.read_text())
+
+    def count_pending(self) -> int:
+        return sum(1 for _ in self.pending_dir.glob("*.json"))
+
+    def count_leased(self) -> int:
+        return sum(1 for _ in self.leases_dir.glob("*/*.json"))
+
+
+def run_coordinator(
+    instances: List[SWEFlowTestInstance],
+    queue: FileWorkQueue,
+    poll_interval: float = 5.0,
+    progress: ProgressReporter | None = None,
+) -> List[EvaluationResult]:
+    """
+    Enqueue the given instances and wait until workers have evaluated all of them.
+    Collected results are reported to `progress` if given.
+    """
+    for instance in instances:
+        queue.put(instance)
+    logger.info(f"Enqueued {len(instances)} instances into {queue.queue_dir}")
+
+    results: Dict[str, EvaluationResult] = {}
+    while True:
+        queue.requeue_expired()
+        for instance in instances:
+            if instance.instance_id not in results:
+                result = queue.get_result(instance)
+                if result is not None:
+                    results[instance.instance_id] = result
+                    if progress is not None:
+                        progress.finish(instance.instance_id, result.resolved, failed=result.stage != "eval")
+        if len(results) == len(instances):
+            break
+        QUEUE_DEPTH.set(queue.count_pending())
+        if progress is None:
+            logger.info(f"Waiting for workers: {len(results)}/{len(instances)} done, {queue.count_pending()} pending, {queue.count_leased()} leased")
+        else:
+            progress.report()
+        time.sleep(poll_interval)
+
+    if progress is not None:
+        progress.report(force=True)
+
+    return [results[instance.instance_id] for instance in instances]
+
+
+def run_worker(
+    queue: FileWorkQueue,
+    output_dir: str,
+    worker_id: str | None = None,
+    lease_seconds: float = 300.0,
+    poll_interval: float = 5.0,
+    exit_when_empty: bool = False,
+    evaluation_kwargs: Dict[str, Any] | None = None,
+) -> int:
+    """
+    Claim and evaluate work items until the queue is empty (with `exit_when_empty`) or forever.
+    An evaluation that raises is completed with a failed result. Returns the number of
+    evaluated instances.
+    """
+    worker_id = worker_id or get_worker_id()
+    evaluation_kwargs = evaluation_kwargs or {}
+    logger.info(f"Worker {worker_id} polling {queue.queue_dir}")
+
+    evaluated = 0
+    while True:
+        queue.requeue_expired()
+        claimed = queue.claim(worker_id, lease_seconds)
+        if claimed is None:
+            if exit_when_empty and queue.count_pending() == 0 and queue.count_leased() == 0:
+                break
+            time.sleep(poll_interval)
+            continue
+        lease_path, instance = claimed
+
+        # renew the lease in the background while evaluating
+        stop_event = threading.Event()
+
+        def heartbeat():
+            while not stop_event.wait(lease_seconds / 3):
+                if not queue.renew(lease_path, lease_seconds):
+                    logger.warning(f"Worker {worker_id} lost lease on {instance.instance_id}")
+                    return
+
+        heartbeat_thread = threading.Thread(target=heartbeat, daemon=True)
+        heartbeat_thread.start()
+        try:
+            result = run_evaluation([instance], output_dir, **evaluation_kwargs)[0]
+        except Exception as e:
+            logger.exception(f"Worker {worker_id} failed to evaluate {instance.instance_id}")
+            result = get_failed_result(instance, f"Evaluation failed: {e!r}")
+        finally:
+            stop_event.set()
+            heartbeat_thread.join()
+
+        queue.complete(lease_path, result)
+        evaluated += 1
+
+    logger.info(f"Worker {worker_id} evaluated {evaluated} instances")
+
+    return evaluated
@@ -0,0 +1,19 @@
+from sweflow_bench.utils.data import SWEFlowTestInstance
+
+
+def make_instance(instance_id: str = "test-001", **kwargs) -> SWEFlowTestInstance:
+    """
+    Make a test instance, overriding any of its fields with `kwargs`.
+    """
+    attrs = dict(instance_id=instance_id,
+                 repo="test-repo",
+                 problem_statement="Fix the bug",
+                 base_commit="abc123",
+                 reference_commit="def456",
+                 patch="diff --git a/test.py b/test.py\n",
+                 docker_image="test-image:latest",
+                 FAIL_TO_PASS=["test_fail_to_pass"],
+                 PASS_TO_PASS=["test_pass_to_pass"],
+                 model="test-model")
+    attrs.update(kwargs)
+    return SWEFlowTestInstance(**attrs)
@@ -0,0 +1,200 @@
+import pytest
+import tempfile
+import subprocess
+from pathlib import Path
+from unittest.mock import MagicMock
+from functools import partial
+
+from conftest import make_instance as make_test_instance
+from sweflow_bench.utils.affected_tests import (
+    GoldBaseline,
+    ImportGraphCache,
+    parse_test_durations,
+    get_modified_files,
+    get_deleted_files,
+    build_import_graph,
+    get_affected_tests,
+    select_pass_to_pass,
+)
+from sweflow_bench.utils.repo_cache import RepoCache
+from sweflow_bench.utils.runtime import Runtime
+from sweflow_bench.utils.run_evaluation import evaluate_instance
+
+REPO_FILES = {
+    "pkg/__init__.py": "",
+    "pkg/core.py": "def add(a, b):\n    return a + b\n",
+    "pkg/util.py": "from .core import add\n",
+    "pkg/io.py": "import json\n",
+    "tests/conftest.py": "",
+    "tests/test_core.py": "from pkg import core\n",
+    "tests/test_util.py": "import pkg.util\n",
+    "tests/test_io.py": "def test_io():\n    from pkg.io import json\n",
+    "tests/test_none.py": "import os\n",
+    "legacy.py": "print 'python 2'\n",
+}
+
+PASS_TO_PASS = [
+    "tests/test_core.py::test_add",
+    "tests/test_util.py::test_util",
+    "tests/test_io.py::test_io",
+    "tests/test_none.py::test_none",
+]
+
+
+def git(*args, cwd=None):
+    return subprocess.run(["git", *args], cwd=cwd, check=True, stdout=subprocess.PIPE, text=True).stdout.strip()
+
+
+def make_patch(path: str) -> str:
+    return f"diff --git a/{path} b/{path}\n--- a/{path}\n+++ b/{path}\n@@ -1 +1 @@\n-old\n+new\n"
+
+
+make_instance = partial(
+    make_test_instance,
+    repo="org/repo",
+    patch=make_patch("pkg/io.py"),
+    FAIL_TO_PASS=["tests/test_io.py::test_f2p"],
+    PASS_TO_PASS=PASS_TO_PASS,
+)
+
+
+@pytest.fixture
+def repo_dir():
+    with tempfile.TemporaryDirectory() as temp_dir:
+        for path, content in REPO_FILES.items():
+            (Path(temp_dir) / path).parent.mkdir(parents=True, exist_ok=True)
+            (Path(temp_dir) / path).write_text(content)
+        yield Path(temp_dir)
+
+
+class TestParseTestDurations:
+
+    def test_durations(self):
+        output = (
+            "============================ slowest durations =============================\n"
+            "0.50s call     tests/test_a.py::test_b[x y]\n"
+            "0.25s setup    tests/test_a.py::test_b[x y]\n"
+            "0.10s call     tests/test_a.py::test_c\n"
+        )
+        assert parse_test_durations(output) == {"tests/test_a.py::test_b[x y]": 0.75, "tests/test_a.py::test_c": 0.1}
+
+
+class TestGetModifiedFiles:
+
+    def test_old_paths(self):
+        patch = "diff --git a/old.py b/new.py\nsimilarity index 100%\nrename from old.py\nrename to new.py\n"
+        assert get_modified_files(patch) == ["new.py", "old.py"]
+
+
+class TestGetDeletedFiles:
+
+    def test_deleted_files(self):
+        patch = (
+            "diff --git a/pkg/core.py b/pkg/core.py\ndeleted file mode 100644\n--- a/pkg/core.py\n+++ /dev/null\n@@ -1 +0,0 @@\n-old\n"
+            "diff --git a/tests/__init__.py b/tests/__init__.py\ndeleted file mode 100644\n"
+            + make_patch("pkg/io.py")
+        )
+        assert get_deleted_files(patch) == ["pkg/core.py", "tests/__init__.py"]
+
+
+class TestImportGraph:
+
+    def test_build_import_graph(self, repo_dir):
+        graph = build_import_graph(str(repo_dir))
+        assert graph["tests/test_core.py"] == ["pkg/__init__.py", "pkg/core.py"]
+        assert graph["pkg/util.py"] == ["pkg/__init__.py", "pkg/core.py"]
+        assert graph["tests/test_io.py"] == ["pkg/__init__.py", "pkg/io.py"]
+        assert graph["tests/test_none.py"] == []
+        # files that cannot be parsed import nothing
+        assert graph["legacy.py"] == []
+
+    def test_affected_tests(self, repo_dir):
+        graph = build_import_graph(str(repo_dir))
+        assert get_affected_tests(PASS_TO_PASS, ["pkg/core.py"], graph) == PASS_TO_PASS[:2]
+        assert get_affected_tests(PASS_TO_PASS, ["pkg/io.py", "README.md"], graph) == PASS_TO_PASS[2:3]
+        assert get_affected_tests(PASS_TO_PASS, ["tests/test_none.py"], graph) == PASS_TO_PASS[3:]
+        # conftest.py files are loaded for all tests below them
+        assert get_affected_tests(PASS_TO_PASS, ["tests/conftest.py"], graph) == PASS_TO_PASS
+
+    def test_unknown_dependencies(self, repo_dir):
+        graph = build_import_graph(str(repo_dir))
+        # tests of unknown modules are always affected
+        assert get_affected_tests(["test_unknown"], ["pkg/io.py"], graph) == ["test_unknown"]
+        # non-Python files may affect any test
+        assert get_affected_tests(PASS_TO_PASS, ["pkg/data.json"], graph) is None
+        # so may Python files the graph at the base commit does not know, e.g. a new conftest.py
+        assert get_affected_tests(PASS_TO_PASS, ["pkg/conftest.py"], graph) is None
+        assert get_affected_tests(PASS_TO_PASS, ["pkg/new.py"], graph) is None
+
+    def test_deleted_package_files(self, repo_dir):
+        graph = build_import_graph(str(repo_dir))
+        assert get_affected_tests(PASS_TO_PASS, ["pkg/core.py"], graph, ["pkg/core.py"]) == PASS_TO_PASS[:2]
+        assert get_affected_tests(PASS_TO_PASS, ["tests/conftest.py"], graph, ["tests/conftest.py"]) is None
+
+
+class TestGoldBaseline:
+
+    def test_record_and_get(self):
+        with tempfile.TemporaryDirectory() as temp_dir:
+            baseline = GoldBaseline(str(Path(temp_dir) / "gold.jsonl"))
+            baseline.record(make_instance(model="gold"), True, {"tests/test_core.py::test_add": 1.5})
+
+            record = GoldBaseline(str(Path(temp_dir) / "gold.jsonl")).get(make_instance())
+            assert record["resolved"] is True
+            assert record["test_durations"] == {"tests/test_core.py::test_add": 1.5}
+            # other base commits have no baseline
+            assert baseline.get(make_instance(base_commit="other")) is None
+
+
+class TestSelectPassToPass:
+
+    def test_select(self, repo_dir):
+        git("init", "-q", cwd=repo_dir)
+        git("add", ".", cwd=repo_dir)
+        git("-c", "user.name=test", "-c", "user.email=test@example.com", "commit", "-qm", "base", cwd=repo_dir)
+        base_commit = git("rev-parse", "HEAD", cwd=repo_dir)
+
+        with tempfile.TemporaryDirectory() as temp_dir:
+            repo_cache = RepoCache(temp_dir)
+            repo_cache.populate_from_directory("org/repo", str(repo_dir))
+            import_graphs = ImportGraphCache(repo_cache)
+            baseline = GoldBaseline(str(Path(temp_dir) / "gold.jsonl"))
+            instance = make_instance(base_commit=base_commit)
+
+            # without a gold run, all tests are selected
+            assert select_pass_to_pass(instance, baseline, import_graphs) == PASS_TO_PASS
+
+            baseline.record(instance, True, {})
+            assert select_pass_to_pass(instance, baseline, import_graphs) == PASS_TO_PASS[2:3]
+            # a new conftest.py may break any test
+            new_conftest = make_instance(base_commit=base_commit, patch=make_patch("tests/unit/conftest.py"))
+            assert select_pass_to_pass(new_conftest, baseline, import_graphs) == PASS_TO_PASS
+            # the graph is cached on disk
+            assert (Path(temp_dir) / "import-graphs" / "org__repo" / f"{base_commit}.json").exists()
+            assert ImportGraphCache(repo_cache).get("org/repo", base_commit) == import_graphs.get("org/repo", base_commit)
+
+            # commits missing from the cache select all tests
+            baseline.record(make_instance(base_commit="0" * 40), True, {})
+            assert select_pass_to_pass(make_instance(base_commit="0" * 40), baseline, import_graphs) == PASS_TO_PASS
+
+    def test_failed_gold_run_selects_all(self):
+        with tempfile.TemporaryDirectory() as temp_dir:
+            baseline = GoldBaseline(str(Path(temp_dir) / "gold.jsonl"))
+            baseline.record(make_instance(), False, {})
+            import_graphs = MagicMock()
+
+            assert select_pass_to_pass(make_instance(), baseline, import_graphs) == PASS_TO_PASS
+            import_graphs.get.assert_not_called()
+
+
+class TestEvaluateInstanceSelection:
+
+    def test_selected_pass_to_pass(self):
+        runtime = MagicMock(spec=Runtime)
+        runtime.exec.side_effect = [(0, ""), (0, "0.50s call     tests/test_io.py::test_io\n")]
+
+        result = evaluate_instance(make_instance(), runtime=runtime, prepared=True, pass_to_pass=PASS_TO_PASS[2:3], record_test_durations=True)
+
+        assert runtime.exec.call_args_list[1].args[0] == "python -m pytest -v --durations=0 --durations-min=0 tests/test_io.py::test_f2p tests/test_io.py::test_io"
+        assert result.skipped_tests == [PASS_TO_PASS[0], PASS_TO_PASS[1], PASS_TO_PASS[3]]
+        assert result.test_durations == {"tests/test_io.py::test_io": 0.5}
@@ -13,6 +13,18 @@ from sweflow_bench.utils.data import (
     load_eval_instances,
 )
 
+DATASET_ROW = {
+    "instance_id": "test-001",
+    "repo": "test-repo",
+    "problem_statement": "Fix the bug",
+    "base_commit": "abc123",
+    "reference_commit": "def456",
+    "patch": "gold-patch",
+    "docker_image": "test-image:latest",
+    "FAIL_TO_PASS": ["test_fail_to_pass"],
+    "PASS_TO_PASS": ["test_pass_to_pass"],
+}
+
 
 class TestPrediction:
 
@@ -91,6 +103,20 @@ class TestSWEFlowTestInstance:
         expected_script = "python -m pytest -v "
         assert eval_script == expected_script
 
+    def test_get_eval_script_subset(self):
+        instance = SWEFlowTestInstance(instance_id="test-001",
+                                       repo="test-repo",
+                                       problem_statement="Fix the bug",
+                                       base_commit="abc123",
+                                       reference_commit="def456",
+                                       patch="",
+                                       docker_image="test-image:latest",
+                                       FAIL_TO_PASS=["test_fail_to_pass"],
+                                       PASS_TO_PASS=["test_pass_to_pass", "test_other"],
+                                       model="test-model")
+        assert instance.get_eval_script(["test_other"]) == "python -m pytest -v test_other"
+        assert instance.get_eval_script(["test_other"], fail_fast=True) == "python -m pytest -v -x test_other"
+
 
 class TestLoadDataset:
 
@@ -121,6 +147,44 @@ class TestLoadDataset:
         assert result["test-001"].repo == "test-repo"
 
 
+class TestCompactInstances:
+
+    @patch('sweflow_bench.utils.data.load_dataset')
+    def test_lazy_fields_are_left_out(self, mock_load_dataset):
+        rows = [dict(DATASET_ROW), dict(DATASET_ROW, instance_id="test-002")]
+        # strings equal to, but not the same object as, those of the first row
+        rows[1]["repo"] = "".join(["test-", "repo"])
+        rows[1]["PASS_TO_PASS"] = ["".join(["test_pass_", "to_pass"])]
+        mock_load_dataset.return_value = rows
+
+        result = _load_dataset("test-dataset", "train")
+
+        assert result["test-001"].problem_statement is None
+        assert result["test-001"].patch is None
+        assert result["test-001"].dataset_path.endswith("test-dataset.jsonl")
+        assert result["test-001"].repo is result["test-002"].repo
+        assert result["test-001"].PASS_TO_PASS[0] is result["test-002"].PASS_TO_PASS[0]
+
+        # gold predictions need the gold patches
+        result = _load_dataset("test-dataset", "train", lazy_fields=["problem_statement"])
+        assert result["test-001"].patch == "gold-patch"
+
+    def test_load_field(self):
+        with tempfile.TemporaryDirectory() as temp_dir:
+            dataset_path = Path(temp_dir) / "dataset.jsonl"
+            with open(dataset_path, "w") as f:
+                f.write(json.dumps(dict(DATASET_ROW, instance_id="test-000", problem_statement="Other bug")) + "\n\n")
+                f.write(json.dumps(DATASET_ROW) + "\n")
+
+            row = {name: value for name, value in DATASET_ROW.items() if name not in ["problem_statement", "patch"]}
+            instance = SWEFlowTestInstance(**row, patch="predicted-patch", model="test-model", dataset_path=str(dataset_path))
+
+            assert instance.problem_statement is None
+            assert instance.load_field("problem_statement") == "Fix the bug"
+            # fields that were loaded are not read again
+            assert instance.load_field("patch") == "predicted-patch"
+
+
 class TestLoadPredictions:
 
     def test_load_predictions_gold(self):
@@ -0,0 +1,187 @@
+import time
+import pytest
+import tempfile
+import threading
+from types import SimpleNamespace
+from contextlib import ExitStack
+from unittest.mock import patch
+
+from conftest import make_instance
+from sweflow_bench.utils.docker import DockerError, start_docker_container
+from sweflow_bench.utils.docker_hosts import DockerHost, DockerHostPool, parse_docker_host
+from sweflow_bench.utils.run_evaluation import run_evaluation
+
+
+class FakeDockerDaemons:
+    """
+    Fake daemons at several base URLs, recording the containers running on each of them.
+    """
+
+    def __init__(self, failing=(), unreachable=(), latency: float = 0.01):
+        self.failing = set(failing)
+        # hosts actually connected to, with nothing listening
+        self.unreachable = set(unreachable)
+        self.latency = latency
+        self.lock = threading.Lock()
+        self.running = {}
+        self.max_running = {}
+        self.started = {}
+
+    def start_docker_container(self, image_name: str, container_name: str, base_url: str | None = None):
+        if base_url in self.failing:
+            raise DockerError(f"Error starting container: {base_url} is down")
+        if base_url in self.unreachable:
+            return start_docker_container(image_name, container_name, base_url)
+        with self.lock:
+            self.running[base_url] = self.running.get(base_url, 0) + 1
+            self.max_running[base_url] = max(self.max_running.get(base_url, 0), self.running[base_url])
+            self.started[base_url] = self.started.get(base_url, 0) + 1
+        return SimpleNamespace(name=container_name, base_url=base_url)
+
+    def exec_command_in_container(self, container, command: str, timeout: int | None = None, workdir: str | None = None):
+        time.sleep(self.latency)
+        return 0, ""
+
+    def copy_file_to_container(self, container, local_path: str, container_path: str, base_url: str | None = None):
+        assert base_url == container.base_url
+
+    def stop_docker_container(self, container):
+        pass
+
+    def remove_docker_container(self, container):
+        with self.lock:
+            self.running[container.base_url] -= 1
+
+    def install(self, stack: ExitStack):
+        for name in ["start_docker_container", "exec_command_in_container", "copy_file_to_container", "stop_docker_container", "remove_docker_container"]:
+            stack.enter_context(patch(f"sweflow_bench.utils.runtime.{name}", getattr(self, name)))
+
+
+class TestParseDockerHost:
+
+    def test_parse(self):
+        assert parse_docker_host("ssh://user@host") == DockerHost(base_url="ssh://user@host", slots=1)
+        assert parse_docker_host("tcp://host:2376=8") == DockerHost(base_url="tcp://host:2376", slots=8)
+
+    @pytest.mark.parametrize("value", ["", "=4", "tcp://host:2376=0", "tcp://host:2376=many"])
+    def test_invalid(self, value):
+        with pytest.raises(ValueError):
+            parse_docker_host(value)
+
+
+class TestDockerHostPool:
+
+    def test_least_loaded_placement(self):
+        pool = DockerHostPool([DockerHost(base_url="a", slots=1), DockerHost(base_url="b", slots=3)])
+
+        hosts = [pool.acquire().base_url for _ in range(4)]
+
+        # each host is filled in proportion to its slots
+        assert hosts == ["a", "b", "b", "b"]
+
+    def test_acquire_waits_for_free_slot(self):
+        pool = DockerHostPool([DockerHost(base_url="a")])
+        host = pool.acquire()
+        threading.Timer(0.05, pool.release, args=(host,)).start()
+
+        assert pool.acquire().base_url == "a"
+
+    def test_unhealthy_after_consecutive_errors(self):
+        pool = DockerHostPool([DockerHost(base_url="a"), DockerHost(base_url="b")], max_errors=2)
+        pool.release(pool.acquire(exclude={"b"}), failed=True)
+        # a success resets the count
+        pool.release(pool.acquire(exclude={"b"}))
+        pool.release(pool.acquire(exclude={"b"}), failed=True)
+        assert pool.unhealthy == set()
+        pool.release(pool.acquire(exclude={"b"}), failed=True)
+        assert pool.unhealthy == {"a"}
+
+        assert pool.acquire().base_url == "b"
+        with pytest.raises(DockerError):
+            pool.acquire(exclude={"b"})
+
+    def test_run_moves_to_another_host(self):
+        pool = DockerHostPool([DockerHost(base_url="a"), DockerHost(base_url="b")])
+
+        def fn(host: DockerHost) -> str:
+            if host.base_url == "a":
+                raise DockerError("daemon hiccup")
+            return host.base_url
+
+        assert pool.run(fn) == "b"
+        assert pool.errors == {"a": 1, "b": 0}
+        assert pool.in_use == {"a": 0, "b": 0}
+
+    def test_run_fails_on_every_host(self):
+        pool = DockerHostPool([DockerHost(base_url="a"), DockerHost(base_url="b")])
+
+        def fn(host: DockerHost):
+            raise DockerError("image not found")
+
+        with pytest.raises(DockerError):
+            pool.run(fn)
+        assert pool.in_use == {"a": 0, "b": 0}
+
+
+class TestRunEvaluationDockerHosts:
+
+    def test_spread_across_hosts(self):
+        daemons = FakeDockerDaemons()
+        hosts = [DockerHost(base_url="tcp://a:2376", slots=2), DockerHost(base_url="tcp://b:2376", slots=2)]
+        instances = [make_instance(f"test-{i:03d}") for i in range(12)]
+
+        with tempfile.TemporaryDirectory() as temp_dir, ExitStack() as stack:
+            daemons.install(stack)
+            results = run_evaluation(instances, temp_dir, docker_hosts=hosts)
+
+        # results are in the order of the instances
+        assert [result.instance_id for result in results] == [instance.instance_id for instance in instances]
+        assert all(result.resolved for result in results)
+        assert sum(daemons.started.values()) == 12
+        assert set(daemons.started) == {"tcp://a:2376", "tcp://b:2376"}
+        # never more containers than slots on a host
+        assert max(daemons.max_running.values()) <= 2
+
+    def test_unhealthy_host_is_not_used(self):
+        daemons = FakeDockerDaemons(failing={"tcp://a:2376"})
+        hosts = [DockerHost(base_url="tcp://a:2376"), DockerHost(base_url="tcp://b:2376")]
+        instances = [make_instance(f"test-{i:03d}") for i in range(6)]
+
+        with tempfile.TemporaryDirectory() as temp_dir, ExitStack() as stack:
+            daemons.install(stack)
+            results = run_evaluation(instances, temp_dir, docker_hosts=hosts, docker_host_max_errors=2)
+
+        assert all(result.resolved for result in results)
+        assert daemons.started == {"tcp://b:2376": 6}
+
+    def test_no_healthy_host_left(self):
+        daemons = FakeDockerDaemons(failing={"tcp://a:2376", "tcp://b:2376"})
+        hosts = [DockerHost(base_url="tcp://a:2376"), DockerHost(base_url="tcp://b:2376")]
+        instances = [make_instance(f"test-{i:03d}") for i in range(4)]
+
+        with tempfile.TemporaryDirectory() as temp_dir, ExitStack() as stack:
+            daemons.install(stack)
+            stack.enter_context(patch("sweflow_bench.utils.retry.time.sleep"))
+            results = run_evaluation(instances, temp_dir, docker_hosts=hosts, docker_host_max_errors=1)
+
+        # every instance gets a result, even after all hosts became unhealthy
+        assert [result.instance_id for result in results] == [instance.instance_id for instance in instances]
+        assert all(result.stage == "infrastructure" and not result.resolved for result in results)
+
+    def test_unreachable_host(self):
+        daemons = FakeDockerDaemons(unreachable={"tcp://127.0.0.1:1"})
+        hosts = [DockerHost(base_url="tcp://127.0.0.1:1"), DockerHost(base_url="tcp://b:2376")]
+        instances = [make_instance(f"test-{i:03d}") for i in range(4)]
+
+        with tempfile.TemporaryDirectory() as temp_dir, ExitStack() as stack:
+            daemons.install(stack)
+            results = run_evaluation(instances, temp_dir, docker_hosts=hosts, docker_host_max_errors=1)
+
+        # instances placed on the unreachable host move to the other one
+        assert all(result.resolved for result in results)
+        assert daemons.started == {"tcp://b:2376": 4}
+
+    def test_docker_hosts_require_docker_runtime(self):
+        with tempfile.TemporaryDirectory() as temp_dir:
+            with pytest.raises(ValueError):
+                run_evaluation([], temp_dir, runtime_backend="local", docker_hosts=[DockerHost(base_url="tcp://a:2376")])
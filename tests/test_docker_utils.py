@@ -1,5 +1,6 @@
 import pytest
 import docker
+import requests
 import subprocess
 
 from unittest.mock import patch, MagicMock
@@ -72,6 +73,20 @@ def test_exec_command_in_container_error():
         docker_utils.exec_command_in_container(container, "echo hello")
 
 
+def test_exec_command_in_container_connection_error():
+    container = MagicMock(spec=Container)
+    container.exec_run.side_effect = requests.exceptions.ConnectionError("connection reset")
+    with pytest.raises(docker_utils.DockerError):
+        docker_utils.exec_command_in_container(container, "echo hello")
+
+
+def test_start_docker_container_unreachable_host():
+    docker_utils._get_remote_docker_client.cache_clear()
+    # nothing listens on port 1, so the client fails to connect
+    with pytest.raises(docker_utils.DockerError, match="Error starting container"):
+        docker_utils.start_docker_container("test-image", "test-container", base_url="tcp://127.0.0.1:1")
+
+
 @patch("subprocess.run")
 def test_copy_file_to_container_success(mock_run):
     mock_run.return_value = MagicMock()
@@ -106,3 +121,53 @@ def test_read_file_from_container_error(mock_run):
     container.id = "test-container-id"
     with pytest.raises(docker_utils.DockerError):
         docker_utils.read_file_from_container(container, "/b")
+
+
+def test_create_docker_container_success():
+    with patch.object(docker_utils, "get_docker_client") as mock_client:
+        mock_container = MagicMock(spec=Container)
+        mock_client.return_value.containers.create.return_value = mock_container
+        result = docker_utils.create_docker_container("busybox", "test")
+        assert result == mock_container
+
+
+def test_create_docker_container_error():
+    with patch.object(docker_utils, "get_docker_client") as mock_client:
+        mock_client.return_value.containers.create.side_effect = docker.errors.APIError("fail")
+        with pytest.raises(docker_utils.DockerError):
+            docker_utils.create_docker_container("busybox", "test")
+
+
+@patch("subprocess.run")
+def test_copy_file_from_container_success(mock_run):
+    container = MagicMock(spec=Container)
+    container.id = "test-container-id"
+    docker_utils.copy_file_from_container(container, "/testbed", "/tmp/testbed")
+    assert mock_run.call_args.args[0] == ["docker", "cp", "test-container-id:/testbed", "/tmp/testbed"]
+
+
+@patch("subprocess.run")
+def test_copy_file_from_container_error(mock_run):
+    mock_run.side_effect = subprocess.CalledProcessError(1, "docker cp", stderr="fail")
+    container = MagicMock(spec=Container)
+    container.id = "test-container-id"
+    with pytest.raises(docker_utils.DockerError):
+        docker_utils.copy_file_from_container(container, "/testbed", "/tmp/testbed")
+
+
+@patch("subprocess.run")
+def test_copy_file_to_container_remote_host(mock_run):
+    container = MagicMock(spec=Container)
+    container.id = "test-container-id"
+    docker_utils.copy_file_to_container(container, "/tmp/a", "/b", base_url="ssh://user@host")
+    assert mock_run.call_args.args[0] == ["docker", "-H", "ssh://user@host", "cp", "/tmp/a", "test-container-id:/b"]
+
+
+def test_get_docker_client_remote_host():
+    with patch.object(docker, "DockerClient") as mock_client:
+        docker_utils._get_remote_docker_client.cache_clear()
+        client = docker_utils.get_docker_client("tcp://host:2376")
+        # clients of remote hosts are reused
+        assert docker_utils.get_docker_client("tcp://host:2376") is client
+        mock_client.assert_called_once_with(base_url="tcp://host:2376")
+        docker_utils._get_remote_docker_client.cache_clear()
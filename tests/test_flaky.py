@@ -0,0 +1,139 @@
+import tempfile
+from pathlib import Path
+from unittest.mock import MagicMock
+from functools import partial
+
+from conftest import make_instance as make_test_instance
+from sweflow_bench.utils.flaky import (
+    RerunPolicy,
+    FlakyTestDatabase,
+    parse_test_statuses,
+    get_failed_tests,
+)
+from sweflow_bench.utils.runtime import Runtime
+from sweflow_bench.utils.run_evaluation import evaluate_instance
+
+PYTEST_OUTPUT = """============================= test session starts ==============================
+collecting ... collected 4 items
+
+tests/test_a.py::test_pass PASSED                                        [ 25%]
+tests/test_a.py::TestB::test_fail FAILED                                 [ 50%]
+tests/test_a.py::test_param[a b] PASSED                                  [ 75%]
+tests/test_a.py::test_param[a b] ERROR                                   [ 75%]
+tests/test_a.py::test_skip SKIPPED (reason)                              [100%]
+
+=========================== short test summary info ============================
+FAILED tests/test_a.py::TestB::test_fail - AssertionError: assert 1 == 2
+ERROR tests/test_a.py::test_param[a b] - RuntimeError: teardown
+==================== 1 failed, 2 passed, 1 skipped, 1 error in 0.12s ===================
+"""
+
+
+make_instance = partial(
+    make_test_instance,
+    repo="org/repo",
+    FAIL_TO_PASS=["tests/test_a.py::test_f2p"],
+    PASS_TO_PASS=["tests/test_a.py::test_p2p_1", "tests/test_a.py::test_p2p_2"],
+)
+
+
+def pytest_output(statuses: dict) -> str:
+    return "".join(f"{test_id} {status} [ 50%]\n" for test_id, status in statuses.items())
+
+
+def make_runtime(*exec_results) -> MagicMock:
+    runtime = MagicMock(spec=Runtime)
+    # apply, then the eval script and reruns
+    runtime.exec.side_effect = [(0, "")] + list(exec_results)
+    return runtime
+
+
+class TestParseTestStatuses:
+
+    def test_statuses(self):
+        assert parse_test_statuses(PYTEST_OUTPUT) == {
+            "tests/test_a.py::test_pass": "PASSED",
+            "tests/test_a.py::TestB::test_fail": "FAILED",
+            "tests/test_a.py::test_param[a b]": "ERROR",
+        }
+
+    def test_failed_tests(self):
+        assert get_failed_tests(parse_test_statuses(PYTEST_OUTPUT)) == ["tests/test_a.py::TestB::test_fail", "tests/test_a.py::test_param[a b]"]
+
+
+class TestFlakyTestDatabase:
+
+    def test_record(self):
+        with tempfile.TemporaryDirectory() as temp_dir:
+            db = FlakyTestDatabase(str(Path(temp_dir) / "flaky.db"))
+            db.record("org/repo", ["test_a", "test_b"], ["test_b"])
+            db.record("org/repo", ["test_a", "test_b"], [])
+            db.record("org/other", ["test_b"], ["test_b"])
+
+            assert db.get_stats("org/repo", "test_a") == {"runs": 2, "flaky_runs": 0}
+            assert db.get_stats("org/repo", "test_b") == {"runs": 2, "flaky_runs": 1}
+            assert db.get_stats("org/repo", "test_c") == {"runs": 0, "flaky_runs": 0}
+            assert db.get_flaky_tests("org/repo") == {"test_b"}
+            assert db.get_flaky_tests("org/repo", min_flaky_runs=2) == set()
+
+            # persisted
+            assert FlakyTestDatabase(str(Path(temp_dir) / "flaky.db")).get_flaky_tests("org/other") == {"test_b"}
+
+
+class TestEvaluateInstanceReruns:
+
+    def test_flaky_test_passes_on_rerun(self):
+        instance = make_instance()
+        runtime = make_runtime(
+            (1, pytest_output({"tests/test_a.py::test_f2p": "PASSED", "tests/test_a.py::test_p2p_1": "FAILED", "tests/test_a.py::test_p2p_2": "PASSED"})),
+            (1, pytest_output({"tests/test_a.py::test_p2p_1": "FAILED"})),
+            (0, pytest_output({"tests/test_a.py::test_p2p_1": "PASSED"})),
+        )
+        with tempfile.TemporaryDirectory() as temp_dir:
+            db = FlakyTestDatabase(str(Path(temp_dir) / "flaky.db"))
+            result = evaluate_instance(instance, runtime=runtime, prepared=True, rerun_policy=RerunPolicy(max_reruns=3), flaky_db=db)
+
+            assert db.get_stats("org/repo", "tests/test_a.py::test_p2p_1") == {"runs": 1, "flaky_runs": 1}
+            assert db.get_stats("org/repo", "tests/test_a.py::test_f2p") == {"runs": 1, "flaky_runs": 0}
+
+        assert result.resolved is True
+        assert result.exit_code == 0
+        assert result.reruns == 2
+        assert result.flaky_tests == ["tests/test_a.py::test_p2p_1"]
+        assert "rerun 2 of 1 failed tests" in result.test_log
+        assert "rerun" in result.durations
+        # only the failed test is rerun
+        assert runtime.exec.call_args_list[2].args[0] == "python -m pytest -v tests/test_a.py::test_p2p_1"
+
+    def test_still_failing_after_reruns(self):
+        failed = pytest_output({"tests/test_a.py::test_f2p": "FAILED"})
+        runtime = make_runtime((1, failed), (1, failed), (1, failed))
+
+        result = evaluate_instance(make_instance(), runtime=runtime, prepared=True, rerun_policy=RerunPolicy(max_reruns=2))
+
+        assert result.resolved is False
+        assert result.exit_code == 1
+        assert result.reruns == 2
+        assert result.flaky_tests == []
+
+    def test_no_rerun_for_many_failures(self):
+        failed = pytest_output({f"tests/test_a.py::test_{i}": "FAILED" for i in range(3)})
+        runtime = make_runtime((1, failed))
+
+        result = evaluate_instance(make_instance(), runtime=runtime, prepared=True, rerun_policy=RerunPolicy(max_reruns=2, max_failed_tests=2))
+
+        assert result.resolved is False
+        assert result.reruns == 0
+        assert runtime.exec.call_count == 2
+
+    def test_skip_known_flaky(self):
+        runtime = make_runtime((0, ""))
+        with tempfile.TemporaryDirectory() as temp_dir:
+            db = FlakyTestDatabase(str(Path(temp_dir) / "flaky.db"))
+            # FAIL_TO_PASS tests are never deselected
+            db.record("org/repo", [], ["tests/test_a.py::test_p2p_2", "tests/test_a.py::test_f2p"])
+
+            result = evaluate_instance(make_instance(), runtime=runtime, prepared=True, rerun_policy=RerunPolicy(skip_known_flaky=True, min_flaky_runs=1), flaky_db=db)
+
+        assert result.deselected_tests == ["tests/test_a.py::test_p2p_2"]
+        assert runtime.exec.call_args_list[1].args[0] == "python -m pytest -v tests/test_a.py::test_f2p tests/test_a.py::test_p2p_1"
@@ -0,0 +1,34 @@
+import sys
+import json
+import subprocess
+
+# heavy dependencies that must only be imported when used
+HEAVY_MODULES = ["datasets", "docker", "pandas", "pyarrow"]
+
+
+def get_imported_modules(code: str):
+    output = subprocess.run(
+        [sys.executable, "-c", f"import sys, json\n{code}\nprint(json.dumps(sorted(sys.modules)))"],
+        check=True,
+        stdout=subprocess.PIPE,
+        text=True,
+    ).stdout
+    return set(json.loads(output.splitlines()[-1]))
+
+
+class TestLazyImports:
+
+    def test_cli_does_not_import_heavy_modules(self):
+        modules = get_imported_modules("import sweflow_bench.main")
+        assert [module for module in HEAVY_MODULES if module in modules] == []
+
+    def test_load_local_dataset_without_datasets(self, tmp_path):
+        data_file = tmp_path / "dataset.jsonl"
+        data_file.write_text(json.dumps({"instance_id": "test-001"}) + "\n\n")
+        # a None entry in sys.modules makes the import fail
+        modules = get_imported_modules(
+            "sys.modules['datasets'] = None\n"
+            "from sweflow_bench.utils.data import load_dataset\n"
+            f"assert list(load_dataset('json', data_files=[{str(data_file)!r}], split='train')) == [{{'instance_id': 'test-001'}}]"
+        )
+        assert "docker" not in modules
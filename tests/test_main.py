@@ -0,0 +1,21 @@
+import pytest
+from unittest.mock import patch
+
+from sweflow_bench.main import parse_args
+
+RUN_ARGS = ["sweflow-bench-run", "--dataset", "test", "--split", "test", "--prediction-path", "predictions.jsonl", "--output-dir", "output"]
+
+
+class TestParseArgs:
+
+    def test_coordinator_args(self):
+        with patch("sys.argv", RUN_ARGS + ["--queue-dir", "queue", "--metrics-port", "9000"]):
+            args = parse_args()
+        assert args.queue_dir == "queue"
+        assert args.metrics_port == 9000
+
+    def test_coordinator_rejects_evaluation_args(self, capsys):
+        with patch("sys.argv", RUN_ARGS + ["--queue-dir", "queue", "--output-format", "compact", "--runtime", "local", "--local-testbed-dir", "testbeds"]):
+            with pytest.raises(SystemExit):
+                parse_args()
+        assert "--runtime, --local-testbed-dir, --output-format cannot be used with --queue-dir" in capsys.readouterr().err
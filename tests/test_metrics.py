@@ -0,0 +1,118 @@
+import pytest
+import urllib.request
+import urllib.error
+from unittest.mock import patch, MagicMock
+
+from sweflow_bench.utils.docker import DockerError
+from sweflow_bench.utils.runtime import DockerRuntime
+from sweflow_bench.utils.metrics import (
+    Counter,
+    Gauge,
+    Histogram,
+    MetricsRegistry,
+    DOCKER_ERRORS_TOTAL,
+    CONTAINER_START_SECONDS,
+    EXEC_SECONDS,
+    start_metrics_server,
+)
+
+
+@pytest.fixture
+def registry():
+    registry = MetricsRegistry()
+    server = start_metrics_server(0, registry=registry)
+    yield registry, f"http://127.0.0.1:{server.server_address[1]}"
+    server.shutdown()
+    server.server_close()
+
+
+def scrape(url):
+    with urllib.request.urlopen(f"{url}/metrics") as response:
+        assert response.headers["Content-Type"].startswith("text/plain")
+        return response.read().decode("utf-8")
+
+
+class TestMetrics:
+
+    def test_counter(self):
+        counter = Counter("test_total", "Test counter.", ["operation"])
+        counter.inc(operation="exec")
+        counter.inc(2, operation="exec")
+        assert counter.get(operation="exec") == 3
+        assert counter.render() == ["# HELP test_total Test counter.", "# TYPE test_total counter", 'test_total{operation="exec"} 3']
+
+    def test_counter_wrong_labels(self):
+        counter = Counter("test_total", "Test counter.", ["operation"])
+        with pytest.raises(ValueError):
+            counter.inc(phase="eval")
+
+    def test_gauge(self):
+        gauge = Gauge("test_depth", "Test gauge.")
+        gauge.set(5)
+        gauge.set(3)
+        assert gauge.render()[-1] == "test_depth 3"
+
+    def test_histogram(self):
+        histogram = Histogram("test_seconds", "Test histogram.", ["phase"], buckets=[1.0, 10.0])
+        histogram.observe(0.5, phase="eval")
+        histogram.observe(5.0, phase="eval")
+        histogram.observe(50.0, phase="eval")
+        assert histogram.render()[2:] == [
+            'test_seconds_bucket{phase="eval",le="1"} 1',
+            'test_seconds_bucket{phase="eval",le="10"} 2',
+            'test_seconds_bucket{phase="eval",le="+Inf"} 3',
+            'test_seconds_sum{phase="eval"} 55.5',
+            'test_seconds_count{phase="eval"} 3',
+        ]
+
+    def test_label_escaping(self):
+        counter = Counter("test_total", "Test counter.", ["stage"])
+        counter.inc(stage='a"b\\c\nd')
+        assert counter.render()[-1] == 'test_total{stage="a\\"b\\\\c\\nd"} 1'
+
+
+class TestMetricsServer:
+
+    def test_scrape(self, registry):
+        registry, url = registry
+        counter = registry.register(Counter("test_total", "Test counter."))
+        counter.inc()
+        assert "test_total 1" in scrape(url)
+        counter.inc()
+        assert "test_total 2" in scrape(url)
+
+    def test_not_found(self, registry):
+        _, url = registry
+        with pytest.raises(urllib.error.HTTPError) as exc_info:
+            urllib.request.urlopen(f"{url}/other")
+        assert exc_info.value.code == 404
+
+
+class TestDockerRuntimeMetrics:
+
+    @patch('sweflow_bench.utils.runtime.exec_command_in_container')
+    @patch('sweflow_bench.utils.runtime.start_docker_container')
+    def test_latencies(self, mock_start, mock_exec):
+        mock_exec.return_value = (0, "")
+        starts = CONTAINER_START_SECONDS.get_count()
+        execs = EXEC_SECONDS.get_count()
+
+        runtime = DockerRuntime("test-image:latest", "test-container")
+        runtime.start()
+        runtime.exec("echo hello")
+        runtime.exec("echo hello")
+
+        assert CONTAINER_START_SECONDS.get_count() == starts + 1
+        assert EXEC_SECONDS.get_count() == execs + 2
+
+    @patch('sweflow_bench.utils.runtime.exec_command_in_container')
+    def test_docker_errors(self, mock_exec):
+        mock_exec.side_effect = DockerError("fail")
+        errors = DOCKER_ERRORS_TOTAL.get(operation="exec")
+
+        runtime = DockerRuntime("test-image:latest", "test-container")
+        runtime.container = MagicMock()
+        with pytest.raises(DockerError):
+            runtime.exec("echo hello")
+
+        assert DOCKER_ERRORS_TOTAL.get(operation="exec") == errors + 1
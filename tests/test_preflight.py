@@ -0,0 +1,109 @@
+import pytest
+import tempfile
+import subprocess
+from pathlib import Path
+from unittest.mock import patch
+
+from conftest import make_instance
+from sweflow_bench.utils.preflight import (
+    PatchError,
+    parse_patch,
+    preflight_check,
+    run_preflight,
+)
+from sweflow_bench.utils.docker import DockerError
+from sweflow_bench.utils.repo_cache import RepoCache
+
+VALID_PATCH = "diff --git a/test.py b/test.py\nindex 123..456 100644\n--- a/test.py\n+++ b/test.py\n@@ -1,2 +1,2 @@\n-print('hello')\n+print('world')\n print('bye')\n"
+
+
+def git(*args, cwd=None):
+    return subprocess.run(["git", *args], cwd=cwd, check=True, stdout=subprocess.PIPE, text=True).stdout.strip()
+
+
+@pytest.fixture
+def repo_cache():
+    with tempfile.TemporaryDirectory() as temp_dir:
+        work_dir = Path(temp_dir) / "work"
+        work_dir.mkdir()
+        git("init", "-q", cwd=work_dir)
+        (work_dir / "test.py").write_text("print('hello')\nprint('bye')\n")
+        git("add", "test.py", cwd=work_dir)
+        git("-c", "user.name=test", "-c", "user.email=test@example.com", "commit", "-qm", "init", cwd=work_dir)
+        repo_cache = RepoCache(str(Path(temp_dir) / "cache"))
+        repo_cache.populate_from_directory("org/test-repo", str(work_dir))
+        yield repo_cache, git("rev-parse", "HEAD", cwd=work_dir)
+
+
+class TestParsePatch:
+
+    def test_valid_patch(self):
+        assert parse_patch(VALID_PATCH) == ["test.py"]
+
+    def test_plain_unified_diff(self):
+        patch = "--- test.py\n+++ test.py\n@@ -1 +1 @@\n-print('hello')\n+print('world')\n"
+        assert parse_patch(patch) == ["test.py"]
+
+    def test_deleted_file(self):
+        patch = "--- a/test.py\n+++ /dev/null\n@@ -1 +0,0 @@\n-print('hello')\n"
+        assert parse_patch(patch) == ["test.py"]
+
+    def test_empty_patch(self):
+        with pytest.raises(PatchError, match="empty"):
+            parse_patch("  \n")
+
+    def test_no_file_diffs(self):
+        with pytest.raises(PatchError, match="no file diffs"):
+            parse_patch("I could not fix this issue.")
+
+    def test_truncated_hunk(self):
+        with pytest.raises(PatchError, match="Corrupt hunk"):
+            parse_patch(VALID_PATCH.rsplit("\n", 2)[0])
+
+    def test_malformed_hunk_header(self):
+        with pytest.raises(PatchError, match="Malformed hunk header"):
+            parse_patch("--- a/test.py\n+++ b/test.py\n@@ -1,2 @@\n-print('hello')\n")
+
+
+class TestPreflight:
+
+    def test_preflight_check_without_repo(self):
+        assert preflight_check(make_instance(patch=VALID_PATCH)) is None
+        assert preflight_check(make_instance(patch="")).startswith("Pre-flight check failed")
+
+    def test_preflight_check_with_repo(self, repo_cache):
+        repo_cache, base_commit = repo_cache
+        patch = VALID_PATCH.replace("print('bye')", "print('later')")
+        assert preflight_check(make_instance(patch=VALID_PATCH, repo="org/test-repo", base_commit=base_commit), repo_cache) is None
+        assert "does not apply" in preflight_check(make_instance(patch=patch, repo="org/test-repo", base_commit=base_commit), repo_cache)
+        # repos without a cached clone are only parsed
+        assert preflight_check(make_instance(patch=patch, repo="org/other-repo"), repo_cache) is None
+
+    @patch.object(RepoCache, "populate_from_image")
+    def test_preflight_check_populate(self, mock_populate, repo_cache):
+        repo_cache, base_commit = repo_cache
+        preflight_check(make_instance(patch=VALID_PATCH, repo="org/test-repo", base_commit=base_commit), repo_cache, populate=True)
+        mock_populate.assert_not_called()
+        preflight_check(make_instance(patch=VALID_PATCH, repo="org/other-repo"), repo_cache, populate=True)
+        mock_populate.assert_called_once_with("org/other-repo", "test-image:latest")
+
+    @patch.object(RepoCache, "populate_from_image", side_effect=DockerError("Error getting image: not found"))
+    def test_run_preflight_populate_failure(self, mock_populate, repo_cache):
+        repo_cache, _ = repo_cache
+        instances = [
+            make_instance(patch=VALID_PATCH, instance_id="test-001", repo="org/missing-repo"),
+            make_instance(patch=VALID_PATCH, instance_id="test-002", repo="org/missing-repo"),
+            make_instance(patch="", instance_id="test-003", repo="org/missing-repo"),
+        ]
+        # patches of repos that cannot be populated are only parsed
+        failures = run_preflight(instances, repo_cache, max_workers=1, populate=True)
+        assert list(failures) == ["test-003"]
+        mock_populate.assert_called_once()
+
+    def test_run_preflight(self):
+        instances = [
+            make_instance(patch=VALID_PATCH, instance_id="test-001"),
+            make_instance(patch="", instance_id="test-002"),
+        ]
+        failures = run_preflight(instances)
+        assert list(failures) == ["test-002"]
@@ -0,0 +1,104 @@
+import pstats
+import subprocess
+import tempfile
+import threading
+from pathlib import Path
+from unittest.mock import MagicMock, patch
+
+from sweflow_bench.utils.profiling import (
+    TIME_MARKER,
+    ProfiledRuntime,
+    wrap_with_time,
+    parse_time_output,
+    profile_orchestrator,
+)
+
+
+def run_bash(command: str):
+    return subprocess.run(["bash", "-c", command], stdout=subprocess.PIPE, stderr=subprocess.STDOUT, text=True)
+
+
+class TestWrapWithTime:
+
+    def test_time_output(self):
+        result = run_bash(wrap_with_time("echo hello; exit 3"))
+        assert result.returncode == 3
+
+        output, times = parse_time_output(result.stdout)
+        assert output == "hello\n"
+        assert set(times) == {"real", "user", "sys"}
+        assert times["real"] >= 0
+
+    def test_quoting(self):
+        result = run_bash(wrap_with_time('echo "a b" \'$HOME\' \\`x\\`'))
+        output, _ = parse_time_output(result.stdout)
+        assert output == "a b $HOME `x`\n"
+
+    def test_wrapped_with_timeout(self):
+        result = run_bash(f"timeout 10s {wrap_with_time('echo hello')}")
+        assert parse_time_output(result.stdout)[0] == "hello\n"
+
+
+class TestParseTimeOutput:
+
+    def test_without_time_output(self):
+        assert parse_time_output("killed\n") == ("killed\n", None)
+
+    def test_last_marker_counts(self):
+        output = f"{TIME_MARKER}9.00,0.00,0.00\nlog\n{TIME_MARKER}1.50,1.00,0.25\n"
+        assert parse_time_output(output) == (f"{TIME_MARKER}9.00,0.00,0.00\nlog\n", {"real": 1.5, "user": 1.0, "sys": 0.25})
+
+
+class TestProfiledRuntime:
+
+    def test_records_operations(self):
+        runtime = MagicMock()
+        runtime.exec.return_value = (1, "output")
+        profiled = ProfiledRuntime(runtime)
+
+        profiled.start()
+        assert profiled.exec("git apply /tmp/patch.diff", timeout=60, workdir="/workspace") == (1, "output")
+        profiled.put_file("/local/patch.diff", "/tmp/patch.diff")
+        profiled.commit("repository", "tag")
+        profiled.teardown()
+
+        runtime.exec.assert_called_once_with("git apply /tmp/patch.diff", timeout=60, workdir="/workspace")
+        runtime.commit.assert_called_once_with("repository", "tag")
+        runtime.teardown.assert_called_once()
+        assert profiled.profile.start_seconds is not None
+        assert profiled.profile.teardown_seconds is not None
+        assert [timing.command for timing in profiled.profile.execs] == ["git apply /tmp/patch.diff", "put_file /tmp/patch.diff"]
+        assert profiled.profile.execs[0].exit_code == 1
+
+
+class TestProfileOrchestrator:
+
+    def test_writes_stats(self):
+        with tempfile.TemporaryDirectory() as temp_dir:
+            with profile_orchestrator(temp_dir):
+                sum(range(1000))
+
+            assert (Path(temp_dir) / "profile.prof").stat().st_size > 0
+            assert "cumulative" in (Path(temp_dir) / "profile.txt").read_text()
+
+    def test_profiles_threads(self):
+        def work_in_thread():
+            return sum(range(1000))
+
+        with tempfile.TemporaryDirectory() as temp_dir:
+            with profile_orchestrator(temp_dir):
+                thread = threading.Thread(target=work_in_thread)
+                thread.start()
+                thread.join()
+
+            stats = pstats.Stats(str(Path(temp_dir) / "profile.prof"))
+            assert any(function == "work_in_thread" for _, _, function in stats.stats)
+
+    @patch('pstats.Stats.dump_stats', side_effect=OSError("disk full"))
+    def test_write_error_is_logged(self, mock_dump_stats):
+        with tempfile.TemporaryDirectory() as temp_dir:
+            with profile_orchestrator(temp_dir):
+                result = sum(range(1000))
+
+        assert result == 499500
+        mock_dump_stats.assert_called_once()
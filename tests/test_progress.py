@@ -0,0 +1,65 @@
+import json
+import tempfile
+from pathlib import Path
+from unittest.mock import patch
+
+from sweflow_bench.utils.progress import ProgressReporter
+
+
+class TestProgressReporter:
+
+    def test_counts(self):
+        progress = ProgressReporter(4)
+        progress.start("test-001")
+        progress.start("test-002")
+        progress.finish("test-001", resolved=True)
+        progress.start("test-003")
+        progress.finish("test-002", resolved=False, failed=True)
+
+        snapshot = progress.get_progress()
+        assert snapshot["total"] == 4
+        assert snapshot["completed"] == 2
+        assert snapshot["in_flight"] == 1
+        assert snapshot["pending"] == 1
+        assert snapshot["resolved"] == 1
+        assert snapshot["failed"] == 1
+        assert snapshot["resolve_rate"] == 0.5
+
+    def test_rate_and_eta(self):
+        with patch("sweflow_bench.utils.progress.time.time") as mock_time:
+            mock_time.return_value = 1000.0
+            progress = ProgressReporter(10, window=600.0)
+            for i in range(4):
+                mock_time.return_value = 1000.0 + 30.0 * (i + 1)
+                progress.finish(f"test-00{i}", resolved=True)
+
+            # 4 instances in 2 minutes, 6 remaining
+            snapshot = progress.get_progress()
+            assert snapshot["instances_per_minute"] == 2.0
+            assert snapshot["eta_seconds"] == 180.0
+
+            # only the rolling window counts
+            mock_time.return_value = 1000.0 + 30.0 + 601.0
+            snapshot = progress.get_progress()
+            assert snapshot["instances_per_minute"] == 0.3
+
+    def test_eta_unknown_without_finished_instances(self):
+        assert ProgressReporter(10).get_progress()["eta_seconds"] is None
+
+    def test_writes_progress_json(self):
+        with tempfile.TemporaryDirectory() as temp_dir:
+            progress = ProgressReporter(2, temp_dir, interval=3600.0)
+            progress.finish("test-001", resolved=True)
+            assert json.loads((Path(temp_dir) / "progress.json").read_text())["completed"] == 1
+
+            # throttled to one write per interval
+            progress.finish("test-002", resolved=True)
+            assert json.loads((Path(temp_dir) / "progress.json").read_text())["completed"] == 1
+
+            progress.report(force=True)
+            assert json.loads((Path(temp_dir) / "progress.json").read_text())["completed"] == 2
+            assert [path.name for path in Path(temp_dir).iterdir()] == ["progress.json"]
+
+    def test_write_failure_does_not_raise(self):
+        progress = ProgressReporter(1, "/nonexistent-output-dir")
+        progress.finish("test-001", resolved=True)
@@ -0,0 +1,132 @@
+import pytest
+import tempfile
+import subprocess
+from pathlib import Path
+from unittest.mock import patch, MagicMock
+
+from sweflow_bench.utils.repo_cache import (
+    RepoCache,
+    RepoCacheError,
+    check_patch_applies,
+)
+
+PATCH = "diff --git a/test.py b/test.py\nindex 123..456 100644\n--- a/test.py\n+++ b/test.py\n@@ -1,2 +1,2 @@\n-print('hello')\n+print('world')\n print('bye')\n"
+
+
+def git(*args, cwd=None):
+    return subprocess.run(["git", *args], cwd=cwd, check=True, stdout=subprocess.PIPE, text=True).stdout.strip()
+
+
+def commit(work_dir, content):
+    (work_dir / "test.py").write_text(content)
+    git("add", "test.py", cwd=work_dir)
+    git("-c", "user.name=test", "-c", "user.email=test@example.com", "commit", "-qm", "update", cwd=work_dir)
+    return git("rev-parse", "HEAD", cwd=work_dir)
+
+
+@pytest.fixture
+def source_repo():
+    with tempfile.TemporaryDirectory() as temp_dir:
+        work_dir = Path(temp_dir) / "work"
+        work_dir.mkdir()
+        git("init", "-q", cwd=work_dir)
+        base_commit = commit(work_dir, "print('hello')\nprint('bye')\n")
+        yield work_dir, base_commit
+
+
+@pytest.fixture
+def repo_cache():
+    with tempfile.TemporaryDirectory() as temp_dir:
+        yield RepoCache(temp_dir)
+
+
+class TestRepoCache:
+
+    def test_populate_from_directory(self, repo_cache, source_repo):
+        work_dir, base_commit = source_repo
+        assert not repo_cache.has_repo("org/test-repo")
+        git_dir = repo_cache.populate_from_directory("org/test-repo", str(work_dir))
+        assert git_dir == repo_cache.git_dir("org/test-repo")
+        assert git_dir.name == "org__test-repo.git"
+        assert repo_cache.has_commit("org/test-repo", base_commit)
+        assert not repo_cache.has_commit("org/test-repo", "0" * 40)
+        assert not repo_cache.has_commit("org/other-repo", base_commit)
+
+    def test_populate_fetches_new_commits(self, repo_cache, source_repo):
+        work_dir, _ = source_repo
+        repo_cache.populate_from_directory("org/test-repo", str(work_dir))
+        new_commit = commit(work_dir, "print('hi')\n")
+        assert not repo_cache.has_commit("org/test-repo", new_commit)
+        repo_cache.populate_from_directory("org/test-repo", str(work_dir))
+        assert repo_cache.has_commit("org/test-repo", new_commit)
+
+    def test_populate_from_invalid_directory(self, repo_cache):
+        with tempfile.TemporaryDirectory() as temp_dir:
+            with pytest.raises(RepoCacheError):
+                repo_cache.populate_from_directory("org/test-repo", temp_dir)
+        assert not repo_cache.has_repo("org/test-repo")
+
+    @patch("sweflow_bench.utils.repo_cache.remove_docker_container")
+    @patch("sweflow_bench.utils.repo_cache.copy_file_from_container")
+    @patch("sweflow_bench.utils.repo_cache.create_docker_container")
+    def test_ensure_populates_from_image_once(self, mock_create, mock_copy, mock_remove, repo_cache, source_repo):
+        work_dir, base_commit = source_repo
+        mock_container = MagicMock()
+        mock_create.return_value = mock_container
+        mock_copy.side_effect = lambda container, container_path, local_path: subprocess.run(["cp", "-r", str(work_dir / ".git"), local_path], check=True)
+
+        repo_cache.ensure("org/test-repo", "test-image:latest")
+        repo_cache.ensure("org/test-repo", "test-image:latest")
+
+        mock_create.assert_called_once()
+        assert mock_copy.call_args.args[1] == "/testbed/.git"
+        mock_remove.assert_called_once_with(mock_container)
+        assert repo_cache.has_commit("org/test-repo", base_commit)
+
+    def test_worktree(self, repo_cache, source_repo):
+        work_dir, base_commit = source_repo
+        commit(work_dir, "print('hi')\n")
+        repo_cache.populate_from_directory("org/test-repo", str(work_dir))
+        with repo_cache.worktree("org/test-repo", base_commit) as path:
+            assert (path / "test.py").read_text() == "print('hello')\nprint('bye')\n"
+        assert not path.exists()
+
+    def test_worktree_unknown_commit(self, repo_cache, source_repo):
+        work_dir, _ = source_repo
+        repo_cache.populate_from_directory("org/test-repo", str(work_dir))
+        with pytest.raises(RepoCacheError):
+            with repo_cache.worktree("org/test-repo", "0" * 40):
+                pass
+
+    def test_check_patch(self, repo_cache, source_repo):
+        work_dir, base_commit = source_repo
+        assert repo_cache.check_patch("org/test-repo", base_commit, PATCH)[0] is None
+        repo_cache.populate_from_directory("org/test-repo", str(work_dir))
+        assert repo_cache.check_patch("org/test-repo", base_commit, PATCH)[0] is True
+
+    def test_diff_stat(self, repo_cache, source_repo):
+        work_dir, _ = source_repo
+        repo_cache.populate_from_directory("org/test-repo", str(work_dir))
+        assert repo_cache.diff_stat("org/test-repo", PATCH) == [(1, 1, "test.py")]
+
+
+class TestCheckPatchApplies:
+
+    def test_applies(self, repo_cache, source_repo):
+        work_dir, base_commit = source_repo
+        git_dir = repo_cache.populate_from_directory("org/test-repo", str(work_dir))
+        applies, _ = check_patch_applies(str(git_dir), base_commit, PATCH)
+        assert applies is True
+
+    def test_does_not_apply(self, repo_cache, source_repo):
+        work_dir, base_commit = source_repo
+        git_dir = repo_cache.populate_from_directory("org/test-repo", str(work_dir))
+        applies, output = check_patch_applies(str(git_dir), base_commit, PATCH.replace("print('bye')", "print('later')"))
+        assert applies is False
+        assert "patch does not apply" in output
+
+    def test_unknown_commit(self, repo_cache, source_repo):
+        work_dir, _ = source_repo
+        git_dir = repo_cache.populate_from_directory("org/test-repo", str(work_dir))
+        applies, _ = check_patch_applies(str(git_dir), "0" * 40, PATCH)
+        assert applies is None
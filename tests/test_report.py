@@ -0,0 +1,155 @@
+import json
+import tempfile
+from pathlib import Path
+
+from sweflow_bench.utils.report import (
+    get_outcome,
+    strip_test_log,
+    iter_result_rows,
+    build_report,
+    format_report,
+)
+from sweflow_bench.utils.result_store import ResultStore
+from sweflow_bench.utils.run_evaluation import EvaluationResult
+
+
+def make_result(instance_id: str, model: str, repo: str = "org/repo", resolved: bool = False, exit_code: int = 1, stage: str | None = "eval") -> EvaluationResult:
+    return EvaluationResult(
+        instance_id=instance_id,
+        resolved=resolved,
+        exit_code=0 if resolved else exit_code,
+        test_log='FAILED "quoted" \\ log\n' * 10,
+        stage=stage,
+        model=model,
+        repo=repo,
+    )
+
+
+def write_results(path: Path, results):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path, "w") as f:
+        for result in results:
+            f.write(result.model_dump_json() + "\n")
+
+
+class TestGetOutcome:
+
+    def test_outcomes(self):
+        assert get_outcome({"resolved": True, "exit_code": 0, "stage": "eval"}) == "resolved"
+        assert get_outcome({"resolved": False, "exit_code": 1, "stage": "eval"}) == "test_failed"
+        assert get_outcome({"resolved": False, "exit_code": 124, "stage": "eval"}) == "timeout"
+        assert get_outcome({"resolved": False, "exit_code": 1, "stage": "apply"}) == "apply_failed"
+        assert get_outcome({"resolved": False, "exit_code": 1, "stage": "preflight"}) == "apply_failed"
+        assert get_outcome({"resolved": False, "exit_code": 128, "stage": "checkout"}) == "setup_failed"
+        assert get_outcome({"resolved": False, "exit_code": -1, "stage": "setup"}) == "setup_failed"
+
+    def test_rows_without_stage(self):
+        assert get_outcome({"resolved": False, "exit_code": 1}) == "test_failed"
+
+
+class TestStripTestLog:
+
+    def test_positions(self):
+        for row in [
+            {"test_log": 'a "quoted" \\ log\\', "instance_id": "test-001"},
+            {"instance_id": "test-001", "test_log": "log \\\"", "stage": "eval"},
+            {"instance_id": "test-001", "test_log": ""},
+        ]:
+            for line in [json.dumps(row), json.dumps(row, separators=(",", ":"))]:
+                assert json.loads(strip_test_log(line)) == {key: value for key, value in row.items() if key != "test_log"}
+
+    def test_without_log(self):
+        assert strip_test_log('{"instance_id": "test-001"}') == '{"instance_id": "test-001"}'
+
+
+class TestIterResultRows:
+
+    def test_skips_test_logs(self):
+        with tempfile.TemporaryDirectory() as temp_dir:
+            results_path = Path(temp_dir) / "results.jsonl"
+            write_results(results_path, [make_result("test-001", "model-a"), make_result("test-002", "model-a", resolved=True)])
+
+            rows = list(iter_result_rows(temp_dir))
+            assert [row["instance_id"] for row in rows] == ["test-001", "test-002"]
+            assert all("test_log" not in row for row in rows)
+            assert rows[1]["resolved"] is True
+
+    def test_log_as_first_member(self):
+        with tempfile.TemporaryDirectory() as temp_dir:
+            results_path = Path(temp_dir) / "results.jsonl"
+            results_path.write_text(json.dumps({"test_log": "log", "instance_id": "test-001", "resolved": True, "exit_code": 0}) + "\n")
+
+            assert list(iter_result_rows(str(results_path)))[0]["instance_id"] == "test-001"
+
+    def test_compact_result_store(self):
+        with tempfile.TemporaryDirectory() as temp_dir:
+            ResultStore(temp_dir, shard="worker-1").write(make_result("test-001", "model-a"))
+            ResultStore(temp_dir, shard="worker-2").write(make_result("test-002", "model-a"))
+
+            assert sorted(row["instance_id"] for row in iter_result_rows(temp_dir)) == ["test-001", "test-002"]
+
+
+class TestBuildReport:
+
+    def test_report(self):
+        with tempfile.TemporaryDirectory() as temp_dir:
+            write_results(Path(temp_dir) / "a" / "results.jsonl", [
+                make_result("test-001", "model-a", resolved=True),
+                make_result("test-002", "model-a", repo="org/other", stage="apply"),
+                make_result("test-003", "model-a", exit_code=124),
+            ])
+            write_results(Path(temp_dir) / "b" / "results.jsonl", [
+                make_result("test-001", "model-b", resolved=True),
+                make_result("test-002", "model-b", repo="org/other", resolved=True),
+                make_result("test-003", "model-b"),
+                # rerun, the last result counts
+                make_result("test-003", "model-b", resolved=True),
+                make_result("test-004", "model-b"),
+            ])
+
+            report = build_report([str(Path(temp_dir) / "a"), str(Path(temp_dir) / "b" / "results.jsonl")])
+
+        model_a = report.models["model-a"]
+        assert (model_a.total, model_a.resolved, model_a.apply_failed, model_a.timeout) == (3, 1, 1, 1)
+        model_b = report.models["model-b"]
+        assert (model_b.total, model_b.resolved, model_b.test_failed) == (4, 3, 1)
+        assert report.repos["model-a"]["org/other"].apply_failed == 1
+        assert report.repos["model-b"]["org/repo"].total == 3
+
+        comparison = report.pairwise[0]
+        assert (comparison.model_a, comparison.model_b) == ("model-a", "model-b")
+        assert comparison.common == 3
+        assert comparison.both_resolved == 1
+        assert comparison.only_a_resolved == 0
+        assert comparison.only_b_resolved == 2
+        assert comparison.neither_resolved == 0
+
+        formatted = format_report(report, by_repo=True)
+        assert "model-a" in formatted
+        assert "  org/other" in formatted
+        assert report.to_dict()["models"]["model-b"]["resolve_rate"] == 0.75
+
+    def test_chunked_parallel(self):
+        with tempfile.TemporaryDirectory() as temp_dir:
+            results_path = Path(temp_dir) / "results.jsonl"
+            write_results(results_path, [make_result(f"test-{i:03d}", "model-a", resolved=i % 3 == 0) for i in range(100)] + [
+                # rerun in a later chunk, the last result counts
+                make_result("test-001", "model-a", resolved=True),
+            ])
+
+            sequential = build_report([temp_dir], workers=1)
+            parallel = build_report([temp_dir], workers=2, chunk_size=1000)
+
+        assert sequential.models["model-a"].total == 100
+        assert sequential.models["model-a"].resolved == 35
+        assert parallel.to_dict() == sequential.to_dict()
+
+    def test_default_model_from_directory(self):
+        with tempfile.TemporaryDirectory() as temp_dir:
+            results_path = Path(temp_dir) / "my-model" / "results.jsonl"
+            write_results(results_path, [EvaluationResult(instance_id="test-001", resolved=True, exit_code=0, test_log="")])
+
+            report = build_report([str(results_path)])
+
+        assert report.models["my-model"].resolved == 1
+        assert "unknown" in report.repos["my-model"]
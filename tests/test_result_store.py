@@ -0,0 +1,66 @@
+import json
+import tempfile
+from pathlib import Path
+
+import pytest
+
+from sweflow_bench.utils.result_store import ResultStore, ResultStoreReader
+from sweflow_bench.utils.run_evaluation import EvaluationResult
+
+
+def make_result(instance_id: str, test_log: str, resolved: bool = True) -> EvaluationResult:
+    return EvaluationResult(
+        instance_id=instance_id,
+        resolved=resolved,
+        exit_code=0 if resolved else 1,
+        test_log=test_log,
+        durations={"eval": 1.5},
+        stage="eval",
+    )
+
+
+class TestResultStore:
+
+    @pytest.mark.parametrize("codec", ["zstd", "zlib"])
+    def test_write_and_read(self, codec):
+        with tempfile.TemporaryDirectory() as temp_dir:
+            store = ResultStore(temp_dir, codec=codec)
+            store.write(make_result("test-001", "first log\n" * 100))
+            store.write(make_result("test-002", "second log", resolved=False))
+
+            reports = [json.loads(line) for line in store.reports_path.read_text().splitlines()]
+            assert [report["instance_id"] for report in reports] == ["test-001", "test-002"]
+            assert "test_log" not in reports[0]
+            assert reports[1]["log_offset"] == reports[0]["log_length"]
+
+            reader = ResultStoreReader(temp_dir)
+            assert reader.instance_ids() == ["test-001", "test-002"]
+            assert reader.get_log("test-001") == "first log\n" * 100
+            assert reader.get_log("test-002") == "second log"
+            assert reader.get_report("test-002")["resolved"] is False
+            assert reader.get_report("test-001")["durations"] == {"eval": 1.5}
+
+    def test_reader_merges_shards(self):
+        with tempfile.TemporaryDirectory() as temp_dir:
+            ResultStore(temp_dir, shard="worker-1").write(make_result("test-001", "log 1"))
+            ResultStore(temp_dir, shard="worker-2").write(make_result("test-002", "log 2"))
+            assert sorted(path.name for path in Path(temp_dir).glob("reports*.jsonl")) == ["reports.worker-1.jsonl", "reports.worker-2.jsonl"]
+
+            reader = ResultStoreReader(temp_dir)
+            assert reader.get_log("test-001") == "log 1"
+            assert reader.get_log("test-002") == "log 2"
+
+    def test_rerun_takes_precedence(self):
+        with tempfile.TemporaryDirectory() as temp_dir:
+            store = ResultStore(temp_dir)
+            store.write(make_result("test-001", "old", resolved=False))
+            store.write(make_result("test-001", "new"))
+
+            reader = ResultStoreReader(temp_dir)
+            assert reader.instance_ids() == ["test-001"]
+            assert reader.get_log("test-001") == "new"
+
+    def test_unknown_codec(self):
+        with tempfile.TemporaryDirectory() as temp_dir:
+            with pytest.raises(ValueError):
+                ResultStore(temp_dir, codec="lz4")
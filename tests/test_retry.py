@@ -0,0 +1,124 @@
+import json
+import docker
+import random
+import pytest
+import requests
+import tempfile
+from pathlib import Path
+from types import SimpleNamespace
+from unittest.mock import patch, MagicMock
+
+from conftest import make_instance
+from sweflow_bench.utils.docker import DockerError
+from sweflow_bench.utils.docker_hosts import NoHealthyDockerHostError
+from sweflow_bench.utils.retry import RetryPolicy, get_retry_delay, run_with_retries
+from sweflow_bench.utils.run_evaluation import run_evaluation
+
+NO_DELAY = RetryPolicy(max_attempts=3, initial_delay=0.0)
+
+
+class TestGetRetryDelay:
+
+    def test_exponential_backoff_with_jitter(self):
+        policy = RetryPolicy(initial_delay=1.0, max_delay=5.0)
+        rng = random.Random(0)
+
+        for retry, backoff in [(1, 1.0), (2, 2.0), (3, 4.0), (4, 5.0), (10, 5.0)]:
+            delays = [get_retry_delay(policy, retry, rng) for _ in range(100)]
+            assert all(0 <= delay <= backoff for delay in delays)
+            assert max(delays) > backoff / 2
+
+
+class TestRunWithRetries:
+
+    @pytest.mark.parametrize("error", [
+        DockerError("daemon hiccup"),
+        docker.errors.DockerException("daemon unreachable"),
+        requests.exceptions.ConnectionError("connection reset"),
+    ])
+    def test_retries_docker_errors(self, error):
+        fn = MagicMock(side_effect=[error, "result"])
+
+        with patch("sweflow_bench.utils.retry.time.sleep") as mock_sleep:
+            assert run_with_retries(fn, RetryPolicy(max_attempts=3), lambda result: None, "test-001") == ("result", 2)
+        mock_sleep.assert_called_once()
+
+    def test_raises_error_of_last_attempt(self):
+        fn = MagicMock(side_effect=[DockerError("first"), DockerError("second"), DockerError("last")])
+
+        with pytest.raises(DockerError, match="last"):
+            run_with_retries(fn, NO_DELAY, lambda result: None, "test-001")
+        assert fn.call_count == 3
+
+    @pytest.mark.parametrize("error", [ValueError("bug"), NoHealthyDockerHostError("no hosts")])
+    def test_does_not_retry_other_errors(self, error):
+        fn = MagicMock(side_effect=error)
+
+        with pytest.raises(type(error)):
+            run_with_retries(fn, NO_DELAY, lambda result: None, "test-001")
+        assert fn.call_count == 1
+
+    def test_retries_failed_results(self):
+        fn = MagicMock(side_effect=[137, 137, 137])
+
+        result = run_with_retries(fn, NO_DELAY, lambda result: "killed" if result == 137 else None, "test-001")
+
+        # the result of the last attempt is returned
+        assert result == (137, 3)
+
+
+class TestRunEvaluationRetries:
+
+    def run(self, start_side_effect, exec_side_effect, temp_dir):
+        with patch("sweflow_bench.utils.runtime.start_docker_container", side_effect=start_side_effect), \
+             patch("sweflow_bench.utils.runtime.exec_command_in_container", side_effect=exec_side_effect), \
+             patch("sweflow_bench.utils.runtime.copy_file_to_container"), \
+             patch("sweflow_bench.utils.runtime.stop_docker_container"), \
+             patch("sweflow_bench.utils.runtime.remove_docker_container"):
+            return run_evaluation([make_instance()], temp_dir, retry_policy=NO_DELAY)[0]
+
+    def test_docker_error_is_retried(self):
+        container = SimpleNamespace(name="test-container")
+        with tempfile.TemporaryDirectory() as temp_dir:
+            result = self.run(
+                [DockerError("Error starting container: 409 Conflict"), container],
+                [(0, ""), (0, ""), (0, ""), (0, "passed")],
+                temp_dir,
+            )
+
+            assert result.resolved is True
+            assert result.attempts == 2
+            report = json.loads((Path(temp_dir) / "test-001" / "report.json").read_text())
+            assert report["attempts"] == 2
+
+    def test_oom_killed_is_retried(self):
+        container = SimpleNamespace(name="test-container")
+        with tempfile.TemporaryDirectory() as temp_dir:
+            result = self.run(
+                [container, container],
+                [(0, ""), (0, ""), (0, ""), (137, "Killed"), (0, ""), (0, ""), (0, ""), (0, "passed")],
+                temp_dir,
+            )
+
+        assert result.resolved is True
+        assert result.attempts == 2
+
+    def test_test_failure_is_not_retried(self):
+        container = SimpleNamespace(name="test-container")
+        with tempfile.TemporaryDirectory() as temp_dir:
+            result = self.run([container], [(0, ""), (0, ""), (0, ""), (1, "failed")], temp_dir)
+
+        assert result.resolved is False
+        assert result.attempts == 1
+
+    def test_exhausted_retries_are_recorded(self):
+        with tempfile.TemporaryDirectory() as temp_dir:
+            result = self.run(DockerError("Error starting container: daemon down"), [], temp_dir)
+
+            # the run continues with a failed result of the instance
+            assert result.resolved is False
+            assert result.stage == "infrastructure"
+            assert result.attempts == 3
+            assert "daemon down" in result.test_log
+            report = json.loads((Path(temp_dir) / "test-001" / "report.json").read_text())
+            assert report["stage"] == "infrastructure"
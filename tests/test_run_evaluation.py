@@ -10,7 +10,12 @@ from sweflow_bench.utils.run_evaluation import (
     run_evaluation,
     GIT_APPLY_COMMANDS,
 )
+from conftest import make_instance
 from sweflow_bench.utils.data import SWEFlowTestInstance
+from sweflow_bench.utils.flaky import RerunPolicy
+from sweflow_bench.utils.runtime import Runtime
+from sweflow_bench.utils.timeouts import PhaseTimeouts, TimingHistory
+from sweflow_bench.utils.result_store import ResultStore, ResultStoreReader
 
 
 class TestEvaluationError:
@@ -42,11 +47,11 @@ class TestEvaluationResult:
 
 class TestEvaluateInstance:
 
-    @patch('sweflow_bench.utils.run_evaluation.start_docker_container')
-    @patch('sweflow_bench.utils.run_evaluation.exec_command_in_container')
-    @patch('sweflow_bench.utils.run_evaluation.copy_file_to_container')
-    @patch('sweflow_bench.utils.run_evaluation.stop_docker_container')
-    @patch('sweflow_bench.utils.run_evaluation.remove_docker_container')
+    @patch('sweflow_bench.utils.runtime.start_docker_container')
+    @patch('sweflow_bench.utils.runtime.exec_command_in_container')
+    @patch('sweflow_bench.utils.runtime.copy_file_to_container')
+    @patch('sweflow_bench.utils.runtime.stop_docker_container')
+    @patch('sweflow_bench.utils.runtime.remove_docker_container')
     @patch('tempfile.mktemp')
     @patch('builtins.open', new_callable=mock_open)
     @patch('pathlib.Path.unlink')
@@ -85,19 +90,21 @@ class TestEvaluateInstance:
         assert result.resolved is True
         assert result.exit_code == 0
         assert result.test_log == "Test passed"
+        assert set(result.durations) == {"workspace", "checkout", "apply", "eval"}
 
         # Verify calls
         mock_start.assert_called_once()
         assert mock_exec.call_count == 4
+        assert [call.kwargs["timeout"] for call in mock_exec.call_args_list] == [60, 300, 60, 900]
         mock_copy.assert_called_once()
         mock_stop.assert_called_once_with(mock_container)
         mock_remove.assert_called_once_with(mock_container)
         mock_unlink.assert_called_once()
 
-    @patch('sweflow_bench.utils.run_evaluation.start_docker_container')
-    @patch('sweflow_bench.utils.run_evaluation.exec_command_in_container')
-    @patch('sweflow_bench.utils.run_evaluation.stop_docker_container')
-    @patch('sweflow_bench.utils.run_evaluation.remove_docker_container')
+    @patch('sweflow_bench.utils.runtime.start_docker_container')
+    @patch('sweflow_bench.utils.runtime.exec_command_in_container')
+    @patch('sweflow_bench.utils.runtime.stop_docker_container')
+    @patch('sweflow_bench.utils.runtime.remove_docker_container')
     def test_evaluate_instance_copy_failure(self, mock_remove, mock_stop, mock_exec, mock_start):
         # Setup mocks
         mock_container = MagicMock()
@@ -130,11 +137,11 @@ class TestEvaluateInstance:
         mock_stop.assert_called_once_with(mock_container)
         mock_remove.assert_called_once_with(mock_container)
 
-    @patch('sweflow_bench.utils.run_evaluation.start_docker_container')
-    @patch('sweflow_bench.utils.run_evaluation.exec_command_in_container')
-    @patch('sweflow_bench.utils.run_evaluation.copy_file_to_container')
-    @patch('sweflow_bench.utils.run_evaluation.stop_docker_container')
-    @patch('sweflow_bench.utils.run_evaluation.remove_docker_container')
+    @patch('sweflow_bench.utils.runtime.start_docker_container')
+    @patch('sweflow_bench.utils.runtime.exec_command_in_container')
+    @patch('sweflow_bench.utils.runtime.copy_file_to_container')
+    @patch('sweflow_bench.utils.runtime.stop_docker_container')
+    @patch('sweflow_bench.utils.runtime.remove_docker_container')
     @patch('tempfile.mktemp')
     @patch('builtins.open', new_callable=mock_open)
     @patch('pathlib.Path.unlink')
@@ -179,11 +186,11 @@ class TestEvaluateInstance:
         git_apply_calls = [call for call in mock_exec.call_args_list if any(cmd in str(call) for cmd in GIT_APPLY_COMMANDS)]
         assert len(git_apply_calls) == 2
 
-    @patch('sweflow_bench.utils.run_evaluation.start_docker_container')
-    @patch('sweflow_bench.utils.run_evaluation.exec_command_in_container')
-    @patch('sweflow_bench.utils.run_evaluation.copy_file_to_container')
-    @patch('sweflow_bench.utils.run_evaluation.stop_docker_container')
-    @patch('sweflow_bench.utils.run_evaluation.remove_docker_container')
+    @patch('sweflow_bench.utils.runtime.start_docker_container')
+    @patch('sweflow_bench.utils.runtime.exec_command_in_container')
+    @patch('sweflow_bench.utils.runtime.copy_file_to_container')
+    @patch('sweflow_bench.utils.runtime.stop_docker_container')
+    @patch('sweflow_bench.utils.runtime.remove_docker_container')
     @patch('tempfile.mktemp')
     @patch('builtins.open', new_callable=mock_open)
     @patch('pathlib.Path.unlink')
@@ -223,6 +230,91 @@ class TestEvaluateInstance:
         assert result.exit_code == 1
         assert result.test_log == "Test failed"
 
+    @patch('sweflow_bench.utils.runtime.start_docker_container')
+    @patch('sweflow_bench.utils.runtime.exec_command_in_container')
+    @patch('sweflow_bench.utils.runtime.copy_file_to_container')
+    @patch('sweflow_bench.utils.runtime.stop_docker_container')
+    @patch('sweflow_bench.utils.runtime.remove_docker_container')
+    @patch('tempfile.mktemp')
+    @patch('builtins.open', new_callable=mock_open)
+    @patch('pathlib.Path.unlink')
+    def test_evaluate_instance_prepared(self, mock_unlink, mock_open, mock_mktemp, mock_remove, mock_stop, mock_copy, mock_exec, mock_start):
+        mock_start.return_value = MagicMock()
+        mock_exec.side_effect = [
+            (0, "Apply successful"),  # git apply
+            (0, "Test passed")  # eval script
+        ]
+        mock_mktemp.return_value = "/tmp/test-patch.diff"
+
+        instance = make_instance(patch="diff --git a/test.py b/test.py\nindex 123..456 100644\n--- a/test.py\n+++ b/test.py\n@@ -1,2 +1,2 @@\n-print('hello')\n+print('world')\n")
+
+        result = evaluate_instance(instance, prepared=True)
+
+        # the workspace copy and checkout are skipped
+        assert result.resolved is True
+        assert set(result.durations) == {"apply", "eval"}
+        assert mock_exec.call_count == 2
+
+
+class TestEvaluateInstanceEarlyExit:
+
+    @staticmethod
+    def make_instance() -> SWEFlowTestInstance:
+        return make_instance(FAIL_TO_PASS=["tests/test_a.py::test_f2p_1", "tests/test_a.py::test_f2p_2"], PASS_TO_PASS=["tests/test_a.py::test_p2p"])
+
+    @staticmethod
+    def make_runtime(*exec_results) -> MagicMock:
+        runtime = MagicMock(spec=Runtime)
+        # git apply, then the test runs
+        runtime.exec.side_effect = [(0, "")] + list(exec_results)
+        return runtime
+
+    def test_fail_to_pass_failed(self):
+        runtime = self.make_runtime((1, "tests/test_a.py::test_f2p_1 FAILED [ 50%]\n"))
+
+        result = evaluate_instance(self.make_instance(), runtime=runtime, prepared=True, early_exit=True)
+
+        assert result.resolved is False
+        assert result.exit_code == 1
+        assert result.stage == "eval"
+        assert result.failed_eval_stage == "fail_to_pass"
+        assert "===== fail_to_pass tests =====" in result.test_log
+        # PASS_TO_PASS tests never ran
+        assert runtime.exec.call_count == 2
+        assert runtime.exec.call_args_list[1].args[0] == "python -m pytest -v -x tests/test_a.py::test_f2p_1 tests/test_a.py::test_f2p_2"
+
+    def test_pass_to_pass_failed(self):
+        runtime = self.make_runtime((0, "PASSED"), (1, "tests/test_a.py::test_p2p FAILED [100%]\n"))
+
+        result = evaluate_instance(self.make_instance(), runtime=runtime, prepared=True, early_exit=True)
+
+        assert result.resolved is False
+        assert result.failed_eval_stage == "pass_to_pass"
+        assert runtime.exec.call_args_list[2].args[0] == "python -m pytest -v tests/test_a.py::test_p2p"
+
+    def test_all_passed(self):
+        runtime = self.make_runtime((0, "PASSED"), (0, "PASSED"))
+
+        result = evaluate_instance(self.make_instance(), runtime=runtime, prepared=True, early_exit=True)
+
+        assert result.resolved is True
+        assert result.failed_eval_stage is None
+        assert "eval" in result.durations
+
+    def test_flaky_fail_to_pass_runs_remaining_tests(self):
+        runtime = self.make_runtime(
+            (1, "tests/test_a.py::test_f2p_1 FAILED [ 50%]\n"),
+            (0, "tests/test_a.py::test_f2p_1 PASSED [100%]\n"),
+            (0, "tests/test_a.py::test_f2p_2 PASSED [ 50%]\ntests/test_a.py::test_p2p PASSED [100%]\n"),
+        )
+
+        result = evaluate_instance(self.make_instance(), runtime=runtime, prepared=True, early_exit=True, rerun_policy=RerunPolicy(max_reruns=1))
+
+        assert result.resolved is True
+        assert result.flaky_tests == ["tests/test_a.py::test_f2p_1"]
+        # FAIL_TO_PASS tests skipped by -x run with the PASS_TO_PASS tests
+        assert runtime.exec.call_args_list[3].args[0] == "python -m pytest -v tests/test_a.py::test_f2p_2 tests/test_a.py::test_p2p"
+
 
 class TestRunEvaluation:
 
@@ -297,6 +389,23 @@ class TestRunEvaluation:
         # Verify file writing
         assert mock_write_text.call_count == 2  # report.json and test_output.log
 
+    @patch('pathlib.Path.write_text')
+    def test_run_evaluation_local_runtime_error(self, mock_write_text):
+        instances = [
+            make_instance(f"test-00{i}")
+            for i in range(2)
+        ]
+
+        with tempfile.TemporaryDirectory() as temp_dir:
+            # no testbed of the repo in the testbed directory
+            results = run_evaluation(instances, f"{temp_dir}/output", runtime_backend="local", local_testbed_dir=temp_dir)
+
+        # every instance fails at setup, and the run continues
+        assert [result.instance_id for result in results] == ["test-000", "test-001"]
+        assert all(result.stage == "setup" and not result.resolved for result in results)
+        assert "does not exist" in results[0].test_log
+        assert mock_write_text.call_count == 4
+
     @patch('sweflow_bench.utils.run_evaluation.evaluate_instance')
     @patch('pathlib.Path.mkdir')
     @patch('pathlib.Path.write_text')
@@ -342,3 +451,82 @@ class TestRunEvaluation:
 
         # Verify file writing (2 instances * 2 files each)
         assert mock_write_text.call_count == 4
+
+    @patch('sweflow_bench.utils.run_evaluation.evaluate_instance')
+    @patch('pathlib.Path.mkdir')
+    @patch('pathlib.Path.write_text')
+    def test_run_evaluation_adaptive_timeouts(self, mock_write_text, mock_mkdir, mock_evaluate):
+        mock_evaluate.return_value = EvaluationResult(instance_id="test-001", resolved=True, exit_code=0, test_log="Test passed", durations={"eval": 10.0})
+
+        instance = make_instance(patch="diff --git a/test.py b/test.py\nindex 123..456 100644\n--- a/test.py\n+++ b/test.py\n@@ -1,2 +1,2 @@\n-print('hello')\n+print('world')\n")
+
+        timing_history = TimingHistory()
+        run_evaluation([instance] * 6, "/tmp/output", timing_history=timing_history, adaptive_multiplier=3.0)
+
+        # the first five instances have no history yet, the sixth learns from them
+        timeouts = [call.args[1] for call in mock_evaluate.call_args_list]
+        assert timeouts[0] == PhaseTimeouts()
+        assert timeouts[5].eval == 30
+        assert timing_history.samples["test-repo"]["eval"] == [10.0] * 6
+
+    @patch('sweflow_bench.utils.run_evaluation.evaluate_instance')
+    @patch('pathlib.Path.mkdir')
+    @patch('pathlib.Path.write_text')
+    def test_run_evaluation_partial_eval_not_in_timing_history(self, mock_write_text, mock_mkdir, mock_evaluate):
+        mock_evaluate.side_effect = [
+            EvaluationResult(instance_id="test-001", resolved=False, exit_code=1, test_log="", stage="eval", durations={"apply": 1.0, "eval": 2.0}, failed_eval_stage="fail_to_pass"),
+            EvaluationResult(instance_id="test-001", resolved=True, exit_code=0, test_log="", stage="eval", durations={"apply": 1.0, "eval": 3.0}, skipped_tests=["test_pass_to_pass"]),
+            EvaluationResult(instance_id="test-001", resolved=True, exit_code=0, test_log="", stage="eval", durations={"apply": 1.0, "eval": 10.0}),
+        ]
+
+        instance = make_instance()
+
+        timing_history = TimingHistory()
+        run_evaluation([instance] * 3, "/tmp/output", timing_history=timing_history)
+
+        # runs that stopped after FAIL_TO_PASS or skipped PASS_TO_PASS tests are no eval samples
+        assert timing_history.samples["test-repo"]["eval"] == [10.0]
+        assert timing_history.samples["test-repo"]["apply"] == [1.0] * 3
+
+    @patch('sweflow_bench.utils.run_evaluation.evaluate_instance')
+    @patch('pathlib.Path.mkdir')
+    @patch('pathlib.Path.write_text')
+    def test_run_evaluation_preflight(self, mock_write_text, mock_mkdir, mock_evaluate):
+        mock_evaluate.return_value = EvaluationResult(instance_id="test-001", resolved=True, exit_code=0, test_log="Test passed", stage="eval")
+
+        instances = [
+            make_instance(instance_id, patch=patch)
+            for instance_id, patch in [
+                ("test-001", "diff --git a/test.py b/test.py\nindex 123..456 100644\n--- a/test.py\n+++ b/test.py\n@@ -1,2 +1,2 @@\n-print('hello')\n+print('world')\n print('bye')\n"),
+                ("test-002", ""),
+            ]
+        ]
+
+        results = run_evaluation(instances, "/tmp/output", preflight=True)
+
+        # the empty patch never reaches a container
+        mock_evaluate.assert_called_once()
+        assert results[1].instance_id == "test-002"
+        assert results[1].resolved is False
+        assert results[1].stage == "preflight"
+        assert results[1].test_log.startswith("Pre-flight check failed")
+        assert mock_write_text.call_count == 4
+
+
+class TestRunEvaluationResultStore:
+
+    @patch('sweflow_bench.utils.run_evaluation.evaluate_instance')
+    @patch('pathlib.Path.write_text')
+    def test_run_evaluation_result_store(self, mock_write_text, mock_evaluate):
+        mock_evaluate.return_value = EvaluationResult(instance_id="test-001", resolved=True, exit_code=0, test_log="Test passed", stage="eval")
+        instances = [
+            make_instance()
+        ]
+
+        with tempfile.TemporaryDirectory() as temp_dir:
+            run_evaluation(instances, temp_dir, result_store=ResultStore(temp_dir))
+
+            # no directory per instance
+            assert mock_write_text.call_count == 0
+            assert not (Path(temp_dir) / "test-001").exists()
+            assert ResultStoreReader(temp_dir).get_log("test-001") == "Test passed"
@@ -0,0 +1,160 @@
+import pytest
+import tempfile
+import subprocess
+from pathlib import Path
+from unittest.mock import patch, MagicMock
+from functools import partial
+
+from conftest import make_instance as make_test_instance
+from sweflow_bench.utils.run_evaluation import evaluate_instance
+from sweflow_bench.utils.runtime import (
+    DockerRuntime,
+    LocalRuntime,
+    LocalRuntimeError,
+    create_runtime,
+)
+
+
+make_instance = partial(make_test_instance, repo="org/test-repo")
+
+
+def git(*args, cwd=None):
+    return subprocess.run(["git", *args], cwd=cwd, check=True, stdout=subprocess.PIPE, text=True).stdout.strip()
+
+
+@pytest.fixture
+def testbed_dir():
+    with tempfile.TemporaryDirectory() as temp_dir:
+        testbed_dir = Path(temp_dir) / "org__test-repo"
+        testbed_dir.mkdir()
+        git("init", "-q", cwd=testbed_dir)
+        (testbed_dir / "calc.py").write_text("def add(a, b):\n    return a - b\n")
+        (testbed_dir / "test_calc.py").write_text("from calc import add\n\n\ndef test_add():\n    assert add(1, 2) == 3\n\n\ndef test_import():\n    assert add\n")
+        git("add", ".", cwd=testbed_dir)
+        git("-c", "user.name=test", "-c", "user.email=test@example.com", "commit", "-qm", "init", cwd=testbed_dir)
+        yield testbed_dir
+
+
+class TestDockerRuntime:
+
+    @patch('sweflow_bench.utils.runtime.remove_docker_container')
+    @patch('sweflow_bench.utils.runtime.stop_docker_container')
+    @patch('sweflow_bench.utils.runtime.exec_command_in_container')
+    @patch('sweflow_bench.utils.runtime.start_docker_container')
+    def test_lifecycle(self, mock_start, mock_exec, mock_stop, mock_remove):
+        mock_container = MagicMock()
+        mock_start.return_value = mock_container
+        mock_exec.return_value = (0, "hello")
+
+        with DockerRuntime("test-image:latest", "test-container") as runtime:
+            assert runtime.exec("echo hello", timeout=10, workdir="/workspace") == (0, "hello")
+
+        mock_start.assert_called_once_with(image_name="test-image:latest", container_name="test-container", base_url=None)
+        mock_exec.assert_called_once_with(mock_container, "echo hello", timeout=10, workdir="/workspace")
+        mock_stop.assert_called_once_with(mock_container)
+        mock_remove.assert_called_once_with(mock_container)
+
+    @patch('sweflow_bench.utils.runtime.remove_docker_container')
+    @patch('sweflow_bench.utils.runtime.stop_docker_container')
+    def test_teardown_ignores_errors(self, mock_stop, mock_remove):
+        mock_stop.side_effect = Exception("fail")
+        runtime = DockerRuntime("test-image:latest", "test-container")
+        runtime.teardown()
+        mock_stop.assert_not_called()
+        runtime.container = MagicMock()
+        runtime.teardown()
+        mock_remove.assert_called_once()
+
+
+class TestLocalRuntime:
+
+    def test_map_path(self, testbed_dir):
+        runtime = LocalRuntime(str(testbed_dir))
+        runtime.start()
+        try:
+            assert runtime.map_path("cp -r /testbed/. /workspace") == f"cp -r {testbed_dir}/. {runtime.root_dir}/workspace"
+            assert runtime.map_path("git apply /tmp/patch.diff") == f"git apply {runtime.root_dir}/tmp/patch.diff"
+            assert runtime.map_path("cat /usr/tmp/x a/workspace") == "cat /usr/tmp/x a/workspace"
+        finally:
+            runtime.teardown()
+
+    def test_exec_and_files(self, testbed_dir):
+        with LocalRuntime(str(testbed_dir)) as runtime:
+            exit_code, _ = runtime.exec("cp -r /testbed/. /workspace")
+            assert exit_code == 0
+            exit_code, output = runtime.exec("cat calc.py && exit 3", workdir="/workspace")
+            assert exit_code == 3
+            assert "return a - b" in output
+
+            with tempfile.NamedTemporaryFile("w", suffix=".txt") as f:
+                f.write("content")
+                f.flush()
+                runtime.put_file(f.name, "/tmp/file.txt")
+            assert runtime.get_file("/tmp/file.txt") == "content"
+            root_dir = runtime.root_dir
+        assert not root_dir.exists()
+
+    def test_exec_timeout(self, testbed_dir):
+        with LocalRuntime(str(testbed_dir)) as runtime:
+            exit_code, _ = runtime.exec("sleep 5", timeout=0.1)
+            assert exit_code == 124
+
+    def test_missing_testbed(self):
+        with pytest.raises(LocalRuntimeError):
+            LocalRuntime("/nonexistent-testbed").start()
+
+    def test_evaluate_instance(self, testbed_dir):
+        instance = make_instance(
+            base_commit=git("rev-parse", "HEAD", cwd=testbed_dir),
+            patch="diff --git a/calc.py b/calc.py\n--- a/calc.py\n+++ b/calc.py\n@@ -1,2 +1,2 @@\n def add(a, b):\n-    return a - b\n+    return a + b\n",
+            FAIL_TO_PASS=["test_calc.py::test_add"],
+            PASS_TO_PASS=["test_calc.py::test_import"],
+        )
+        runtime = create_runtime(instance, "local", str(testbed_dir.parent))
+
+        result = evaluate_instance(instance, runtime=runtime)
+
+        assert result.resolved is True, result.test_log
+        assert "2 passed" in result.test_log
+        # the testbed itself is never modified
+        assert "a - b" in (testbed_dir / "calc.py").read_text()
+
+    def test_evaluate_instance_profile(self, testbed_dir):
+        instance = make_instance(
+            base_commit=git("rev-parse", "HEAD", cwd=testbed_dir),
+            patch="diff --git a/calc.py b/calc.py\n--- a/calc.py\n+++ b/calc.py\n@@ -1,2 +1,2 @@\n def add(a, b):\n-    return a - b\n+    return a + b\n",
+            FAIL_TO_PASS=["test_calc.py::test_add"],
+            PASS_TO_PASS=["test_calc.py::test_import"],
+        )
+        runtime = create_runtime(instance, "local", str(testbed_dir.parent))
+
+        result = evaluate_instance(instance, runtime=runtime, profile=True)
+
+        assert result.resolved is True, result.test_log
+        assert "TIMEFORMAT" not in result.test_log
+        assert set(result.profile.eval_time) == {"real", "user", "sys"}
+        assert result.profile.teardown_seconds is not None
+        commands = [timing.command for timing in result.profile.execs]
+        assert commands[:2] == ["cp -r /testbed/. /workspace", f"git checkout {instance.base_commit}"]
+        assert commands[-1].startswith("bash -c")
+
+
+class TestCreateRuntime:
+
+    def test_docker(self):
+        runtime = create_runtime(make_instance())
+        assert isinstance(runtime, DockerRuntime)
+        assert runtime.image_name == "test-image:latest"
+        assert runtime.container_name.startswith("sweflow-bench-test-001-")
+
+    def test_local_prefers_instance_dir(self):
+        with tempfile.TemporaryDirectory() as temp_dir:
+            assert create_runtime(make_instance(), "local", temp_dir).testbed_dir == (Path(temp_dir) / "org__test-repo").resolve()
+            (Path(temp_dir) / "test-001").mkdir()
+            assert create_runtime(make_instance(), "local", temp_dir).testbed_dir == (Path(temp_dir) / "test-001").resolve()
+
+    def test_invalid(self):
+        with pytest.raises(ValueError):
+            create_runtime(make_instance(), "local")
+        with pytest.raises(ValueError):
+            create_runtime(make_instance(), "unknown")
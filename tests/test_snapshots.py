@@ -0,0 +1,131 @@
+from unittest.mock import patch, MagicMock
+from functools import partial
+
+from conftest import make_instance as make_test_instance
+from sweflow_bench.utils.docker import DockerError
+from sweflow_bench.utils.run_evaluation import (
+    EvaluationError,
+    EvaluationResult,
+    prepare_snapshot,
+    prepare_snapshots,
+    run_evaluation,
+)
+from sweflow_bench.utils.snapshots import (
+    SNAPSHOT_LABEL,
+    SNAPSHOT_BASE_IMAGE_LABEL,
+    get_snapshot_tag,
+    get_snapshot_image_name,
+    gc_snapshots,
+)
+
+
+make_instance = partial(make_test_instance, instance_id="org/test-001")
+
+
+def make_image(image_id, size, created, base_image="test-image:latest"):
+    image = MagicMock()
+    image.id = image_id
+    image.tags = [f"sweflow-bench-snapshot:{image_id}"]
+    image.labels = {SNAPSHOT_LABEL: image_id, SNAPSHOT_BASE_IMAGE_LABEL: base_image}
+    image.attrs = {"Size": size, "Created": created}
+    return image
+
+
+class TestSnapshotNames:
+
+    def test_snapshot_tag(self):
+        tag = get_snapshot_tag(make_instance())
+        assert tag.startswith("org_test-001-")
+        assert get_snapshot_image_name(make_instance()) == f"sweflow-bench-snapshot:{tag}"
+
+    def test_snapshot_tag_changes_with_base_commit(self):
+        assert get_snapshot_tag(make_instance()) != get_snapshot_tag(make_instance(base_commit="fed789"))
+        assert get_snapshot_tag(make_instance()) == get_snapshot_tag(make_instance(model="other-model"))
+
+
+class TestGcSnapshots:
+
+    @patch('sweflow_bench.utils.snapshots.remove_docker_image')
+    @patch('sweflow_bench.utils.snapshots.get_docker_image')
+    @patch('sweflow_bench.utils.snapshots.list_docker_images')
+    def test_removes_oldest_beyond_size(self, mock_list, mock_get, mock_remove):
+        base_image = MagicMock(attrs={"Size": 1000})
+        mock_get.return_value = base_image
+        mock_list.return_value = [
+            make_image("new", 1100, "2024-01-03T00:00:00Z"),
+            make_image("old", 1100, "2024-01-01T00:00:00Z"),
+            make_image("mid", 1100, "2024-01-02T00:00:00Z"),
+        ]
+
+        # each snapshot adds 100 bytes on top of its base image
+        assert gc_snapshots(150) == 2
+
+        assert [call.args[0] for call in mock_remove.call_args_list] == ["old", "mid"]
+        mock_list.assert_called_once_with(SNAPSHOT_LABEL)
+        mock_get.assert_called_once_with("test-image:latest")
+
+    @patch('sweflow_bench.utils.snapshots.remove_docker_image')
+    @patch('sweflow_bench.utils.snapshots.get_docker_image')
+    @patch('sweflow_bench.utils.snapshots.list_docker_images')
+    def test_within_size(self, mock_list, mock_get, mock_remove):
+        mock_get.return_value = None
+        mock_list.return_value = [make_image("old", 100, "2024-01-01T00:00:00Z")]
+        assert gc_snapshots(100) == 0
+        mock_remove.assert_not_called()
+
+
+class TestPrepareSnapshot:
+
+    @patch('sweflow_bench.utils.run_evaluation.has_snapshot', return_value=False)
+    @patch('sweflow_bench.utils.run_evaluation.create_runtime')
+    def test_prepare_snapshot(self, mock_create_runtime, mock_has_snapshot):
+        runtime = mock_create_runtime.return_value
+        runtime.exec.return_value = (0, "")
+        instance = make_instance()
+
+        assert prepare_snapshot(instance) is True
+
+        commands = [call.args[0] for call in runtime.exec.call_args_list]
+        assert commands == ["cp -r /testbed/. /workspace", "git checkout abc123"]
+        runtime.commit.assert_called_once()
+        assert runtime.commit.call_args.args[:2] == ("sweflow-bench-snapshot", get_snapshot_tag(instance))
+        runtime.teardown.assert_called_once()
+
+    @patch('sweflow_bench.utils.run_evaluation.has_snapshot', return_value=True)
+    @patch('sweflow_bench.utils.run_evaluation.create_runtime')
+    def test_prepare_snapshot_exists(self, mock_create_runtime, mock_has_snapshot):
+        assert prepare_snapshot(make_instance()) is False
+        mock_create_runtime.assert_not_called()
+
+    @patch('sweflow_bench.utils.run_evaluation.gc_snapshots')
+    @patch('sweflow_bench.utils.run_evaluation.prepare_snapshot')
+    def test_prepare_snapshots(self, mock_prepare_snapshot, mock_gc):
+        mock_prepare_snapshot.side_effect = [
+            True,
+            EvaluationError("org/test-002", 1, "checkout failed", stage="checkout"),
+            DockerError("Error starting container: image not found"),
+        ]
+        prepare_snapshots([make_instance(instance_id=f"org/test-00{i}") for i in range(1, 4)], max_size_bytes=100)
+        assert mock_prepare_snapshot.call_count == 3
+        mock_gc.assert_called_once_with(100)
+
+
+class TestRunEvaluationWithSnapshots:
+
+    @patch('sweflow_bench.utils.run_evaluation.evaluate_instance')
+    @patch('sweflow_bench.utils.run_evaluation.has_snapshot')
+    @patch('pathlib.Path.mkdir')
+    @patch('pathlib.Path.write_text')
+    def test_starts_from_snapshot(self, mock_write_text, mock_mkdir, mock_has_snapshot, mock_evaluate):
+        mock_has_snapshot.side_effect = lambda instance: instance.instance_id == "org/test-001"
+        mock_evaluate.return_value = EvaluationResult(instance_id="org/test-001", resolved=True, exit_code=0, test_log="Test passed")
+
+        instances = [make_instance(), make_instance(instance_id="org/test-002")]
+        run_evaluation(instances, "/tmp/output", use_snapshots=True)
+
+        (_, _, runtime, prepared), _ = mock_evaluate.call_args_list[0]
+        assert prepared is True
+        assert runtime.image_name == get_snapshot_image_name(instances[0])
+        (_, _, runtime, prepared), _ = mock_evaluate.call_args_list[1]
+        assert prepared is False
+        assert runtime.image_name == "test-image:latest"
@@ -0,0 +1,112 @@
+import json
+import pytest
+import tempfile
+from pathlib import Path
+
+from conftest import make_instance
+from sweflow_bench.utils.timeouts import (
+    PhaseTimeouts,
+    TIMEOUT_EXIT_CODE,
+    TimingHistory,
+    get_timing_samples,
+    resolve_timeouts,
+)
+
+
+class TestTimingHistory:
+
+    def test_record_and_reload(self):
+        with tempfile.TemporaryDirectory() as temp_dir:
+            path = Path(temp_dir) / "timings.jsonl"
+            history = TimingHistory(str(path))
+            for i in range(5):
+                history.record(f"test-00{i}", "test-repo", {"eval": float(i + 1)})
+
+            reloaded = TimingHistory(str(path))
+            assert reloaded.samples["test-repo"]["eval"] == [1.0, 2.0, 3.0, 4.0, 5.0]
+            assert json.loads(path.read_text().splitlines()[0])["instance_id"] == "test-000"
+
+    def test_p95_requires_min_samples(self):
+        history = TimingHistory()
+        for duration in [1.0, 2.0, 3.0]:
+            history.record("test-001", "test-repo", {"eval": duration})
+        assert history.p95("test-repo", "eval") is None
+        assert history.p95("test-repo", "eval", min_samples=3) == 3.0
+
+    def test_record_empty_durations(self):
+        history = TimingHistory()
+        history.record("test-001", "test-repo", {})
+        assert "test-repo" not in history.samples
+
+
+class TestResolveTimeouts:
+
+    def test_defaults(self):
+        timeouts = resolve_timeouts(make_instance())
+        assert timeouts == PhaseTimeouts()
+
+    def test_adaptive_shortens_timeout(self):
+        history = TimingHistory()
+        for _ in range(20):
+            history.record("test-001", "test-repo", {"eval": 20.0})
+        timeouts = resolve_timeouts(make_instance(), PhaseTimeouts(), history, adaptive_multiplier=3.0)
+        assert timeouts.eval == 60
+        # phases without history keep their configured timeout
+        assert timeouts.workspace == 60
+
+    def test_adaptive_never_exceeds_configured(self):
+        history = TimingHistory()
+        for _ in range(20):
+            history.record("test-001", "test-repo", {"eval": 800.0})
+        timeouts = resolve_timeouts(make_instance(), PhaseTimeouts(), history, adaptive_multiplier=3.0)
+        assert timeouts.eval == 900
+
+    def test_adaptive_min_timeout(self):
+        history = TimingHistory()
+        for _ in range(20):
+            history.record("test-001", "test-repo", {"eval": 0.5})
+        timeouts = resolve_timeouts(make_instance(), PhaseTimeouts(), history, adaptive_multiplier=3.0)
+        assert timeouts.eval == 30
+
+    def test_adaptive_other_repo_unaffected(self):
+        history = TimingHistory()
+        for _ in range(20):
+            history.record("test-001", "other-repo", {"eval": 20.0})
+        timeouts = resolve_timeouts(make_instance(), PhaseTimeouts(), history, adaptive_multiplier=3.0)
+        assert timeouts.eval == 900
+
+    def test_dataset_override(self):
+        history = TimingHistory()
+        for _ in range(20):
+            history.record("test-001", "test-repo", {"eval": 20.0})
+        instance = make_instance(timeouts={"eval": 1200})
+        timeouts = resolve_timeouts(instance, PhaseTimeouts(), history, adaptive_multiplier=3.0)
+        assert timeouts.eval == 1200
+
+    def test_dataset_override_unknown_phase(self):
+        # rejected when the dataset is loaded, not in the middle of a run
+        with pytest.raises(ValueError, match="Unknown timeout phase"):
+            make_instance(timeouts={"unknown": 10})
+
+
+class TestGetTimingSamples:
+
+    def test_completed_phases(self):
+        durations = {"workspace": 1.0, "eval": 5.0}
+        assert get_timing_samples(durations, "eval", 1, PhaseTimeouts()) == durations
+
+    def test_timed_out_phase_recorded_with_timeout(self):
+        samples = get_timing_samples({"workspace": 1.0}, "eval", TIMEOUT_EXIT_CODE, PhaseTimeouts(eval=120))
+        assert samples == {"workspace": 1.0, "eval": 120.0}
+
+    def test_timeouts_raise_adaptive_timeout(self):
+        history = TimingHistory()
+        for _ in range(5):
+            history.record("test-001", "test-repo", {"eval": 10.0})
+        timeouts = resolve_timeouts(make_instance(), PhaseTimeouts(eval=900), history, adaptive_multiplier=3.0)
+        assert timeouts.eval == 30
+
+        # the repo got slower, and the shortened timeout is hit
+        for _ in range(5):
+            history.record("test-001", "test-repo", get_timing_samples({}, "eval", TIMEOUT_EXIT_CODE, timeouts))
+        assert resolve_timeouts(make_instance(), PhaseTimeouts(eval=900), history, adaptive_multiplier=3.0).eval == 90
@@ -0,0 +1,169 @@
+import os
+import time
+import pytest
+import tempfile
+import threading
+import multiprocessing
+from unittest.mock import patch
+
+from conftest import make_instance
+from sweflow_bench.utils.run_evaluation import EvaluationResult
+from sweflow_bench.utils.work_queue import (
+    FileWorkQueue,
+    run_coordinator,
+    run_worker,
+)
+
+
+def fake_run_evaluation(instances, output_dir, **kwargs):
+    return [
+        EvaluationResult(instance_id=instance.instance_id, resolved=True, exit_code=0, test_log=f"evaluated by {os.getpid()}")
+        for instance in instances
+    ]
+
+
+@pytest.fixture
+def queue():
+    with tempfile.TemporaryDirectory() as temp_dir:
+        yield FileWorkQueue(temp_dir)
+
+
+class TestFileWorkQueue:
+
+    def test_put_and_claim(self, queue):
+        queue.put(make_instance("org/test-001"))
+        assert queue.count_pending() == 1
+
+        lease_path, instance = queue.claim("worker-1", lease_seconds=60)
+        assert instance.instance_id == "org/test-001"
+        assert lease_path == queue.leases_dir / "worker-1" / "test-model__org__test-001.json"
+        assert queue.count_pending() == 0
+        assert queue.count_leased() == 1
+        assert queue.claim("worker-2", lease_seconds=60) is None
+
+    def test_complete(self, queue):
+        queue.put(make_instance("test-001"))
+        lease_path, instance = queue.claim("worker-1", lease_seconds=60)
+        assert queue.get_result(instance) is None
+        queue.complete(lease_path, EvaluationResult(instance_id="test-001", resolved=True, exit_code=0, test_log="Test passed"))
+        assert queue.get_result(instance).resolved is True
+        assert queue.count_leased() == 0
+
+    def test_put_skips_completed(self, queue):
+        queue.put(make_instance("test-001"))
+        lease_path, _ = queue.claim("worker-1", lease_seconds=60)
+        queue.complete(lease_path, EvaluationResult(instance_id="test-001", resolved=True, exit_code=0, test_log="Test passed"))
+        queue.put(make_instance("test-001"))
+        assert queue.count_pending() == 0
+
+        # the predictions of another model are evaluated
+        queue.put(make_instance("test-001", model="other-model"))
+        assert queue.count_pending() == 1
+        assert queue.get_result(make_instance("test-001", model="other-model")) is None
+
+    def test_requeue_expired(self, queue):
+        queue.put(make_instance("test-001"))
+        lease_path, _ = queue.claim("worker-1", lease_seconds=60)
+        assert queue.requeue_expired() == 0
+
+        # simulate a dead worker whose lease ran out
+        os.utime(lease_path, (time.time() - 1, time.time() - 1))
+        assert queue.requeue_expired() == 1
+        assert queue.count_pending() == 1
+        assert queue.renew(lease_path, 60) is False
+
+        _, instance = queue.claim("worker-2", lease_seconds=60)
+        assert instance.instance_id == "test-001"
+
+    def test_requeue_limit(self):
+        with tempfile.TemporaryDirectory() as temp_dir:
+            queue = FileWorkQueue(temp_dir, max_requeues=1)
+            instance = make_instance("test-001")
+            queue.put(instance)
+            for requeued in [1, 0]:
+                lease_path, _ = queue.claim("worker-1", lease_seconds=-1)
+                assert queue.requeue_expired() == requeued
+
+            result = queue.get_result(instance)
+            assert result.resolved is False
+            assert result.stage == "infrastructure"
+            assert queue.count_pending() == 0
+            assert queue.count_leased() == 0
+
+    def test_renew(self, queue):
+        queue.put(make_instance("test-001"))
+        lease_path, _ = queue.claim("worker-1", lease_seconds=0)
+        assert queue.renew(lease_path, 60) is True
+        assert queue.requeue_expired() == 0
+
+    def test_concurrent_claims(self, queue):
+        for i in range(50):
+            queue.put(make_instance(f"test-{i:03d}"))
+
+        claimed = []
+
+        def claim_all(worker_id):
+            while (item := queue.claim(worker_id, lease_seconds=60)) is not None:
+                claimed.append(item[1].instance_id)
+
+        threads = [threading.Thread(target=claim_all, args=(f"worker-{i}",)) for i in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        assert sorted(claimed) == [f"test-{i:03d}" for i in range(50)]
+
+
+class TestWorkers:
+
+    @patch('sweflow_bench.utils.work_queue.run_evaluation', side_effect=fake_run_evaluation)
+    def test_run_worker(self, mock_run_evaluation, queue):
+        for i in range(3):
+            queue.put(make_instance(f"test-{i:03d}"))
+
+        evaluated = run_worker(queue, "/tmp/output", worker_id="worker-1", poll_interval=0.01, exit_when_empty=True)
+
+        assert evaluated == 3
+        assert mock_run_evaluation.call_count == 3
+        assert queue.count_pending() == 0
+        assert queue.count_leased() == 0
+
+    @patch('sweflow_bench.utils.work_queue.run_evaluation', side_effect=RuntimeError("boom"))
+    def test_run_worker_evaluation_error(self, mock_run_evaluation, queue):
+        instance = make_instance("test-001")
+        queue.put(instance)
+
+        assert run_worker(queue, "/tmp/output", worker_id="worker-1", poll_interval=0.01, exit_when_empty=True) == 1
+
+        result = queue.get_result(instance)
+        assert result.resolved is False
+        assert result.stage == "infrastructure"
+        assert "boom" in result.test_log
+        assert queue.count_leased() == 0
+
+    @pytest.mark.skipif(not hasattr(os, "fork"), reason="requires fork")
+    @patch('sweflow_bench.utils.work_queue.run_evaluation', side_effect=fake_run_evaluation)
+    def test_coordinator_with_worker_processes(self, mock_run_evaluation, queue):
+        instances = [make_instance(f"test-{i:03d}") for i in range(20)]
+        for instance in instances:
+            queue.put(instance)
+
+        context = multiprocessing.get_context("fork")
+        workers = [
+            context.Process(target=run_worker, args=(FileWorkQueue(str(queue.queue_dir)), "/tmp/output"), kwargs=dict(worker_id=f"worker-{i}", poll_interval=0.01, exit_when_empty=True))
+            for i in range(3)
+        ]
+        for worker in workers:
+            worker.start()
+
+        results = run_coordinator(instances, queue, poll_interval=0.01)
+
+        for worker in workers:
+            worker.join()
+            assert worker.exitcode == 0
+
+        assert [result.instance_id for result in results] == [instance.instance_id for instance in instances]
+        assert all(result.resolved for result in results)
+        # evaluations happened in the worker processes, never in the coordinator
+        assert str(os.getpid()) not in {result.test_log.split()[-1] for result in results}